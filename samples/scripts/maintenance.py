@@ -76,7 +76,8 @@ def maintenance( run ):
 	if not session:
 		die( f"Unable to connect to '{gateway_name}'" )
 	cfg = session.configurationFindActive()
-	cfg.loadAll()
+	# mappings, and the elements they reference, are fetched on first access
+	cfg.load()
 
 	for name in mapping_names:
 		m = cfg.mappings( name=name )
@@ -0,0 +1,116 @@
+"""
+AirScript: Airlock Gateway Configuration Script Engine
+
+Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+"""
+Measure memory used by configuration elements
+
+Usage: python memory_benchmark.py [count]
+
+    build configuration with 'count' mappings (default 10000), connected to virtual hosts and backend groups
+    once using the element classes, once using equivalent classes with per-instance dict and type constants
+    print memory used per mapping, including its relationships
+
+No Airlock Gateway is required.
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from airscript.base import element
+from airscript.model import backendgroup, configuration, mapping, vhost
+
+
+VHOSTS = 20
+BACKENDGROUPS = 50
+
+
+def legacy( cls ):
+    """ Return subclass storing bookkeeping fields in per-instance dict, as element classes did before using __slots__ """
+    def __init__( self, *args, **kwargs ):
+        self._typename = cls._typename
+        self._path = cls._path
+        self._kind = cls._kind
+        self._operations = cls._operations
+        self.__dict__['_gw_api'] = None
+        cls.__init__( self, *args, **kwargs )
+    return type( cls.__name__, (cls,), { '__init__': __init__ } )
+
+def build( count: int, classes: dict, relationship ):
+    saved = element.Relationship
+    element.Relationship = relationship
+    try:
+        cfg = configuration.Configuration( { 'id': 1, 'attributes': { 'comment': "benchmark", 'configType': "CURRENTLY_ACTIVE", 'createdAt': "2024-01-01T00:00:00+00:00" }}, None, None )
+        vhosts = [classes['vhost']( cfg, obj=vhostData( i ), id=i ) for i in range( 1, VHOSTS + 1 )]
+        groups = [classes['backendgroup']( cfg, obj=backendgroupData( i ), id=i ) for i in range( 1, BACKENDGROUPS + 1 )]
+        mappings = []
+        for i in range( 1, count + 1 ):
+            m = classes['mapping']( cfg, obj=mappingData( i ), id=i )
+            m.addRel( vhosts[i % VHOSTS], "virtual-hosts" )
+            vhosts[i % VHOSTS].addRel( m, "mappings" )
+            m.addRel( groups[i % BACKENDGROUPS], "back-end-groups" )
+            groups[i % BACKENDGROUPS].addRel( m, "mappings" )
+            mappings.append( m )
+    finally:
+        element.Relationship = saved
+    return (cfg, vhosts, groups, mappings)
+
+def measure( count: int, classes: dict, relationship ) -> int:
+    gc.collect()
+    tracemalloc.start()
+    objects = build( count, classes, relationship )
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    gc.collect()
+    return size
+
+def mappingData( i: int ) -> dict:
+    return { 'id': str( i ), 'type': mapping.TYPENAME, 'attributes': {
+                'name': f"mapping-{i}",
+                'entryPath': { 'value': f"/app-{i}/", 'ignoreCase': True, 'regex': False },
+                'backendPath': "/",
+                'labels': ["benchmark"],
+                'operationalMode': "PRODUCTION",
+                'threatHandling': "BLOCK",
+                'backendTimeout': 120 }}
+
+def vhostData( i: int ) -> dict:
+    return { 'id': str( i ), 'type': vhost.TYPENAME, 'attributes': { 'name': f"vhost-{i}", 'hostName': f"www{i}.example.com" }}
+
+def backendgroupData( i: int ) -> dict:
+    return { 'id': str( i ), 'type': backendgroup.TYPENAME, 'attributes': { 'name': f"backend-{i}",
+                'backendHosts': [{ 'protocol': "HTTP", 'hostName': f"backend{i}", 'port': 8080, 'mode': "ENABLED", 'spare': False, 'weight': 100 }] }}
+
+def memory_benchmark( count: int ):
+    current = { 'mapping': mapping.Mapping, 'vhost': vhost.VirtualHost, 'backendgroup': backendgroup.Backendgroup }
+    previous = { k: legacy( v ) for k, v in current.items() }
+    previous_relationship = type( 'Relationship', (element.Relationship,), {} )
+    # warm up caches, e.g. attribute key names per element type
+    build( 10, current, element.Relationship )
+    slots = measure( count, current, element.Relationship )
+    dicts = measure( count, previous, previous_relationship )
+    print( f"{count} mappings, {VHOSTS} virtual hosts, {BACKENDGROUPS} backend groups" )
+    print( f"  per-instance dict: {dicts / 1024 / 1024:8.1f} MB, {dicts // count:6d} bytes per mapping" )
+    print( f"  __slots__:         {slots / 1024 / 1024:8.1f} MB, {slots // count:6d} bytes per mapping" )
+    print( f"  reduction:         {(dicts - slots) / 1024 / 1024:8.1f} MB, {100 * (dicts - slots) / dicts:5.1f}%" )
+
+if __name__ == "__main__":
+    memory_benchmark( int( sys.argv[1] ) if len( sys.argv ) > 1 else 10000 )
@@ -254,6 +254,9 @@ def listTemplates( cfg: configuration.Configuration, paths=None ):
 def listCfgInfo( cfg: configuration.Configuration, order="NVMBCHOGJIAKT" ):
     airscript.commands.listCfgInfo( cfg, order=order )
 
+def listConnectionPool():
+    airscript.commands.listConnectionPool()
+
 def validator( cfg: configuration.Configuration, selection: list[str]=['error','warning','info'], width: int=-1 ):
     airscript.commands.validator( cfg, selection, width=width )
 
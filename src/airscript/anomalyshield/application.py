@@ -28,14 +28,14 @@ KIND = 'AnomalyShieldApplication'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class AnomalyShieldApplication( element.ModelElement ):
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'anomaly-shield-applications'
+    _kind = KIND
+    
     RELATIONKEY = { "mapping": "mappings",
                     "anomaly-shield-rule": "anomaly-shield-rules",
                     "anomaly-shield-traffic-matcher": None
                   }
-    
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'anomaly-shield-applications'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    REFERENCED_BY = ( "mapping", )
     
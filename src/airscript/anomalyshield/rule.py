@@ -27,11 +27,11 @@ KIND = 'AnomalyShieldRule'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class AnomalyShieldRule( element.ModelElement ):
-    RELATIONKEY = { "anomaly-shield-application": "anomaly-shield-applications", "anomaly-shield-trigger": "anomaly-shield-triggers" }
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'anomaly-shield-rules'
+    _kind = KIND
     
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'anomaly-shield-rules'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    RELATIONKEY = { "anomaly-shield-application": "anomaly-shield-applications", "anomaly-shield-trigger": "anomaly-shield-triggers" }
+    REFERENCED_BY = ( "anomaly-shield-application", )
     
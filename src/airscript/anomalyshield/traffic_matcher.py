@@ -27,11 +27,10 @@ KIND = 'AnomalyShieldTrafficMatcher'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class AnomalyShieldTrafficMatcher( element.ModelElement ):
-    RELATIONKEY = { "ip-address-list": "ip-address-lists" }
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'anomaly-shield-traffic-matchers'
+    _kind = KIND
     
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'anomaly-shield-traffic-matchers'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    RELATIONKEY = { "ip-address-list": "ip-address-lists" }
     
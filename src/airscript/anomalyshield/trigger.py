@@ -27,9 +27,8 @@ KIND = 'AnomalyShieldTrigger'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class AnomalyShieldTrigger( element.ModelElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'anomaly-shield-triggers'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'anomaly-shield-triggers'
+    _kind = KIND
     
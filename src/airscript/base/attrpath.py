@@ -0,0 +1,125 @@
+"""
+AirScript: Airlock (Gateway) Configuration Script
+
+Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+"""
+Compiled attribute paths.
+
+Attribute paths of the form 'locking.application.response.compressionAllowed' are split once
+and cached, all elements share the same accessor for a path.
+"""
+
+
+# reads stored values, bypassing change tracking of airscript.base.observed
+_getitem = dict.__getitem__
+
+
+class InvalidPathError( KeyError ):
+    """ Attribute path does not exist in element's attributes """
+    def __init__( self, path: str, key: str ):
+        super().__init__( path )
+        self.path = path
+        self.key = key
+
+    def __str__( self ):
+        if self.key == self.path:
+            return f"Invalid path specified - '{self.key}' not found"
+        return f"Invalid path specified - '{self.key}' not found in '{self.path}'"
+
+
+class AttributePath( object ):
+    __slots__ = ( 'path', 'keys', '_parents', '_last' )
+
+    def __init__( self, path: str ):
+        """ Accessor for attribute 'path', use compile() to get the shared instance """
+        self.path = path
+        self.keys = tuple( path.split( '.' ))
+        if '' in self.keys:
+            raise ValueError( f"Invalid path specified - '{path}'" )
+        self._parents = self.keys[:-1]
+        self._last = self.keys[-1]
+
+    def __repr__( self ):
+        return f"AttributePath {self.path}"
+
+    def container( self, attrs: dict ) -> dict:
+        """ Return dict holding the attribute, raises InvalidPathError if it does not exist """
+        for key in self._parents:
+            try:
+                attrs = attrs[key]
+            except (KeyError, TypeError):
+                raise InvalidPathError( self.path, key )
+        if not isinstance( attrs, dict ):
+            raise InvalidPathError( self.path, self._last )
+        return attrs
+
+    def get( self, attrs: dict ):
+        """ Return attribute value, raises InvalidPathError if it does not exist """
+        value = attrs
+        for key in self.keys:
+            try:
+                value = _getitem( value, key )
+            except (KeyError, TypeError):
+                # report missing key
+                return self._get( attrs )
+        if isinstance( value, (dict, list) ):
+            # dicts and lists are returned with change tracking
+            return self._get( attrs )
+        return value
+
+    def _get( self, attrs: dict ):
+        try:
+            return self.container( attrs )[self._last]
+        except KeyError as e:
+            if isinstance( e, InvalidPathError ):
+                raise
+            raise InvalidPathError( self.path, self._last )
+
+    def lookup( self, attrs: dict, default=None ):
+        """ Return attribute value or 'default' if it does not exist
+
+        Values are returned as stored, without change tracking of airscript.base.observed, use them for reading only.
+        """
+        for key in self.keys:
+            try:
+                attrs = _getitem( attrs, key )
+            except (KeyError, TypeError):
+                return default
+        return attrs
+
+    def set( self, attrs: dict, value ):
+        """ Set existing attribute, raises InvalidPathError if it does not exist """
+        container = self.container( attrs )
+        if not self._last in container:
+            raise InvalidPathError( self.path, self._last )
+        container[self._last] = value
+
+
+_compiled = {}
+
+def compile( path: str ) -> AttributePath:
+    """ Return cached accessor for attribute 'path', raises ValueError for malformed paths """
+    try:
+        return _compiled[path]
+    except KeyError:
+        pass
+    accessor = AttributePath( path )
+    # concurrent compilation of the same path is harmless, both accessors are equivalent
+    _compiled[path] = accessor
+    return accessor
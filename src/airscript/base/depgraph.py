@@ -0,0 +1,135 @@
+"""
+AirScript: Airlock (Gateway) Configuration Script
+
+Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+"""
+Dependency graphs of element types.
+
+The type graph is derived from the RELATIONKEY and REFERENCED_BY tables of the element classes and defines the load order.
+Sync builds a graph of the element types with pending changes per run, see Configuration.plan().
+"""
+
+
+class DependencyGraph( object ):
+    def __init__( self ):
+        """ Directed graph of nodes and the nodes they depend on """
+        # node -> nodes it depends on (dict used as ordered set)
+        self._depends = {}
+
+    def __repr__( self ):
+        return f"DependencyGraph {len( self._depends )} nodes, {sum( len( x ) for x in self._depends.values() )} dependencies"
+
+    def __len__( self ) -> int:
+        return len( self._depends )
+
+    def __contains__( self, node ) -> bool:
+        return node in self._depends
+
+    def add( self, node ):
+        if not node in self._depends:
+            self._depends[node] = {}
+
+    def addDependency( self, node, dependency ):
+        """ 'node' must be processed after 'dependency', both are added if necessary """
+        self.add( dependency )
+        self.add( node )
+        if node != dependency:
+            self._depends[node][dependency] = None
+
+    def dependencies( self, node ) -> list:
+        return list( self._depends.get( node, {} ))
+
+    def levels( self, key=None ) -> list[list]:
+        """
+        Return nodes grouped in topological levels, nodes depend only on nodes of the same or earlier levels.
+
+        Nodes within a level are sorted by 'key'. Nodes depending on each other in a cycle are placed in the same level,
+        other nodes of a level are independent of each other.
+        """
+        components = self._components()
+        component_of = { node: nr for nr, nodes in enumerate( components ) for node in nodes }
+        depends = [set() for _ in components]
+        for node, dependencies in self._depends.items():
+            for dep in dependencies:
+                if component_of[dep] != component_of[node]:
+                    depends[component_of[node]].add( component_of[dep] )
+        remaining = set( range( len( components )))
+        r = []
+        while remaining:
+            ready = [nr for nr in remaining if not depends[nr] & remaining]
+            remaining.difference_update( ready )
+            r.append( sorted( [node for nr in ready for node in components[nr]], key=key ))
+        return r
+
+    def order( self, key=None ) -> list:
+        """ Return all nodes in topological order """
+        return [node for level in self.levels( key=key ) for node in level]
+
+    def _components( self ) -> list[list]:
+        """ Return strongly connected components (Tarjan), i.e. nodes depending on each other """
+        number = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        r = []
+        def visit( node ):
+            number[node] = lowlink[node] = len( number )
+            stack.append( node )
+            on_stack.add( node )
+            for dep in self._depends[node]:
+                if not dep in number:
+                    visit( dep )
+                    lowlink[node] = min( lowlink[node], lowlink[dep] )
+                elif dep in on_stack:
+                    lowlink[node] = min( lowlink[node], number[dep] )
+            if lowlink[node] == number[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard( member )
+                    component.append( member )
+                    if member == node:
+                        break
+                r.append( component )
+        for node in self._depends:
+            if not node in number:
+                visit( node )
+        return r
+
+
+def fromRelationKeys( classes: dict ) -> DependencyGraph:
+    """
+    Return graph of element types, 'classes' maps type names to element classes.
+
+    Types are related if either lists the other in its RELATIONKEY table. A type depends on the related types
+    it lists, unless it names them in its REFERENCED_BY table: these refer to its elements and depend on it,
+    e.g. mappings on virtual hosts and OpenAPI documents. Related types depending on each other end up in the same level.
+    """
+    graph = DependencyGraph()
+    for type_name, cls in classes.items():
+        graph.add( type_name )
+        referenced_by = getattr( cls, 'REFERENCED_BY', () )
+        for other in getattr( cls, 'RELATIONKEY', {} ) or {}:
+            if not other in classes or other == type_name:
+                continue
+            if other in referenced_by:
+                graph.addDependency( other, type_name )
+            else:
+                graph.addDependency( type_name, other )
+    return graph
@@ -18,14 +18,21 @@ along with this program; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 """
 
+import asyncio
 import copy
 import json
 import pprint
-import re
+import threading
+import weakref
 
 from typing import Self
 
+from . import attrpath
 from . import element_helpers
+from . import index
+from . import observed
+from . import query
+from . import syncplan
 from airscript.utils import cache
 from airscript.utils import internal
 from airscript.utils import output
@@ -34,41 +41,71 @@ from pyAirlock.common import exception, lookup
 LOOKUP_TYPENAME2KIND = "typename"
 LOOKUP_KIND2TYPENAME = "kind"
 
+# status codes of updates rejected as invalid, changed attributes are then sent together with the unchanged ones
+DELTA_REJECTED = (400, 422)
+
+# guards relationship lists of referenced elements while connections are sync'ed concurrently
+_backlink_lock = threading.Lock()
+
 
 class BaseElement( object ):
+    __slots__ = ( 'id', 'name', '_attrs', '_parent', '_shadow', '_attrs_modified', '_attrs_changed', '_attrs_gen', '_attrs_copies',
+                  '_deleted', '__weakref__' )
+    # updates send only changed attributes, disable for types requiring the complete attribute set
+    DELTA_UPDATE = True
+    # overwritten by individual object types
+    _typename = ""
+    _path = ""
+    _kind = ""
+    _operations = "CRUD"
+
     def __init__( self, parent, obj=None, id=None ):
         try:
             self.id = int( id )
         except (ValueError, TypeError):
             self.id = id
         self.name = None
-        self.attrs = {}
+        # generation of attribute containers, see airscript.base.observed
+        self._attrs_gen = 0
+        # weak references to elements sharing attribute containers, see copyAttributes()
+        self._attrs_copies = None
+        # paths of changed attributes, () for all, None if element was modified otherwise as well
+        self._attrs_changed = set()
+        self._attrs = None
         self._parent = parent
+        self._shadow = None
+        self._deleted = False
         if obj:
             self.loadData( obj )
+        else:
+            self.attrs = {}
         if self.id:
             self._attrs_modified = False
         else:
-            self._attrs_modified = True
-        if not hasattr( self, '_typename' ):
-            self._typename = ""         # overwritten by individual object types
-        if not hasattr( self, '_path' ):
-            self._path = ""             # overwritten by individual object types
-        if not hasattr( self, '_kind' ):
-            self._kind = ""             # overwritten by individual object types
-        if not hasattr( self, '_operations' ):
-            self._operations = "CRUD"   # overwritten by individual object types
-        self._deleted = False
+            self._setModified()
         if self._parent.conn != None:
-            self._gw_api = self._parent.conn.getAPI( self._typename )
             if not cache.isCached( self._parent.conn.getName(), type( self )):
                 cache.cacheAttributeKeys( self._parent.conn.getName(), type( self ), internal.collectKeyNames( self.attrs ))
-        else:
-            self._gw_api = None
     
     def __repr__( self ):
         return str( self.me() )
     
+    @property
+    def attrs( self ) -> dict:
+        """ Attributes, direct modifications of nested dicts and lists are tracked as well """
+        return self._attrs
+    
+    @attrs.setter
+    def attrs( self, value: dict ):
+        self._attrs = observed.observe( value, self )
+    
+    @property
+    def _gw_api( self ):
+        """ REST API handler of element type, same for all elements of a type """
+        if self._parent == None or self._parent.conn == None:
+            return None
+        return self._parent.conn.getAPI( self._typename )
+    
     def getId( self ):
         return self.id
     
@@ -114,16 +151,25 @@ class BaseElement( object ):
     def isDeleted( self ):
         return self._deleted
     
+    def indexKeys( self ) -> dict[str, list]:
+        """ Return keys of element in configuration's secondary indexes, per index name """
+        if self.name == None:
+            return {}
+        return { index.NAME: [self.name] }
+    
     def loadData( self, data: dict ):
         self.id = element_helpers.extractId( data )
         self.name = self._extractName( data )
         self.attrs = data['attributes']
         self._attrs_modified = True
+        self._attrs_changed = set()
+        self._shadow = None
 
     def delete( self ) -> bool:
         if not 'D' in self._operations:
             return False
         self._deleted = True
+        self._markChanged()
     
     def get( self, path: str ):
         """ Return attribute value.
@@ -133,13 +179,21 @@ class BaseElement( object ):
         """
         if not 'R' in self._operations:
             return None
-        array = path.split( '.' )
-        attr = self._findAttribute( array )
-        if attr != None:
-            return attr[array[-1]]
-        else:
+        try:
+            return attrpath.compile( path ).get( self._attrs )
+        except (attrpath.InvalidPathError, ValueError) as e:
+            output.error( str( e ))
             return None
     
+    def getMany( self, paths: list[str], default=None ) -> list:
+        """ Return values of several attributes, e.g. for reporting.
+        
+        Attributes not present in this element are returned as 'default', no error is reported.
+        """
+        if not 'R' in self._operations:
+            return [default] * len( paths )
+        return [attrpath.compile( path ).lookup( self._attrs, default ) for path in paths]
+    
     def set( self, path: str, value ) -> bool:
         """ Set attribute value.
         
@@ -148,13 +202,13 @@ class BaseElement( object ):
         """
         if not 'U' in self._operations:
             return False
-        array = path.split( '.' )
-        attr = self._findAttribute( array )
-        if isinstance( attr[array[-1]], list ) and not isinstance( value, list ):
+        attr, key = self._findAttribute( path )
+        if attr == None:
+            return False
+        if isinstance( attr[key], list ) and not isinstance( value, list ):
             value = [ value ]
-        if attr[array[-1]] != value:
-            attr[array[-1]] = value
-            self._attrs_modified = True
+        if attr[key] != value:
+            attr[key] = value
         return True
     
     def append( self, path: str, value ) -> bool:
@@ -165,13 +219,11 @@ class BaseElement( object ):
         """
         if not 'U' in self._operations:
             return False
-        array = path.split( '.' )
-        attr = self._findAttribute( array )
-        if not isinstance( attr[array[-1]], list ):
+        attr, key = self._findAttribute( path )
+        if attr == None or not isinstance( attr[key], list ):
             return False
-        if not value in attr[array[-1]]:
-            attr[array[-1]].append( value )
-            self._attrs_modified = True
+        if not value in attr[key]:
+            attr[key].append( value )
         return True
     
     def remove( self, path: str, value ) -> bool:
@@ -182,35 +234,46 @@ class BaseElement( object ):
         """
         if not 'U' in self._operations:
             return False
-        array = path.split( '.' )
-        attr = self._findAttribute( array )
-        if not isinstance( attr[array[-1]], list ):
+        attr, key = self._findAttribute( path )
+        if attr == None or not isinstance( attr[key], list ):
             return False
-        try:
-            attr[array[-1]].remove( value )
-        except ValueError:
+        if not value in attr[key]:
             return False
-        self._attrs_modified = True
+        attr[key].remove( value )
         return True
     
     def setName( self, value: str ):
         self.name = value
-        self._attrs_modified = True
+        self._setModified()
     
     def setAttributes( self, attrs: dict ):
-        self.attrs = attrs
-        self._attrs_modified = True
+        """ Replace attributes, passing the element's own attributes is not necessary after modifying them """
+        if not attrs is self.attrs:
+            # modifications of the element's own attributes are tracked already
+            self._shadowAttrs()
+            self.attrs = attrs
+            self._attrsChanged( [()] )
         self.name = self._extractName( attrs )
     
     def copyAttributes( self, obj: Self ):
+        """ Copy attributes of 'obj'.
+        
+        Nested attributes are shared with 'obj' until either element accesses them through its attributes.
+        If dicts or lists of 'obj' referenced before copying are modified, this element gets its own copies first.
+        """
         if type( obj ) != type( self ):
             output.error( f"Type mismatch: parameter should be '{type(self)}' but is '{type(obj)}'" )
             return False
         if obj.attrs == None:
             output.error( "Parameter does not have attributes set" )
             return False
-        self.attrs = copy.deepcopy( obj.attrs )
-        self._attrs_modified = True
+        self._shadowAttrs()
+        observed.release( obj.attrs )
+        self.attrs = obj.attrs
+        if obj._attrs_copies == None:
+            obj._attrs_copies = []
+        obj._attrs_copies.append( weakref.ref( self ))
+        self._attrsChanged( [()] )
         return True
     
     def copyAttributeKeys( self, obj: Self ):
@@ -220,10 +283,23 @@ class BaseElement( object ):
         if obj.attrs == None:
             output.error( "Parameter does not have attributes set" )
             return False
+        self._shadowAttrs()
         self.attrs = self._copyDictKeys( obj.attrs )
-        self._attrs_modified = True
+        self._attrsChanged( [()] )
         return True
     
+    async def async_sync( self, limit: asyncio.Semaphore=None ) -> bool:
+        """
+        Asynchronous variant of sync().
+
+        REST API calls block, so sync() is offloaded to the event loop's default thread pool, see asyncio.to_thread().
+        'limit' restricts the number of elements sync'ed at the same time, the size of the thread pool does as well.
+        """
+        if limit == None:
+            return await asyncio.to_thread( self.sync )
+        async with limit:
+            return await asyncio.to_thread( self.sync )
+    
     def sync( self ) -> bool:
         """
         Sync changes to current object to Airlock Gateway
@@ -233,27 +309,31 @@ class BaseElement( object ):
         - true: success, sync'ed
         - false: delete element
         """
-        if not ('U' in self._operations or 'C' in self._operations):
-            return False
-        classPointer = self._parent.conn.getAPI( self._typename )
+        for op in self.planSync():
+            self._parent.syncOperation( op )
+        self._syncFinish()
+        return not self._deleted and self._syncAPI() != None
+    
+    def planSync( self, plan: syncplan.SyncPlan=None ) -> list[syncplan.SyncOperation]:
+        """ Return REST API operations required to sync changes to Airlock Gateway, see Configuration.plan() """
+        classPointer = self._syncAPI()
         if classPointer == None:
-            return False
+            return []
         if self._deleted:
-            classPointer.delete( self.id )
-            return False
-        if self._attrs_modified:
-            if self.id:
-                self.loadData( classPointer.update( self.id, data=self.datafy() ))
-            else:
-                self.loadData( classPointer.create( data=self.datafy() ))
-            self._attrs_modified = False
-        return True
+            if not self.id:
+                # never created on Airlock Gateway
+                return []
+            return [self._planDelete( classPointer )]
+        if not self._attrs_modified:
+            return []
+        return self._planAttributes( classPointer )
     
     def datafy( self, attrs: dict=None, addon: dict=None ) -> str:
         if attrs == None:
             attrs = self.attrs
         obj = self._objectify( attrs )
         if addon:
+            obj['attributes'] = dict( obj['attributes'] )
             for k, v in addon.items():
                 obj['attributes'][k] = v
         if self.id != None:
@@ -272,21 +352,215 @@ class BaseElement( object ):
     internal methodes
     """
     def _objectify( self, attrs: dict={} ):
-        return { 'attributes': attrs, 'type': self._typename }
+        return { 'attributes': observed.plain( attrs ), 'type': self._typename }
     
-    def _findAttribute( self, array: list[str] ):
-        attr = self.attrs
-        for entry in array[:-1]:
-            try:
-                if attr == None:
-                    attr = self.attrs[entry]
-                else:
-                    attr = attr[entry]
-            except KeyError:
-                output.error( f"Invalid path specified - '{entry}' not found" )
+    def _findAttribute( self, path: str ) -> tuple[dict|None, str|None]:
+        """ Return dict holding attribute 'path' and its key, (None, None) if attribute does not exist """
+        try:
+            accessor = attrpath.compile( path )
+            attr = accessor.container( self.attrs )
+            if not accessor.keys[-1] in attr:
+                raise attrpath.InvalidPathError( path, accessor.keys[-1] )
+        except (attrpath.InvalidPathError, ValueError) as e:
+            output.error( str( e ))
+            return (None, None)
+        return (attr, accessor.keys[-1])
+
+    def _shadowAttrs( self ):
+        """ Keep copy of attributes as loaded from Airlock Gateway before they are first modified """
+        if self._shadow == None and self.id and not self._attrs_modified:
+            self._shadow = copy.deepcopy( self.attrs )
+    
+    def _attrsDelta( self ) -> dict|None:
+        """ Return changed attributes, None if complete attributes must be sent
+
+        An empty dict is returned only if change tracking shows that no attribute differs from Airlock Gateway.
+        """
+        if not self.DELTA_UPDATE or self._shadow == None:
+            return None
+        if self._attrs_changed == None:
+            delta = self._diffDict( self.attrs, self._shadow )
+            if delta == {}:
                 return None
-        return attr
+            return delta
+        if () in self._attrs_changed:
+            return self._diffDict( self.attrs, self._shadow )
+        return self._pathsDelta()
+    
+    def _pathsDelta( self ) -> dict|None:
+        """ Return attributes at changed paths differing from shadow, None if attributes were removed """
+        delta = {}
+        done = []
+        # a changed path includes all paths below it
+        for path in sorted( self._attrs_changed, key=len ):
+            if any( path[:len( p )] == p for p in done ):
+                continue
+            value = observed.lookup( self.attrs, path )
+            if value is observed.MISSING:
+                return None
+            old = observed.lookup( self._shadow, path )
+            if old is observed.MISSING:
+                diff = value
+            elif isinstance( value, dict ) and isinstance( old, dict ):
+                diff = self._diffDict( value, old )
+                if diff == None:
+                    return None
+                if diff == {}:
+                    continue
+            elif value == old:
+                continue
+            else:
+                diff = value
+            target = delta
+            for key in path[:-1]:
+                target = target.setdefault( key, {} )
+            target[path[-1]] = diff
+            done.append( path )
+        return delta
+    
+    def _diffDict( self, attrs: dict, shadow: dict ) -> dict|None:
+        """ Return attributes differing from shadow, None if attributes were removed """
+        for k in shadow:
+            if not k in attrs:
+                return None
+        diff = {}
+        for k,v in attrs.items():
+            if not k in shadow:
+                diff[k] = v
+                continue
+            if isinstance( v, dict ) and isinstance( shadow[k], dict ):
+                subdiff = self._diffDict( v, shadow[k] )
+                if subdiff == None:
+                    return None
+                if subdiff != {}:
+                    diff[k] = subdiff
+                continue
+            if v != shadow[k]:
+                diff[k] = v
+        return diff
+    
+    def _syncAPI( self ):
+        """ Return REST API handler used to sync element, None if element cannot be sync'ed """
+        if not ('U' in self._operations or 'C' in self._operations):
+            return None
+        return self._parent.conn.getAPI( self._typename )
+    
+    def _syncPath( self, classPointer, subpath: str=None ) -> str:
+        path = f"/configuration/{classPointer.ELEMENT_PATH}/{self.id if self.id else '<new>'}"
+        if subpath:
+            path = f"{path}/{subpath}"
+        return path
+    
+    def _planDelete( self, classPointer ) -> syncplan.SyncOperation:
+        return syncplan.SyncOperation( "delete", self, "DELETE", self._syncPath( classPointer ),
+                                       execute=lambda: classPointer.delete( self.id ), confirm=self._confirmed )
+    
+    def _planAttributes( self, classPointer, attrs: dict=None ) -> list[syncplan.SyncOperation]:
+        """
+        Plan creation or update of element.
 
+        Updates send only changed attributes if possible, 'attrs' overrides the attributes sent.
+        """
+        full = self.datafy( attrs=attrs )
+        if not self.id:
+            return [syncplan.SyncOperation( "create", self, "POST", f"/configuration/{classPointer.ELEMENT_PATH}", payload=full,
+                                            execute=lambda: self._synced( classPointer.create( data=full )), confirm=self._confirmed,
+                                            recover=lambda: self._recoverCreated( classPointer ))]
+        delta = self._attrsDelta()
+        if delta != None and attrs != None:
+            delta = {k: v for k, v in delta.items() if k in attrs}
+        if delta == {} and self._attrs_changed != None:
+            # no attribute differs from Airlock Gateway, element is marked unmodified by _syncFinish()
+            return []
+        if not delta:
+            return [syncplan.SyncOperation( "update", self, "PATCH", self._syncPath( classPointer ), payload=full,
+                                            execute=lambda: self._synced( classPointer.update( self.id, data=full )), confirm=self._confirmed )]
+        partial = self.datafy( attrs=delta )
+        return [syncplan.SyncOperation( "update", self, "PATCH", self._syncPath( classPointer ), payload=partial,
+                                        execute=lambda: self._synced( self._updateDelta( classPointer, partial, full )), confirm=self._confirmed )]
+    
+    def _updateDelta( self, classPointer, partial: dict, full: dict ) -> dict:
+        """
+        Send changed attributes, the complete attributes if Airlock Gateway rejects them as invalid (400, 422),
+        e.g. attributes only accepted together.
+
+        Server (5xx) and communication errors are raised, the partial update is retried by Configuration.syncOperation().
+        """
+        try:
+            return classPointer.update( self.id, data=partial )
+        except exception.AirlockAPIError as e:
+            if not e.status_code in DELTA_REJECTED:
+                raise
+            return classPointer.update( self.id, data=full )
+    
+    def _synced( self, data: dict ):
+        """ Load element data returned by Airlock Gateway after creation or update """
+        self.loadData( data )
+        self._attrs_modified = False
+    
+    def _recoverCreated( self, classPointer ) -> bool|None:
+        """ Look up element by name after a create with unknown outcome, returns True if Airlock Gateway has it, None if unnamed """
+        if self.name == None:
+            return None
+        for data in classPointer.read() or []:
+            if data.get( 'attributes', {} ).get( 'name' ) == self.name:
+                self._synced( data )
+                return True
+        return False
+    
+    def _confirmed( self, entry: dict ):
+        """ Operation already performed by an earlier sync, 'entry' as recorded in sync journal """
+        if not self.id and entry.get( 'id' ):
+            self.id = entry['id']
+        self._attrs_modified = False
+        self._attrs_changed = set()
+        self._shadow = None
+    
+    def _syncFinish( self ):
+        """ Called after all operations of element have been executed successfully """
+        if self._attrs_changed != None and not self._deleted:
+            # attributes sent or found unchanged when planning, see _planAttributes()
+            self._attrs_modified = False
+            self._attrs_changed = set()
+            self._shadow = None
+    
+    def _setModified( self ):
+        """ Element modified, not necessarily only its attributes """
+        self._attrs_modified = True
+        self._attrs_changed = None
+        self._markChanged()
+    
+    def _attrsChanging( self ):
+        """ Called by attribute containers before they are modified """
+        self._shadowAttrs()
+    
+    def _attrsReleasedChanging( self ):
+        """ Called before attribute containers shared by copyAttributes() are modified, copies detach from them """
+        copies = self._attrs_copies
+        self._attrs_copies = None
+        for ref in copies or []:
+            elem = ref()
+            if elem != None:
+                elem._attrsReleasedChanging()
+                observed.detach( elem._attrs )
+    
+    def _attrsChanged( self, paths: list[tuple] ):
+        """ Called by attribute containers after they have been modified, 'paths' lists the changed attributes """
+        self._attrs_modified = True
+        if self._attrs_changed != None:
+            self._attrs_changed.update( paths )
+        self._markChanged()
+    
+    def _markChanged( self ):
+        """ Register element with configuration's change set, visited by Configuration.sync() """
+        if self._parent != None:
+            self._parent.markChanged( self )
+    
+    def _syncError( self, message: str ):
+        """ Report sync error, collected by configuration while sync'ing all elements """
+        if not self._parent.recordSyncError( self, message ):
+            output.error( message )
+    
     def _notImplemented( self ):
         output.error( "Operation not available" )
         return False
@@ -294,7 +568,7 @@ class BaseElement( object ):
     def _copyDictKeys( self, attrs ):
         new = {}
         for k,v in attrs.items():
-            if type( v ) == dict:
+            if isinstance( v, dict ):
                 new[k] = self._copyDictKeys( v )
             elif type( v ) == int:
                 new[k] = 0
@@ -302,7 +576,7 @@ class BaseElement( object ):
                 new[k] = ""
             elif type( v ) == bool:
                 new[k] = False
-            elif type( v ) == list:
+            elif isinstance( v, list ):
                 new[k] = []
             else:
                 new[k] = None
@@ -316,10 +590,16 @@ class BaseElement( object ):
     
 
 class ModelElement( BaseElement ):
+    __slots__ = ( 'rels', '_rels_modified', '_rels_deleted', '_connections', '_relindex' )
     RELATIONKEY = {}
+    # related types whose elements refer to elements of this type, they depend on this type,
+    # this type depends on all other types in RELATIONKEY, see depgraph.fromRelationKeys()
+    REFERENCED_BY = ()
 
     def __init__( self, parent, obj=None, id=None ):
         self.rels = {}
+        # relationships by referenced element, an element is referenced at most once
+        self._relindex = {}
         super().__init__( parent, obj=obj, id=id )
         if self.id:
             self._rels_modified = False
@@ -357,36 +637,21 @@ class ModelElement( BaseElement ):
         Value is:
         - a constant (number, boolean)
         - a regexp (strings)
-        - None: value does not matter but attribute needs to have one
+        - None: attribute must not have a value
+        - a dict with operator and value, e.g. { 'op': '>=', 'value': 60 }, see airscript.base.query
         """
-        for condition in filter:
-            r = True
-            for name, value in condition.items():
-                match = False
-                if name == 'name':
-                    match = re.match( value, self.name )
-                elif name == 'id':
-                    match = re.match( str( value ), self.id )
-                else:
-                    attr = self.get( name )
-                    if attr == None and value == None:
-                        match = True
-                    elif isinstance( value, bool ):
-                        match = attr == value
-                    elif isinstance( value, int ) or isinstance( value, float ):
-                        match = attr == value
-                    else:
-                        match = re.match( value, attr )
-                if not match:
-                    r = False
-                    break
-            if r:
-                break
-        return r
+        try:
+            return query.Query( filter ).match( self )
+        except ValueError as e:
+            output.error( str( e ))
+            return False
     
     def loadData( self, data: dict, update: bool=False ):
         super().loadData( data=data )
         if not update and 'relationships' in data:
+            # while loading collections, the configuration resolves all relationships at once
+            if self._parent != None and self._parent.deferRelationships( self, data['relationships'] ):
+                return
             for grp,d in data['relationships'].items():
                 if isinstance( d['data'], list ):
                     for item in d['data']:
@@ -398,8 +663,13 @@ class ModelElement( BaseElement ):
     def delete( self ) -> bool:
         super().delete()
         for reltype in self.rels:
-            while len( self.rels[reltype] ):
-                self.deleteRel( self.rels[reltype][0].reference, markOnly=False )
+            if self.rels[reltype] == []:
+                continue
+            for rel in list( self.rels[reltype] ):
+                rel.reference.deleteRel( self, removeBacklink=False, markOnly=False )
+            self.rels[reltype].clear()
+            self._rels_modified = True
+        self._relindex = {}
     
     def copyRelationships( self, obj: Self ):
         if type( obj ) != type( self ):
@@ -409,7 +679,9 @@ class ModelElement( BaseElement ):
             return True
         else:
             self.rels = self._copyDictKeys( obj.rels )
+            self._reindexRels()
         self._rels_modified = True
+        self._markChanged()
         return True
     
     def getRelationType( self, item_type, referencing_key ):
@@ -434,7 +706,11 @@ class ModelElement( BaseElement ):
                 self.rels[reltype].append( v )
             except KeyError:
                 self.rels[reltype] = [ v ]
+            self._relindex[id( referencedElement )] = v
             self._rels_modified = True
+            if v.status != '':
+                # relationships read from the gateway need no sync
+                self._markChanged()
 
     def deleteRel( self, reference: Self, removeBacklink: bool=True, markOnly: bool=True ) -> bool:
         rel = self._findRel( reference )
@@ -445,6 +721,7 @@ class ModelElement( BaseElement ):
         else:
             self._delRel( rel )
         self._rels_modified = True
+        self._markChanged()
         if removeBacklink:
             reference.deleteRel( self, removeBacklink=False, markOnly=markOnly )
         return True
@@ -454,6 +731,11 @@ class ModelElement( BaseElement ):
         if rel == None:
             return False
         return True
+    
+    def isConnectionPending( self, reference: Self ) -> bool:
+        """ Check if connection to 'reference' is still to be added on Airlock Gateway """
+        rel = self._findRel( reference )
+        return rel != None and rel.status == 'new'
 
     def listRelWithKind( self ) -> dict:
         r = {}
@@ -462,55 +744,182 @@ class ModelElement( BaseElement ):
             r[reltype] = [ref.reference.name for ref in self.rels[reltype]]
         return r
 
-    def sync( self ) -> bool:
+    def planSync( self, plan: syncplan.SyncPlan=None ) -> list[syncplan.SyncOperation]:
         """
-        Sync changes to current object to Airlock Gateway
+        Return REST API operations required to sync changes to Airlock Gateway
         - Set all attributes
         - Link relations to object types which should already have been updated
         - Other relations are (later) linked from the other object types back to here
+        """
+        ops = super().planSync()
+        if self._deleted or self._syncAPI() == None:
+            return ops
+        return ops + self._planRelationships( plan )
+    
+    def _planRelationships( self, plan: syncplan.SyncPlan=None ) -> list[syncplan.SyncOperation]:
+        """ Plan connection changes, one request per relationship type for all added resp. removed connections """
+        lst_rels: list[Relationship]
+        ops = []
+        if not self._rels_modified:
+            return ops
+        classPointer = self._parent.conn.getAPI( self._typename )
+        for reltype, lst_rels in self.rels.items():
+            #relPointer = self._parent.conn.getAPI( reltype )
+            added = []
+            removed = []
+            for rel in lst_rels:
+                if rel.reference.isDeleted():
+                    # nothing to do - when other object is deleted on Airflock Gateway, relationship will be removed automatically
+                    continue
+                if rel.status == 'del':
+                    if plan == None or plan.claimDisconnect( self, rel.reference ):
+                        removed.append( rel )
+                elif rel.status == 'new':
+                    if plan == None or plan.claimConnect( self, rel.reference ):
+                        added.append( rel )
+            path = self._syncPath( classPointer, f"relationships/{self._connectionPath( classPointer, reltype )}" )
+            if removed:
+                ops.append( syncplan.SyncOperation( "disconnect", self, "DELETE", path, payload=self._connectionData( reltype, removed, planned=True ),
+                                                    reference=[rel.reference for rel in removed],
+                                                    execute=lambda reltype=reltype, rels=removed: self._disconnectMany( classPointer, reltype, rels ),
+                                                    confirm=lambda entry, rels=removed: [self._disconnected( rel ) for rel in rels] ))
+            if added:
+                ops.append( syncplan.SyncOperation( "connect", self, "PATCH", path, payload=self._connectionData( reltype, added, planned=True ),
+                                                    reference=[rel.reference for rel in added],
+                                                    execute=lambda reltype=reltype, rels=added: self._connectMany( classPointer, reltype, rels ),
+                                                    confirm=lambda entry, rels=added: [self._connected( rel ) for rel in rels] ))
+        return ops
+    
+    def _connectionData( self, reltype: str, rels: list, planned: bool=False ) -> dict:
+        """
+        JSON:API resource identifiers of connected elements, builtin elements (negative id) are never connected explicitly.
 
-        Returns:
-        - true: success, sync'ed
-        - false: delete element
+        Elements without id do not exist on Airlock Gateway and are left out,
+        when 'planned', they are to be created by the sync and shown as '<new>'.
+        """
+        data = []
+        for rel in rels:
+            if rel.reference.id == None:
+                if planned:
+                    data.append( { 'type': rel.reference.getTypeName(), 'id': '<new>' } )
+            elif int( rel.reference.id ) >= 0:
+                data.append( { 'type': rel.reference.getTypeName(), 'id': rel.reference.id } )
+        return { 'data': data }
+    
+    def _connectionPath( self, classPointer, reltype: str ) -> str:
+        """
+        REST API subpath of relationship type, from the RELATIONPATH table of the pyAirlock handler.
+
+        The table does not tell to-one from to-many relationships, see _isToMany().
+        """
+        try:
+            return classPointer.RELATIONPATH[classPointer.RELATIONDATA.index( reltype )]
+        except (AttributeError, TypeError, ValueError, IndexError):
+            return reltype
+    
+    def _isToMany( self, subpath: str ) -> bool:
+        """
+        Relationship with REST API 'subpath' connects to a list of elements.
+
+        Airlock Gateway names to-many relationships in plural, e.g. 'mappings' or 'mappings-whitelists',
+        and to-one relationships in singular, e.g. 'ssl-certificate' or 'template'.
+        """
+        return subpath[-1] == 's'
+    
+    def _connectMany( self, classPointer, reltype: str, rels: list ):
         """
-        if not super().sync():
+        Add connections in one request, one by one if Airlock Gateway rejects the batch.
+
+        Connections to elements not created on Airlock Gateway, e.g. because their creation failed, remain pending.
+        """
+        for rel in rels:
+            if rel.reference.id == None:
+                self._syncError( f"Sync error for {self._typename}:{self.name} - connection to {reltype}:{rel.reference.name} pending, element has not been created" )
+        rels = [rel for rel in rels if rel.reference.id != None]
+        if len( rels ) > 1 and self._batchConnections( classPointer, classPointer.patch, reltype, rels ):
+            for rel in rels:
+                self._connected( rel )
+            return
+        for rel in rels:
+            self._connect( classPointer, reltype, rel )
+    
+    def _disconnectMany( self, classPointer, reltype: str, rels: list ):
+        """ Remove connections in one request, one by one if Airlock Gateway rejects the batch """
+        # connections may already have been removed from the other side
+        present = set( id( x ) for x in self.rels.get( reltype, [] ))
+        rels = [rel for rel in rels if id( rel ) in present]
+        # elements never created on Airlock Gateway have no connections there
+        for rel in rels:
+            if rel.reference.id == None:
+                self._disconnected( rel )
+        rels = [rel for rel in rels if rel.reference.id != None]
+        if len( rels ) > 1 and self._batchConnections( classPointer, classPointer.delete, reltype, rels ):
+            for rel in rels:
+                self._disconnected( rel )
+            return
+        for rel in rels:
+            self._disconnect( classPointer, reltype, rel )
+    
+    def _batchConnections( self, classPointer, method, reltype: str, rels: list ) -> bool:
+        """ Send connection changes for to-many relationship in one request, returns False if not possible """
+        subpath = self._connectionPath( classPointer, reltype )
+        if not self._isToMany( subpath ):
             return False
-        return self._syncRelationships()
+        data = self._connectionData( reltype, rels )
+        if data['data'] == []:
+            return True
+        try:
+            r = method( self.id, f"relationships/{subpath}", data=data, expect=[204,404] )
+        except exception.AirlockServerError:
+            raise
+        except exception.AirlockAPIError:
+            return False
+        return r != None and r != False
     
-    def _syncRelationships( self ):
-        lst_rels: list[Relationship]
+    def _connect( self, classPointer, reltype: str, rel ):
+        try:
+            r = classPointer.addConnection( reltype, id=self.id, relation_id=rel.reference.id )
+            self._connected( rel )
+        except exception.AirlockInvalidRelationshipTypeError:
+            r = False
+        if not r:
+            self._syncError( f"Sync error for {self._typename}:{self.name} - failed to add connection to {reltype}:{rel.reference.name}" )
+    
+    def _disconnect( self, classPointer, reltype: str, rel ):
+        try:
+            if not classPointer.removeConnection( reltype, id=self.id, relation_id=rel.reference.id ):
+                self._syncError( f"Sync error for {self._typename}:{self.name} - failed to remove connection to {reltype}:{rel.reference.name}" )
+        except exception.AirlockInvalidRelationshipTypeError:
+            pass
+        self._disconnected( rel )
+    
+    def _connected( self, rel ):
         entry: Relationship
-        if self._rels_modified:
-            classPointer = self._parent.conn.getAPI( self._typename )
-            for reltype, lst_rels in self.rels.items():
-                #relPointer = self._parent.conn.getAPI( reltype )
-                for rel in lst_rels:
-                    if rel.reference.isDeleted():
-                        # nothing to do - when other object is deleted on Airflock Gateway, relationship will be removed automatically
-                        continue
-                    if rel.status == 'del':
-                        try:
-                            if not classPointer.removeConnection( reltype, id=self.id, relation_id=rel.reference.id ):
-                                output.error( f"Sync error for {self._typename}:{self.name} - failed to remove connection to {reltype}:{rel.reference.name}" )
-                        except exception.AirlockInvalidRelationshipTypeError:
-                            pass
-                        entry = rel.reference._findRel( self )
-                        rel.reference.rels[entry.getType()].remove( entry )
-                    elif rel.status == 'new':
-                        if self._parent.elementOrderNr( self._typename ) < self._parent.elementOrderNr( reltype ):
-                            # referenced config element may not have yet been sync'ed
-                            continue
-                        try:
-                            r = classPointer.addConnection( reltype, id=self.id, relation_id=rel.reference.id )
-                            rel.status = ''
-                        except exception.AirlockInvalidRelationshipTypeError:
-                            r = False
-                        if not r:
-                            output.error( f"Sync error for {self._typename}:{self.name} - failed to add connection to {reltype}:{rel.reference.name}" )
-                # remove deleted relationship from object
-                self.rels[reltype][:] = [x for x in self.rels[reltype] if x.status != 'del']
-            self._rels_modified = False
-        return True
+        rel.status = ''
+        # the connection exists for both sides, the other one must not add it again
+        with _backlink_lock:
+            entry = rel.reference._findRel( self )
+            if entry != None and entry.status == 'new':
+                entry.status = ''
+    
+    def _disconnected( self, rel ):
+        entry: Relationship
+        with _backlink_lock:
+            entry = rel.reference._findRel( self )
+            if entry != None:
+                rel.reference._delRel( entry )
+    
+    def _syncFinish( self ):
+        super()._syncFinish()
+        if not self._rels_modified or self._deleted or self._syncAPI() == None:
+            return
+        # remove deleted relationship from object
+        for reltype in self.rels:
+            for x in self.rels[reltype]:
+                if x.status == 'del':
+                    self._unindexRel( x )
+            self.rels[reltype][:] = [x for x in self.rels[reltype] if x.status != 'del']
+        self._rels_modified = False
     
     def declarativeStoreConnections( self, connections: dict ):
         self._connections = connections
@@ -578,14 +987,19 @@ class ModelElement( BaseElement ):
         obj: ModelElement
         type_name = item['type']
         obj = self._parent.addElement( type_name, id=element_helpers.extractId( item ))
-        if type_name != "mapping-template":
+        self._linkRel( reltype, obj )
+    
+    def _linkRel( self, reltype: str, obj: Self ):
+        """ Add relationship to referenced element 'obj' and its backlink """
+        if obj.getTypeName() != "mapping-template":
             obj.addRel( self, obj.getRelationType( self._typename, reltype ), backlink=True )
         self.addRel( obj, reltype )
     
     def _delRel( self, rel ):
+        self._unindexRel( rel )
         try:
             self.rels[rel.getType()].remove( rel )
-        except KeyError:
+        except (KeyError, ValueError):
             pass
         # type_name = rel.reference.getTypeName()
         # try:
@@ -594,19 +1008,14 @@ class ModelElement( BaseElement ):
         #     pass
 
     def _findRel( self, referencedElement: Self ) -> object:
-        lst_rels: list[Relationship]
-        for _, lst_rels in self.rels.items():
-            for rel in lst_rels:
-                if rel.reference == referencedElement:
-                    return rel
-        # type_name = referencedElement.getTypeName()
-        # try:
-        #     for rel in self.rels[type_name]:
-        #         if rel.reference == referencedElement:
-        #             return rel
-        # except KeyError:
-        #     pass
-        return None
+        return self._relindex.get( id( referencedElement ))
+
+    def _unindexRel( self, rel ):
+        if self._relindex.get( id( rel.reference )) is rel:
+            del self._relindex[id( rel.reference )]
+
+    def _reindexRels( self ):
+        self._relindex = { id( rel.reference ): rel for lst_rels in self.rels.values() for rel in lst_rels }
 
     def _getRelationshipPath( self, rel ):
         relPath = rel.getPath()
@@ -622,23 +1031,10 @@ class ModelElement( BaseElement ):
             relPath = 'template'
         return relPath
     
-    def _diffDict( self, attrs, shadow ):
-        diff = {}
-        for k,v in attrs.items():
-            if not k in shadow:
-                diff[k] = v
-                continue
-            if type( v ) == dict:
-                subdiff = self._diffDict( v, shadow[k] )
-                if subdiff != {}:
-                    diff[k] = subdiff
-                continue
-            if v != shadow[k]:
-                diff[k] = v
-        return diff
-    
 
 class Relationship( object ):
+    __slots__ = ( 'reference', 'relation_type', 'status' )
+    
     def __init__( self, reference: ModelElement, reltype: str, load: bool=False ):
         self.reference = reference
         self.relation_type = reltype
@@ -0,0 +1,111 @@
+"""
+AirScript: Airlock (Gateway) Configuration Script
+
+Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+"""
+Secondary indexes of a configuration's element collections.
+
+Index names and keys are defined by the elements themselves, see BaseElement.indexKeys().
+Deleted elements are not indexed.
+"""
+
+NAME = "name"
+# mapping labels, lowercased resp. as assigned
+LABEL = "label"
+LABEL_NAME = "labelName"
+ENTRY_PATH = "entryPath"
+HOSTNAME = "hostName"
+
+
+class ElementIndex( object ):
+    def __init__( self ):
+        """ Secondary indexes of one element collection """
+        # index name -> key -> elements (dict used as ordered set)
+        self._index = {}
+        # element -> keys currently indexed, per index name
+        self._keys = {}
+
+    def __repr__( self ):
+        return f"ElementIndex {', '.join( f'{name}: {len( keys )} keys' for name, keys in self._index.items() )}"
+
+    def __len__( self ) -> int:
+        return len( self._keys )
+
+    def refresh( self, elem ):
+        """ Re-index element after a change, elements not yet indexed are ignored """
+        if elem in self._keys:
+            self.update( elem )
+
+    def update( self, elem ):
+        """ Add element or re-index it after a change """
+        self.discard( elem )
+        if elem.isDeleted():
+            return
+        keys = elem.indexKeys()
+        for name, values in keys.items():
+            try:
+                index = self._index[name]
+            except KeyError:
+                index = self._index[name] = {}
+            for key in values:
+                try:
+                    index[key][elem] = None
+                except KeyError:
+                    index[key] = { elem: None }
+        self._keys[elem] = keys
+
+    def discard( self, elem ):
+        keys = self._keys.pop( elem, None )
+        if keys == None:
+            return
+        for name, values in keys.items():
+            index = self._index[name]
+            for key in values:
+                entries = index.get( key )
+                if entries == None:
+                    continue
+                entries.pop( elem, None )
+                if entries == {}:
+                    del index[key]
+
+    def lookup( self, name: str, key ) -> list:
+        """ Return elements with 'key' in index 'name' """
+        try:
+            return list( self._index[name][key] )
+        except KeyError:
+            return []
+
+    def first( self, name: str, key ):
+        """ Return first element with 'key' in index 'name', None if there is none """
+        try:
+            return next( iter( self._index[name][key] ))
+        except (KeyError, StopIteration):
+            return None
+
+    def has( self, name: str ) -> bool:
+        """ Check if index 'name' is maintained for this collection """
+        return name in self._index
+
+    def keys( self, name: str ) -> list:
+        """ Return all keys of index 'name' """
+        return list( self._index.get( name, {} ))
+
+    def clear( self ):
+        self._index = {}
+        self._keys = {}
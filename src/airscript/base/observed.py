@@ -0,0 +1,332 @@
+"""
+AirScript: Airlock (Gateway) Configuration Script
+
+Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+"""
+Observable attribute containers.
+
+An element's attributes are an ObservedDict. Nested dicts and lists are wrapped when accessed
+by key or index, by get(), items(), values() or when iterating a list, so direct edits like
+elem.attrs['labels'].append( 'x' ) are reported to the owning element with the changed path.
+Changes within a list, or a dict contained in a list, are reported as change of the list.
+
+The owner implements:
+- _attrs_gen: generation of its containers, incremented by release()
+- _attrsChanging(): called before a container is modified
+- _attrsChanged( paths ): called after a container has been modified
+- _attrsReleasedChanging(): called before a container handed out by release() is modified
+
+Containers of an older generation, or of another owner, are copied when accessed (copy-on-write
+for elements sharing attributes). If a container of an older generation is modified through a reference
+taken before release(), its owner's _attrsReleasedChanging() is called first, so elements sharing it
+detach() their attributes. Copies, deepcopy(), pickling and plain() produce plain dicts and lists.
+"""
+
+import copy
+
+# returned by lookup() for paths not present
+MISSING = object()
+
+
+class ObservedDict( dict ):
+    __slots__ = ( '_owner', '_path', '_keyed', '_gen' )
+
+    def __init__( self, data: dict, owner, path: tuple, keyed: bool=True ):
+        dict.__init__( self, data )
+        self._owner = owner
+        self._path = path
+        self._keyed = keyed
+        self._gen = owner._attrs_gen
+
+    def __reduce__( self ):
+        return (dict, (dict( self ),))
+
+    def __copy__( self ) -> dict:
+        return dict( self )
+
+    def __deepcopy__( self, memo: dict ) -> dict:
+        return copy.deepcopy( dict( self ), memo )
+
+    def __getitem__( self, key ):
+        value = dict.__getitem__( self, key )
+        if isinstance( value, (dict, list) ):
+            return self._adopt( key, value )
+        return value
+
+    def get( self, key, default=None ):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items( self ) -> list[tuple]:
+        return [(key, self[key]) for key in dict.keys( self )]
+
+    def values( self ) -> list:
+        return [self[key] for key in dict.keys( self )]
+
+    def __setitem__( self, key, value ):
+        self._changing()
+        dict.__setitem__( self, key, value )
+        self._changed( [key] )
+
+    def __delitem__( self, key ):
+        self._changing()
+        dict.__delitem__( self, key )
+        self._changed( [key] )
+
+    def setdefault( self, key, default=None ):
+        if not key in self:
+            self[key] = default
+        return self[key]
+
+    def pop( self, key, *default ):
+        if not key in self:
+            return dict.pop( self, key, *default )
+        self._changing()
+        value = dict.pop( self, key )
+        self._changed( [key] )
+        return value
+
+    def popitem( self ) -> tuple:
+        if len( self ) == 0:
+            return dict.popitem( self )
+        self._changing()
+        item = dict.popitem( self )
+        self._changed( [item[0]] )
+        return item
+
+    def update( self, *args, **kwargs ):
+        changes = dict( *args, **kwargs )
+        if changes == {}:
+            return
+        self._changing()
+        dict.update( self, changes )
+        self._changed( list( changes ))
+
+    def __ior__( self, other ):
+        self.update( other )
+        return self
+
+    def clear( self ):
+        if len( self ) == 0:
+            return
+        keys = list( dict.keys( self ))
+        self._changing()
+        dict.clear( self )
+        self._changed( keys )
+
+    def _adopt( self, key, value ):
+        """ Return container 'value' stored at 'key', replaced by an owned copy if necessary """
+        if _owned( value, self._owner ):
+            return value
+        if self._keyed:
+            child = _wrap( value, self._owner, self._path + (key,) )
+        else:
+            child = _wrap( value, self._owner, self._path, keyed=False )
+        # same content, no change to report
+        dict.__setitem__( self, key, child )
+        return child
+
+    def _changing( self ):
+        _changing( self )
+
+    def _changed( self, keys: list ):
+        if self._keyed:
+            self._owner._attrsChanged( [self._path + (key,) for key in keys] )
+        else:
+            self._owner._attrsChanged( [self._path] )
+
+
+class ObservedList( list ):
+    __slots__ = ( '_owner', '_path', '_gen' )
+
+    def __init__( self, data: list, owner, path: tuple ):
+        # list.copy() does not iterate, observed children are not wrapped
+        list.__init__( self, list.copy( data ))
+        self._owner = owner
+        self._path = path
+        self._gen = owner._attrs_gen
+
+    def __reduce__( self ):
+        return (list, (list.copy( self ),))
+
+    def __copy__( self ) -> list:
+        return list.copy( self )
+
+    def __deepcopy__( self, memo: dict ) -> list:
+        return copy.deepcopy( list.copy( self ), memo )
+
+    def __getitem__( self, index ):
+        value = list.__getitem__( self, index )
+        if isinstance( index, slice ):
+            return value
+        if isinstance( value, (dict, list) ):
+            return self._adopt( index, value )
+        return value
+
+    def __iter__( self ):
+        for idx in range( len( self )):
+            yield self[idx]
+
+    def __setitem__( self, index, value ):
+        self._changing()
+        list.__setitem__( self, index, value )
+        self._changed()
+
+    def __delitem__( self, index ):
+        self._changing()
+        list.__delitem__( self, index )
+        self._changed()
+
+    def __iadd__( self, other ):
+        self.extend( other )
+        return self
+
+    def __imul__( self, n: int ):
+        self._changing()
+        list.__imul__( self, n )
+        self._changed()
+        return self
+
+    def append( self, value ):
+        self._changing()
+        list.append( self, value )
+        self._changed()
+
+    def extend( self, values ):
+        self._changing()
+        list.extend( self, values )
+        self._changed()
+
+    def insert( self, index: int, value ):
+        self._changing()
+        list.insert( self, index, value )
+        self._changed()
+
+    def remove( self, value ):
+        self._changing()
+        list.remove( self, value )
+        self._changed()
+
+    def pop( self, index: int=-1 ):
+        self._changing()
+        value = list.pop( self, index )
+        self._changed()
+        return value
+
+    def clear( self ):
+        if len( self ) == 0:
+            return
+        self._changing()
+        list.clear( self )
+        self._changed()
+
+    def sort( self, *args, **kwargs ):
+        self._changing()
+        list.sort( self, *args, **kwargs )
+        self._changed()
+
+    def reverse( self ):
+        self._changing()
+        list.reverse( self )
+        self._changed()
+
+    def _adopt( self, index: int, value ):
+        if _owned( value, self._owner ):
+            return value
+        child = _wrap( value, self._owner, self._path, keyed=False )
+        list.__setitem__( self, index, child )
+        return child
+
+    def _changing( self ):
+        _changing( self )
+
+    def _changed( self ):
+        self._owner._attrsChanged( [self._path] )
+
+
+def observe( attrs: dict|None, owner ) -> dict|None:
+    """ Return attribute tree 'attrs' as root container owned by 'owner', None is returned unchanged """
+    if type( attrs ) is dict:
+        return ObservedDict( attrs, owner, () )
+    if attrs == None or _owned( attrs, owner ):
+        return attrs
+    return ObservedDict( attrs, owner, () )
+
+def release( attrs: dict ):
+    """ Hand out nested containers of 'attrs' to another element, its owner copies them before the next access """
+    owner = attrs._owner
+    owner._attrs_gen += 1
+    attrs._gen = owner._attrs_gen
+
+def detach( attrs: dict|list ):
+    """ Replace all containers within 'attrs' not owned by its owner by private plain copies """
+    owner = attrs._owner
+    if isinstance( attrs, dict ):
+        items = list( dict.items( attrs ))
+        store = dict.__setitem__
+    else:
+        items = list( enumerate( list.copy( attrs )))
+        store = list.__setitem__
+    for key, value in items:
+        if isinstance( value, (ObservedDict, ObservedList) ) and value._owner is owner:
+            detach( value )
+        elif isinstance( value, (dict, list) ):
+            store( attrs, key, plain( value ))
+
+def plain( value ):
+    """ Return copy of attribute tree 'value' consisting of plain dicts and lists """
+    if isinstance( value, dict ):
+        return { key: plain( v ) for key, v in dict.items( value ) }
+    if isinstance( value, list ):
+        return [plain( v ) for v in list.__iter__( value )]
+    return value
+
+def assign( container: dict, key, value ):
+    """ Set value without reporting a change, e.g. for data downloaded from Airlock Gateway """
+    dict.__setitem__( container, key, value )
+
+def discard( container: dict, key ):
+    """ Remove key without reporting a change """
+    dict.pop( container, key, None )
+
+def lookup( attrs: dict, path: tuple ):
+    """ Return value at 'path' without wrapping containers, MISSING if it does not exist """
+    for key in path:
+        try:
+            attrs = dict.__getitem__( attrs, key )
+        except (KeyError, TypeError):
+            return MISSING
+    return attrs
+
+def _changing( container: ObservedDict|ObservedList ):
+    owner = container._owner
+    if container._gen != owner._attrs_gen:
+        # may be shared with copies made by release()
+        owner._attrsReleasedChanging()
+    owner._attrsChanging()
+
+def _owned( value, owner ) -> bool:
+    return isinstance( value, (ObservedDict, ObservedList) ) and value._owner is owner and value._gen == owner._attrs_gen
+
+def _wrap( value: dict|list, owner, path: tuple, keyed: bool=True ) -> ObservedDict|ObservedList:
+    if isinstance( value, dict ):
+        return ObservedDict( value, owner, path, keyed=keyed )
+    return ObservedList( value, owner, path )
@@ -0,0 +1,305 @@
+"""
+AirScript: Airlock (Gateway) Configuration Script
+
+Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+"""
+Query engine for element collections, e.g. cfg.mappings( filter=... ).
+
+A filter is a list of or'ed conditions, a single condition may be passed without list.
+Each condition is a dict of and'ed attribute names and values. Name is:
+- 'name'
+- 'id'
+- path to attribute, e.g. locking.application.response.compressionAllowed
+Value is:
+- a constant (number, boolean): attribute must be equal
+- a string: regexp matching the beginning of the attribute value
+- None: attribute must not have a value
+- a dict { 'op': operator, 'value': value }
+A condition may contain key 'op', which then applies to all its attributes with plain values.
+
+Operators:
+- =, eq, !=, ne, >, gt, <, lt, >=, ge, <=, le: comparison
+- in: attribute value (or any of its values, for list attributes) is contained in list 'value'
+- contains: list attribute contains 'value'
+- match: regexp matching the beginning of the attribute value
+
+Predicates are compiled once per query. Conditions using =, in or contains on indexed attributes,
+see ATTRIBUTE_INDEX, are answered from the configuration's secondary indexes, all others by scanning the collection.
+"""
+
+import operator
+import re
+
+from . import attrpath
+from . import index
+
+
+# attributes with secondary index, see BaseElement.indexKeys()
+ATTRIBUTE_INDEX = {
+    'name': index.NAME,
+    'labels': index.LABEL,
+    'entryPath.value': index.ENTRY_PATH,
+    'hostName': index.HOSTNAME,
+}
+
+OPERATORS = {
+    '=': 'eq', 'eq': 'eq',
+    '!=': 'ne', 'ne': 'ne',
+    '>': 'gt', 'gt': 'gt',
+    '<': 'lt', 'lt': 'lt',
+    '>=': 'ge', 'ge': 'ge',
+    '<=': 'le', 'le': 'le',
+    'in': 'in',
+    'contains': 'contains',
+    'match': 'match',
+}
+
+# characters with special meaning in regexps, names without them are matched exactly
+_REGEXP_CHARS = ".^$*+?{}[]\\|()"
+
+
+class Predicate( object ):
+    __slots__ = ( 'path', 'op', 'value', '_get', '_test' )
+
+    def __init__( self, path: str, value, op: str=None ):
+        """ Test of attribute 'path', raises ValueError for unknown operators or invalid values """
+        self.path = path
+        self.value = value
+        if path == 'name':
+            self._get = lambda elem: elem.name
+        elif path == 'id':
+            self._get = lambda elem: None if elem.id == None else str( elem.id )
+        else:
+            accessor = attrpath.compile( path )
+            self._get = lambda elem: accessor.lookup( elem.attrs )
+        if op == None:
+            # plain value, as supported by earlier versions
+            if value == None:
+                op = 'eq'
+            elif isinstance( value, (bool, int, float) ):
+                op = 'eq'
+            else:
+                op = 'match'
+        try:
+            self.op = OPERATORS[op]
+        except KeyError:
+            raise ValueError( f"Invalid filter operator '{op}' for '{path}'" )
+        try:
+            if path == 'id' and self.op in ['eq', 'ne']:
+                self.value = str( value )
+            elif path == 'id' and self.op == 'in':
+                self.value = [str( x ) for x in value]
+            elif self.op == 'match':
+                self.value = re.compile( value )
+        except re.error as e:
+            raise ValueError( f"Invalid regexp '{value}' for '{path}': {e}" )
+        except TypeError:
+            raise ValueError( f"Invalid value {value!r} for '{path}' with operator '{op}'" )
+        self._test = getattr( self, f"_{self.op}" )
+
+    def __repr__( self ):
+        return f"{self.path} {self.op} {self.value!r}"
+
+    def match( self, elem ) -> bool:
+        return self._test( self._get( elem ))
+
+    def indexKeys( self ) -> tuple[str, list]|None:
+        """ Return index name and keys to look up if predicate can be answered by a secondary index, otherwise None """
+        try:
+            name = ATTRIBUTE_INDEX[self.path]
+        except KeyError:
+            return None
+        if name in [index.LABEL]:
+            # list attribute, index holds lowercased values
+            if self.op == 'contains' and isinstance( self.value, str ):
+                return (name, [self.value.lower()])
+            if self.op == 'in' and isinstance( self.value, (list, tuple, set) ):
+                return (name, [x.lower() for x in self.value if isinstance( x, str )])
+            return None
+        if self.op == 'eq' and self.value != None:
+            return (name, [self.value])
+        if self.op == 'in' and isinstance( self.value, (list, tuple, set) ):
+            return (name, [x for x in self.value if x != None])
+        return None
+
+    def _eq( self, attr ) -> bool:
+        return attr == self.value
+
+    def _ne( self, attr ) -> bool:
+        return attr != self.value
+
+    def _compare( self, attr, func ) -> bool:
+        try:
+            return func( attr, self.value )
+        except TypeError:
+            return False
+
+    def _gt( self, attr ) -> bool:
+        return self._compare( attr, operator.gt )
+
+    def _lt( self, attr ) -> bool:
+        return self._compare( attr, operator.lt )
+
+    def _ge( self, attr ) -> bool:
+        return self._compare( attr, operator.ge )
+
+    def _le( self, attr ) -> bool:
+        return self._compare( attr, operator.le )
+
+    def _in( self, attr ) -> bool:
+        try:
+            if isinstance( attr, list ):
+                return any( x in self.value for x in attr )
+            return attr in self.value
+        except TypeError:
+            return False
+
+    def _contains( self, attr ) -> bool:
+        try:
+            return self.value in attr
+        except TypeError:
+            return False
+
+    def _match( self, attr ) -> bool:
+        if not isinstance( attr, str ):
+            return False
+        return self.value.match( attr ) != None
+
+
+class Query( object ):
+    def __init__( self, filter: list[dict]|dict=None, name: str=None, ids: list=None ):
+        """
+        Compiled filter, see module description, raises ValueError for invalid filters.
+
+        'name' is a regexp the complete element name must match, 'ids' a list of element ids,
+        both apply in addition to 'filter'.
+        """
+        if isinstance( filter, dict ):
+            filter = [filter]
+        if not all( isinstance( condition, dict ) for condition in filter or [] ):
+            raise ValueError( f"Invalid filter {filter!r}: expected dict or list of dicts" )
+        self.conditions = [self._compileCondition( condition ) for condition in filter or []]
+        self.common = []
+        self.ids = None
+        if name:
+            if not any( c in _REGEXP_CHARS for c in name ):
+                self.common.append( Predicate( 'name', name, op='eq' ))
+            else:
+                self.common.append( Predicate( 'name', f"(?:{name})$", op='match' ))
+        if ids:
+            self.ids = [str( x ) for x in ids]
+            self.common.append( Predicate( 'id', self.ids, op='in' ))
+
+    def __repr__( self ):
+        return f"Query {self.common} {self.conditions}"
+
+    def match( self, elem ) -> bool:
+        for predicate in self.common:
+            if not predicate.match( elem ):
+                return False
+        if self.conditions == []:
+            return True
+        for condition in self.conditions:
+            if all( predicate.match( elem ) for predicate in condition ):
+                return True
+        return False
+
+    def execute( self, objects: dict, elements: index.ElementIndex=None ) -> list:
+        """ Return non-deleted elements of collection 'objects' matching query, 'elements' are its secondary indexes """
+        candidates, _ = self._plan( objects, elements )
+        return [item for item in candidates if not item.isDeleted() and self.match( item )]
+
+    def explain( self, objects: dict, elements: index.ElementIndex=None ) -> str:
+        """ Describe how the query is executed """
+        _, description = self._plan( objects, elements )
+        return description
+
+    def _plan( self, objects: dict, elements: index.ElementIndex=None ) -> tuple[list, str]:
+        """ Return candidate elements and description of access path """
+        if self.ids != None:
+            candidates = {}
+            for key in self.ids:
+                for k in [key, _toInt( key )]:
+                    item = objects.get( k )
+                    if item != None and not isinstance( item, list ):
+                        candidates[item] = None
+            return (list( candidates ), f"ids: {len( self.ids )} lookups")
+        if elements != None:
+            for predicate in self.common:
+                lookup = self._indexLookup( predicate, elements )
+                if lookup != None:
+                    return (lookup[0], f"index {lookup[1]}")
+            if self.conditions != []:
+                candidates = {}
+                used = []
+                for condition in self.conditions:
+                    lookup = None
+                    for predicate in condition:
+                        lookup = self._indexLookup( predicate, elements )
+                        if lookup != None:
+                            break
+                    if lookup == None:
+                        break
+                    candidates.update( dict.fromkeys( lookup[0] ))
+                    used.append( lookup[1] )
+                else:
+                    return (list( candidates ), f"index {' or '.join( used )}")
+        return (_scan( objects ), f"scan: {len( objects )} entries")
+
+    def _indexLookup( self, predicate: Predicate, elements: index.ElementIndex ) -> tuple[list, str]|None:
+        keys = predicate.indexKeys()
+        if keys == None or not elements.has( keys[0] ):
+            return None
+        found = {}
+        for key in keys[1]:
+            try:
+                found.update( dict.fromkeys( elements.lookup( keys[0], key )))
+            except TypeError:
+                # unhashable value, cannot be indexed
+                return None
+        return (list( found ), f"{keys[0]} ({predicate})")
+
+    def _compileCondition( self, condition: dict ) -> list[Predicate]:
+        op = condition.get( 'op' )
+        r = []
+        for path, value in condition.items():
+            if path == 'op':
+                continue
+            if isinstance( value, dict ) and 'op' in value:
+                r.append( Predicate( path, value.get( 'value' ), op=value['op'] ))
+            else:
+                r.append( Predicate( path, value, op=op ))
+        return r
+
+
+def _scan( objects: dict ) -> list:
+    r = []
+    for v in objects.values():
+        if isinstance( v, list ):
+            # elements not yet created on Airlock Gateway
+            r.extend( v )
+        else:
+            r.append( v )
+    return r
+
+def _toInt( value: str ) -> int|str:
+    try:
+        return int( value )
+    except ValueError:
+        return value
@@ -0,0 +1,229 @@
+"""
+AirScript: Airlock (Gateway) Configuration Script
+
+Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+import hashlib
+import json
+import math
+
+
+PHASE_ELEMENTS = "elements"
+PHASE_CONNECTIONS = "connections"
+
+# assumed duration of a single REST API request, used by SyncPlan.estimate()
+REQUEST_SECONDS_DEFAULT = 0.2
+
+
+class SyncOperation( object ):
+    def __init__( self, action: str, element, method: str, path: str, payload: dict=None, execute=None, reference=None, confirm=None, recover=None ):
+        """
+        A single REST API request required to sync a configuration element.
+
+        action - create, update, delete, upload, connect or disconnect
+        element - configuration element being sync'ed
+        method, path - HTTP method and REST API endpoint; ids of elements still to be created are shown as '<new>'
+        payload - request data, used to calculate request size
+        execute - function performing the request
+        reference - connected elements, for connect and disconnect
+        confirm - function updating element if operation has already been performed by an earlier, interrupted sync,
+                  called with the sync journal entry instead of 'execute'
+        recover - for requests which must not be sent twice (POST): function looking up the result of a request
+                  whose outcome is unknown, returns True if it has been performed, updating the element
+        """
+        self.action = action
+        self.element = element
+        self.method = method
+        self.path = path
+        self.payload = payload
+        self.reference = reference
+        self.references = reference if isinstance( reference, list ) else ([] if reference == None else [reference])
+        self.phase = PHASE_CONNECTIONS if action in ["connect", "disconnect"] else PHASE_ELEMENTS
+        # POST creates a new element each time it is sent
+        self.idempotent = method != "POST"
+        if payload == None:
+            data = None
+        elif isinstance( payload, (str, bytes) ):
+            data = payload
+        else:
+            data = json.dumps( payload, sort_keys=True, default=str )
+        self.size = 0 if data == None else len( data )
+        # computed once, names may change while the operation is executed, e.g. set from the response of a create
+        self.key = self._key( data )
+        self._execute = execute
+        self._confirm = confirm
+        self._recover = recover
+
+    def __repr__( self ):
+        return f"{self.action} {self.element.getTypeName()}:{self.element.name} - {self.method} {self.path} ({self.size} bytes)"
+
+    def _key( self, data: str|bytes|None ) -> str:
+        """ Identify operation across runs, used by sync journal """
+        key = f"{self.action} {self.element.getTypeName()}:{self.element.name} {self.method}"
+        if self.references:
+            key = f"{key} " + ",".join( f"{ref.getTypeName()}:{ref.name}" for ref in self.references )
+        elif data != None:
+            # same element may be updated repeatedly, only an identical request is the same operation
+            if isinstance( data, str ):
+                data = data.encode( 'utf-8' )
+            key = f"{key} {hashlib.sha256( data ).hexdigest()[:16]}"
+        return key
+
+    def execute( self ):
+        """ Perform REST API request """
+        if self._execute != None:
+            self._execute()
+
+    def confirm( self, entry: dict ):
+        """ Skip operation confirmed by sync journal, updating element as if it had been executed """
+        if self._confirm != None:
+            self._confirm( entry )
+
+    def recover( self ) -> bool|None:
+        """ Check if request with unknown outcome has been performed, None if it cannot be checked """
+        if self._recover == None:
+            return None
+        return self._recover()
+
+
+class SyncTier( object ):
+    def __init__( self, element_types: list[str] ):
+        """ Operations for all changed elements of types not depending on each other, executed before those of the next tier """
+        self.element_types = list( element_types )
+        self.elements = []
+        self.operations = []
+        self._types = {}
+
+    def add( self, element_type: str, elem, operations: list[SyncOperation] ):
+        if not element_type in self.element_types:
+            self.element_types.append( element_type )
+        self.elements.append( elem )
+        self._types.setdefault( element_type, [] ).append( elem )
+        self.operations.extend( operations )
+
+    def elementsOf( self, element_type: str ) -> list:
+        return self._types.get( element_type, [] )
+
+    def phase( self, phase: str ) -> list[tuple]:
+        """ Return list of element and its operations in 'phase', elements are independent of each other """
+        groups = {}
+        for op in self.operations:
+            if op.phase == phase:
+                try:
+                    groups[op.element].append( op )
+                except KeyError:
+                    groups[op.element] = [op]
+        return list( groups.items() )
+
+
+class SyncPlan( object ):
+    def __init__( self ):
+        """
+        Ordered list of REST API operations performed by Configuration.sync().
+
+        Operations are grouped in tiers of element types not depending on each other, tiers are processed in dependency order.
+        Within a tier, all elements are created, updated or deleted first, then their connections are added or removed.
+        The plan must be executed before any further changes are made to the configuration.
+        """
+        self.tiers = []
+        self._tier_of_type = {}
+        self._connects = set()
+        self._disconnects = set()
+
+    def __repr__( self ):
+        totals = self.totals()
+        return f"SyncPlan: {totals['requests']} requests, {totals['bytes']} bytes"
+
+    def __len__( self ) -> int:
+        return len( self.operations )
+
+    def __iter__( self ):
+        return iter( self.operations )
+
+    def __getitem__( self, idx: int ) -> SyncOperation:
+        return self.operations[idx]
+
+    def addTier( self, element_types: list[str] ) -> SyncTier:
+        """ Append tier for 'element_types', executed after all tiers added before """
+        tier = SyncTier( element_types )
+        self.tiers.append( tier )
+        for element_type in element_types:
+            self._tier_of_type[element_type] = tier
+        return tier
+
+    def add( self, element_type: str, elem, operations: list[SyncOperation] ):
+        """ Add element and its operations to the tier of its type, a new tier is appended for types without tier """
+        try:
+            tier = self._tier_of_type[element_type]
+        except KeyError:
+            tier = self.addTier( [element_type] )
+        tier.add( element_type, elem, operations )
+
+    def claimConnect( self, elem, reference ) -> bool:
+        """
+        A connection is added only once, by whichever of the two connected elements is planned first.
+
+        If 'reference' is created by this sync and adds the connection itself, it is left to it,
+        so the connection does not have to wait for the creation of 'reference'.
+        """
+        if (id( reference ), id( elem )) in self._connects:
+            return False
+        if elem.id != None and reference.id == None and not reference.isDeleted() and reference.isConnectionPending( elem ):
+            return False
+        self._connects.add( (id( elem ), id( reference )) )
+        return True
+
+    def claimDisconnect( self, elem, reference ) -> bool:
+        """ A connection is removed only once, by whichever of the two connected elements is planned first """
+        if (id( reference ), id( elem )) in self._disconnects:
+            return False
+        self._disconnects.add( (id( elem ), id( reference )) )
+        return True
+
+    @property
+    def operations( self ) -> list[SyncOperation]:
+        """ All operations in execution order """
+        r = []
+        for tier in self.tiers:
+            for phase in [PHASE_ELEMENTS, PHASE_CONNECTIONS]:
+                r.extend( [op for op in tier.operations if op.phase == phase] )
+        return r
+
+    def totals( self ) -> dict:
+        """ Return number of requests per action, total number of requests and total payload size """
+        r = { 'create': 0, 'update': 0, 'delete': 0, 'upload': 0, 'connect': 0, 'disconnect': 0, 'requests': 0, 'bytes': 0 }
+        for tier in self.tiers:
+            for op in tier.operations:
+                r[op.action] = r.get( op.action, 0 ) + 1
+                r['requests'] += 1
+                r['bytes'] += op.size
+        return r
+
+    def estimate( self, seconds_per_request: float=REQUEST_SECONDS_DEFAULT, workers: int=1 ) -> float:
+        """ Return estimated duration of sync in seconds, for Configuration.sync( workers=... ) """
+        workers = max( workers or 1, 1 )
+        total = 0.0
+        for tier in self.tiers:
+            for phase in [PHASE_ELEMENTS, PHASE_CONNECTIONS]:
+                groups = tier.phase( phase )
+                if groups == []:
+                    continue
+                requests = sum( len( ops ) for _, ops in groups )
+                longest = max( len( ops ) for _, ops in groups )
+                total += max( math.ceil( requests / workers ), longest ) * seconds_per_request
+        return total
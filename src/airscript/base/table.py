@@ -0,0 +1,351 @@
+"""
+AirScript: Airlock (Gateway) Configuration Script
+
+Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+"""
+Columnar attribute tables, see Configuration.table().
+
+Selected attributes of all elements of a collection are stored column by column in NumPy arrays:
+- booleans and numbers as arrays of their type, with a mask of rows having a value
+- strings dictionary-encoded, as array of codes into the list of distinct values (-1: no value)
+- lists of strings, e.g. labels, as codes of all list entries and the offset of each row's first entry
+- all other values as object arrays
+
+Comparing a column with a value returns a boolean array, usable with Table.where():
+
+    t = cfg.table( 'Mapping', ['backendTimeout', 'operationalMode', 'labels'] )
+    prod = t.where( (t['operationalMode'] == 'PRODUCTION') & t['labels'].contains( 'public' ))
+    prod.count( 'backendTimeout' )
+
+Requires NumPy, install with 'pip install pyAirscript[ANALYTICS]'.
+"""
+
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import attrpath
+
+
+BOOL = "bool"
+INT = "int"
+FLOAT = "float"
+STRING = "str"
+LIST = "list"
+OBJECT = "object"
+
+
+def available() -> bool:
+    """ Check if NumPy is installed """
+    return numpy != None
+
+def _requireNumpy():
+    if numpy == None:
+        raise ImportError( "Attribute tables require NumPy, install with 'pip install pyAirscript[ANALYTICS]'" )
+
+
+class Column( object ):
+    def __init__( self, name: str, kind: str, data, mask=None, categories: list=None, offsets=None ):
+        """
+        Values of one attribute for all rows of a table, see module description.
+
+        data - values, codes for string and list columns
+        mask - rows having a value
+        categories - distinct values of string and list columns
+        offsets - for list columns, index of each row's first entry in 'data', plus total number of entries
+        """
+        self.name = name
+        self.kind = kind
+        self.data = data
+        self.categories = categories
+        self.offsets = offsets
+        if mask is None:
+            mask = numpy.ones( len( self ), dtype=bool )
+        self.mask = mask
+
+    def __repr__( self ):
+        return f"Column {self.name} ({self.kind}, {len( self )} rows)"
+
+    def __len__( self ) -> int:
+        if self.kind == LIST:
+            return len( self.offsets ) - 1
+        return len( self.data )
+
+    @staticmethod
+    def fromValues( name: str, values: list ) -> 'Column':
+        """ Build column, its kind derived from the values """
+        _requireNumpy()
+        present = [v for v in values if v != None]
+        mask = numpy.array( [v != None for v in values], dtype=bool )
+        if present == []:
+            # no element has a value, stored as object column
+            pass
+        elif all( isinstance( v, bool ) for v in present ):
+            return Column( name, BOOL, numpy.array( [bool( v ) for v in values], dtype=bool ), mask=mask )
+        elif all( isinstance( v, int ) and not isinstance( v, bool ) for v in present ):
+            return Column( name, INT, numpy.array( [v if v != None else 0 for v in values], dtype=numpy.int64 ), mask=mask )
+        elif all( isinstance( v, (int, float) ) and not isinstance( v, bool ) for v in present ):
+            return Column( name, FLOAT, numpy.array( [v if v != None else numpy.nan for v in values], dtype=numpy.float64 ), mask=mask )
+        elif all( isinstance( v, str ) for v in present ):
+            categories = {}
+            codes = numpy.array( [-1 if v == None else categories.setdefault( v, len( categories )) for v in values], dtype=numpy.int32 )
+            return Column( name, STRING, codes, mask=mask, categories=list( categories ))
+        elif all( isinstance( v, list ) and all( isinstance( x, str ) for x in v ) for v in present ):
+            categories = {}
+            codes = []
+            offsets = [0]
+            for v in values:
+                codes.extend( categories.setdefault( x, len( categories )) for x in v or [] )
+                offsets.append( len( codes ))
+            return Column( name, LIST, numpy.array( codes, dtype=numpy.int32 ), mask=mask, categories=list( categories ),
+                           offsets=numpy.array( offsets, dtype=numpy.int64 ))
+        # object array from list of lists would be two-dimensional
+        data = numpy.empty( len( values ), dtype=object )
+        data[:] = values
+        return Column( name, OBJECT, data, mask=mask )
+
+    def values( self ) -> list:
+        """ Return values as Python list, None for rows without value """
+        if self.kind == STRING:
+            return [self.categories[c] if c >= 0 else None for c in self.data.tolist()]
+        if self.kind == LIST:
+            codes = self.data.tolist()
+            offsets = self.offsets.tolist()
+            return [[self.categories[c] for c in codes[offsets[i]:offsets[i+1]]] if self.mask[i] else None for i in range( len( self ))]
+        return [v if m else None for v, m in zip( self.data.tolist(), self.mask.tolist() )]
+
+    def take( self, rows ) -> 'Column':
+        """ Return column with the values of 'rows', an array of row numbers """
+        if self.kind == LIST:
+            starts = self.offsets[:-1][rows]
+            lengths = numpy.diff( self.offsets )[rows]
+            offsets = numpy.concatenate( ([0], numpy.cumsum( lengths ))).astype( numpy.int64 )
+            entries = numpy.repeat( starts - offsets[:-1], lengths ) + numpy.arange( offsets[-1] )
+            return Column( self.name, self.kind, self.data[entries], mask=self.mask[rows], categories=self.categories, offsets=offsets )
+        return Column( self.name, self.kind, self.data[rows], mask=self.mask[rows], categories=self.categories )
+
+    def isnull( self ):
+        return ~self.mask
+
+    def __eq__( self, value ):
+        return self._compare( operator.eq, value )
+
+    def __ne__( self, value ):
+        return self.mask & ~self._compare( operator.eq, value )
+
+    def __lt__( self, value ):
+        return self._compare( operator.lt, value )
+
+    def __le__( self, value ):
+        return self._compare( operator.le, value )
+
+    def __gt__( self, value ):
+        return self._compare( operator.gt, value )
+
+    def __ge__( self, value ):
+        return self._compare( operator.ge, value )
+
+    __hash__ = None
+
+    def isin( self, values: list ):
+        """ Rows whose value is one of 'values', for list columns: any entry is one of 'values' """
+        if self.kind in [STRING, LIST]:
+            wanted = numpy.array( [c in values for c in self.categories] + [False], dtype=bool )
+            if self.kind == STRING:
+                return wanted[self.data]
+            return self._anyEntry( wanted[self.data] )
+        if self.kind == OBJECT:
+            return numpy.array( [m and v in values for v, m in zip( self.data, self.mask )], dtype=bool )
+        return self.mask & numpy.isin( self.data, list( values ))
+
+    def contains( self, value ):
+        """ Rows of a list column containing 'value' """
+        if self.kind != LIST:
+            raise TypeError( f"Column {self.name} is not a list column" )
+        try:
+            code = self.categories.index( value )
+        except ValueError:
+            return numpy.zeros( len( self ), dtype=bool )
+        return self._anyEntry( self.data == code )
+
+    def counts( self ) -> dict:
+        """ Return number of rows per value, for list columns number of rows per list entry """
+        if self.kind in [STRING, LIST]:
+            if self.kind == STRING:
+                data = self.data[self.mask]
+            else:
+                # entry listed repeatedly in a row counts once
+                rows = numpy.repeat( numpy.arange( len( self )), numpy.diff( self.offsets ))
+                size = max( len( self.categories ), 1 )
+                data = numpy.unique( rows * size + self.data ) % size
+            counts = numpy.bincount( data, minlength=len( self.categories ))
+            return { self.categories[i]: int( n ) for i, n in enumerate( counts.tolist() ) if n }
+        if self.kind == OBJECT:
+            r = {}
+            for v in self.data[self.mask]:
+                key = _hashable( v )
+                r[key] = r.get( key, 0 ) + 1
+            return r
+        values, counts = numpy.unique( self.data[self.mask], return_counts=True )
+        return dict( zip( values.tolist(), counts.tolist() ))
+
+    def groupCodes( self ) -> tuple:
+        """ Return integer code per row and the value of each code, rows without value have code -1 """
+        if self.kind == STRING:
+            return (self.data, self.categories)
+        if self.kind == LIST:
+            raise TypeError( f"List column {self.name} cannot be grouped with other columns, use counts()" )
+        if self.kind == OBJECT:
+            keys = {}
+            codes = numpy.array( [keys.setdefault( _hashable( v ), len( keys )) if m else -1 for v, m in zip( self.data, self.mask )], dtype=numpy.int64 )
+            return (codes, list( keys ))
+        values, codes = numpy.unique( self.data, return_inverse=True )
+        return (numpy.where( self.mask, codes, -1 ), values.tolist())
+
+    def _compare( self, op, value ):
+        if self.kind == STRING:
+            hits = numpy.array( [_safeCompare( op, c, value ) for c in self.categories] + [False], dtype=bool )
+            # code -1 (no value) selects the trailing False
+            return hits[self.data]
+        if self.kind in [LIST, OBJECT]:
+            values = self.values()
+            return numpy.array( [m and _safeCompare( op, v, value ) for v, m in zip( values, self.mask.tolist() )], dtype=bool )
+        if value == None or isinstance( value, str ):
+            return numpy.zeros( len( self ), dtype=bool )
+        return self.mask & op( self.data, value )
+
+    def _anyEntry( self, hits ):
+        """ Map per-entry booleans of a list column to rows """
+        rows = numpy.repeat( numpy.arange( len( self )), numpy.diff( self.offsets ))
+        r = numpy.zeros( len( self ), dtype=bool )
+        r[rows[hits]] = True
+        return r
+
+
+class Table( object ):
+    def __init__( self, columns: dict[str, Column], elements: list ):
+        """ Columns of equal length, row i holds the attributes of elements[i] """
+        self.columns = columns
+        self.elements = elements
+
+    def __repr__( self ):
+        return f"Table {len( self )} rows: {', '.join( self.columns )}"
+
+    def __len__( self ) -> int:
+        return len( self.elements )
+
+    def __getitem__( self, name: str ) -> Column:
+        return self.columns[name]
+
+    def __contains__( self, name: str ) -> bool:
+        return name in self.columns
+
+    @staticmethod
+    def fromElements( elements: list, paths: list[str] ) -> 'Table':
+        """ Project attributes 'paths' of 'elements' into a table, with additional columns 'id' and 'name' """
+        _requireNumpy()
+        accessors = [attrpath.compile( path ) for path in paths]
+        rows = [[accessor.lookup( elem.attrs ) for accessor in accessors] for elem in elements]
+        columns = {
+            'id': Column.fromValues( 'id', [elem.id for elem in elements] ),
+            'name': Column.fromValues( 'name', [elem.name for elem in elements] ),
+        }
+        for nr, path in enumerate( paths ):
+            columns[path] = Column.fromValues( path, [row[nr] for row in rows] )
+        return Table( columns, list( elements ))
+
+    def where( self, mask ) -> 'Table':
+        """ Return rows selected by boolean array 'mask', e.g. t.where( t['backendTimeout'] > 60 ) """
+        rows = numpy.flatnonzero( numpy.asarray( mask, dtype=bool ))
+        return self.take( rows )
+
+    def take( self, rows ) -> 'Table':
+        """ Return table with 'rows', an array of row numbers """
+        rows = numpy.asarray( rows, dtype=numpy.int64 )
+        return Table( { name: column.take( rows ) for name, column in self.columns.items() }, [self.elements[i] for i in rows.tolist()] )
+
+    def count( self, *names: str ) -> dict:
+        """
+        Return number of rows per value of column 'names[0]',
+        for several columns per tuple of values, rows lacking a value in any of them are not counted.
+        """
+        if len( names ) == 1:
+            return self.columns[names[0]].counts()
+        codes = []
+        keys = []
+        for name in names:
+            c, k = self.columns[name].groupCodes()
+            codes.append( numpy.asarray( c, dtype=numpy.int64 ))
+            keys.append( k )
+        stacked = numpy.stack( codes, axis=1 )
+        stacked = stacked[(stacked >= 0).all( axis=1 )]
+        if len( stacked ) == 0:
+            return {}
+        groups, counts = numpy.unique( stacked, axis=0, return_counts=True )
+        return { tuple( keys[i][c] for i, c in enumerate( group )): n for group, n in zip( groups.tolist(), counts.tolist() )}
+
+    def join( self, other: 'Table', reltype: str, prefix: str=None ) -> 'Table':
+        """
+        Return one row per relationship 'reltype' from an element of this table to an element of 'other'.
+
+        Columns of 'other' are prefixed with 'prefix', default is '<reltype>.'.
+        Rows without such relationship are omitted.
+        """
+        if prefix == None:
+            prefix = f"{reltype}."
+        position = { id( elem ): nr for nr, elem in enumerate( other.elements )}
+        left = []
+        right = []
+        for nr, elem in enumerate( self.elements ):
+            for rel in getattr( elem, 'rels', {} ).get( reltype, [] ):
+                if rel.status == 'del':
+                    continue
+                try:
+                    right.append( position[id( rel.reference )] )
+                except KeyError:
+                    continue
+                left.append( nr )
+        left = numpy.array( left, dtype=numpy.int64 )
+        right = numpy.array( right, dtype=numpy.int64 )
+        columns = { name: column.take( left ) for name, column in self.columns.items() }
+        for name, column in other.columns.items():
+            columns[f"{prefix}{name}"] = column.take( right )
+        return Table( columns, [self.elements[i] for i in left.tolist()] )
+
+    def records( self ) -> list[dict]:
+        """ Return rows as list of dicts """
+        values = { name: column.values() for name, column in self.columns.items() }
+        return [{ name: values[name][i] for name in self.columns } for i in range( len( self ))]
+
+
+def _safeCompare( op, a, b ) -> bool:
+    try:
+        return bool( op( a, b ))
+    except TypeError:
+        return False
+
+def _hashable( value ):
+    if isinstance( value, list ):
+        return tuple( _hashable( v ) for v in value )
+    if isinstance( value, dict ):
+        return tuple( sorted( (k, _hashable( v )) for k, v in value.items() ))
+    return value
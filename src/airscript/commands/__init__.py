@@ -25,7 +25,7 @@ from colorama import Fore, Style
 
 from airscript import gateway
 from airscript.model import configuration
-from airscript.utils import output
+from airscript.utils import connpool, output
 from pyAirlock.common import log
 
 
@@ -351,6 +351,25 @@ def listCfgInfo( cfg, order="NVMBCHOGJIAKT" ):
             listKerberos( cfg )
         printed = True
     
+def listConnectionPool():
+    """
+    List statistics of shared HTTP connection pool.
+
+    Shows per gateway host: sessions, requests, connections opened, idle connections and seconds since last use.
+    """
+    out = log.Log( f"{__name__}.listConnectionPool" )
+    rows = [[entry['host'], entry['sessions'], entry['requests'], entry['connections'], entry['idle'], entry['last-used']] for entry in connpool.stats()]
+    if rows == []:
+        out.info( "Connection pool is empty" )
+        return
+    lengths = output.getLengthsColumns( rows, columns=[4,8,8,11,4,9], lengths=[] )
+    out.info( "%-*s  %*s %*s %*s %*s %*s" % (lengths[0], "host", lengths[1], "sessions", lengths[2], "requests",
+                                             lengths[3], "connections", lengths[4], "idle", lengths[5], "last-used") )
+    for row in rows:
+        out.info( "%s%-*s%s  %s%*s %*s %*s %*s%s %s%*s%s" % (Fore.CYAN, lengths[0], row[0], Style.RESET_ALL,
+                                                            Fore.GREEN, lengths[1], row[1], lengths[2], row[2], lengths[3], row[3], lengths[4], row[4], Style.RESET_ALL,
+                                                            Fore.WHITE, lengths[5], row[5], Style.RESET_ALL) )
+
 def validator( cfg, selection: list[str], width: int=-1 ):
     if type( cfg ) != configuration.Configuration:
         output.error( f"This is not a configuration but {type(cfg)}" )
@@ -17,6 +17,8 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 
+import asyncio
+
 from airscript import session
 from airscript.model import configuration
 from airscript.utils import internal
@@ -120,3 +122,14 @@ class Gateway( object ):
             return sess
         return None
     
+    async def asession( self, label: str=SESSION_NAME_DEFAULT ):
+        """
+        Asynchronous variant of session(), the blocking calls are executed in a worker thread.
+
+        Returns: asynchronous session handle on success or None on failure
+        """
+        sess = await asyncio.to_thread( self.session, label )
+        if sess == None:
+            return None
+        return session.AsyncGatewaySession( sess )
+    
@@ -30,13 +30,13 @@ KIND = 'APIPolicyService'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class APIPolicy( element.ModelElement ):
-    RELATIONKEY = { "mapping": "mappings" }
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'api-policy-services'
+    _kind = KIND
     
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'api-policy-services'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    RELATIONKEY = { "mapping": "mappings" }
+    REFERENCED_BY = ( "mapping", )
     
     """
     interactions with Gateway REST API
@@ -18,7 +18,7 @@ along with this program; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 """
 
-from airscript.base import element
+from airscript.base import element, observed
 from airscript.utils import internal, output
 from airscript.model import configuration, mapping
 from pyAirlock.common import lookup
@@ -32,13 +32,13 @@ lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME,
 
 
 class Backendgroup( element.ModelElement ):
-    RELATIONKEY = { "mapping": "mappings", "ssl-certificate": "client-certificate" }
+    __slots__ = ( '_hosts', )
+    _typename = TYPENAME
+    _path = 'back-end-groups'
+    _kind = KIND
     
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'back-end-groups'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    RELATIONKEY = { "mapping": "mappings", "ssl-certificate": "client-certificate" }
+    REFERENCED_BY = ( "mapping", )
     
     def items( self ):
         value = super().items()
@@ -52,7 +52,7 @@ class Backendgroup( element.ModelElement ):
     
     def getAttrs( self ):
         r = super().getAttrs()
-        r['backendHosts'] = [host.export() for host in self._hosts.values()]
+        observed.assign( r, 'backendHosts', [host.export() for host in self._hosts.values()] )
         return r
     
     def hosts( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
@@ -61,7 +61,7 @@ class Backendgroup( element.ModelElement ):
     def addHost( self, hostdef: dict=None ):
         host = Backend( hostdef )
         self._hosts.append( host )
-        self._attrs_modified = True
+        self._setModified()
         return host
 
     def loadData( self, data: dict, update: bool=False ):
@@ -71,7 +71,7 @@ class Backendgroup( element.ModelElement ):
         for be in self.attrs['backendHosts']:
             self._hosts[idx] = Backend( None, be, idx )
             idx += 1
-        del self.attrs['backendHosts']
+        observed.discard( self.attrs, 'backendHosts' )
     
     def datafy( self, attrs: dict=None, addon: dict=None ) -> str:
         hosts = [h.dict() for h in self._hosts.values()]
@@ -94,14 +94,19 @@ class Backendgroup( element.ModelElement ):
     
 
 class Backend( element.ModelElement ):
+    __slots__ = ( 'backlinks', 'protocol', 'hostName', 'port', 'mode', 'spare', 'weight' )
+    
     def __init__( self, parent, obj=None, id=None ):
         try:
             self.id = id
         except (ValueError, TypeError):
             self.id = id
         self.name = None
+        self._attrs_gen = 0
+        self._attrs_changed = set()
         self.attrs = {}
         self.rels = {}
+        self._relindex = {}
         self.backlinks = {}
         self._parent = parent
         if obj:
@@ -121,9 +126,6 @@ class Backend( element.ModelElement ):
             self.mode = 'ENABLED'
             self.spare = False
             self.weight = 100
-        self._typename = ""         # overwritten by individual object types
-        self._path = ""             # overwritten by individual object types
-        self._kind = ""             # overwritten by individual object types
         self._deleted = False
         self._attrs_modified = False
         self._rels_modified = False
@@ -23,7 +23,7 @@ import pem
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 
-from airscript.base import element
+from airscript.base import element, syncplan
 from airscript.utils import output
 from airscript.model import vhost
 from pyAirlock.common import lookup
@@ -35,13 +35,15 @@ KIND = 'TLSCertificate'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class Certificate( element.ModelElement ):
-    RELATIONKEY = { "virtual-host": "virtual-hosts", "remote-json-web-key-set": "remote-json-web-key-sets" }
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'ssl-certificates'
+    _kind = KIND
     
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'ssl-certificates'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    RELATIONKEY = { "virtual-host": "virtual-hosts", "remote-json-web-key-set": "remote-json-web-key-sets" }
+    REFERENCED_BY = ( "virtual-host", "remote-json-web-key-set" )
+    # certificate, key and passphrase are only accepted together
+    DELTA_UPDATE = False
     
     def loadData( self, data: dict, update: bool=False ):
         element.ModelElement.loadData( self, data=data, update=update )
@@ -75,27 +77,11 @@ class Certificate( element.ModelElement ):
             return False
         return self.relationshipDelete( vhost_object )
     
-    def sync( self ) -> bool:
-        """
-        Sync changes to current object to Airlock Gateway
-        - Set all attributes
-        - Link relations to object types which should already have been updated
-        - Other relations are (later) linked from the other object types back to here
-
-        Returns:
-        - true: success, sync'ed
-        - false: delete element
-        """
-        if not 'passphrase' in self.attrs:
-            self.attrs['passphrase'] = ''
-            del_passphrase = True
-        else:
-            del_passphrase = False
-        r = super().sync()
-        if del_passphrase:
-            try:
-                del self.attrs['passphrase']
-            except KeyError:
-                pass
-        return r
+    def _planAttributes( self, classPointer, attrs: dict=None ) -> list[syncplan.SyncOperation]:
+        """ Gateway requires passphrase, empty if private key is not encrypted """
+        if attrs == None:
+            attrs = self.attrs
+        if not 'passphrase' in attrs:
+            attrs = dict( attrs, passphrase='' )
+        return super()._planAttributes( classPointer, attrs=attrs )
     
@@ -42,10 +42,19 @@ This class represents a complete Airlock Gateway Configuration and consists of m
 ._vhosts - dictionary of virtual hosts
 """
 
+import asyncio
+import concurrent.futures
+import contextlib
+import copy
 import datetime
+import threading
+import time
+import weakref
 from typing import Union
 
-from airscript.base import element, element_helpers
+import requests
+
+from airscript.base import depgraph, element, element_helpers, index, query, syncplan, table
 from airscript.model import api_policy
 from airscript.model import backendgroup
 from airscript.model import certificate
@@ -79,6 +88,9 @@ from airscript.system_settings import network_services as network_services_setti
 from airscript.system_settings import session as session_settings
 
 from airscript.utils import internal
+from airscript.utils import journal
+from airscript.utils import jsonstream
+from airscript.utils import snapshot
 from pyAirlock.common import lookup
 from pyAirlock.common import exception, log, utils
 
@@ -145,38 +157,134 @@ from pyAirlock.common import exception, log, utils
 #     "triggers": "anomaly-shield-trigger",
 #     "vhosts": "virtual-host",
 # }
-RELATIONSHIP_ORDER = {
-    "api-policy-service": 1000,
-    "anomaly-shield-application": 4600,
-    "anomaly-shield-rule": 4400,
-    "anomaly-shield-traffic-macher": 4200,
-    "anomaly-shield-trigger": 4000,
-    "back-end-group": 5000,
-    "ssl-certificate": 2000,
-    "graphql-document": 1100,
-    "host": 1,
-    "icap-environment": 3,
-    "ip-address-list": 1200,
-    "local-json-web-key-set": 3200,
-    "remote-json-web-key-set": 3200,
-    "kerberos-environment": 3000,
-    "mapping": 6000,
-    "allowed-network-endpoint": 2,
-    "node": 3100,
-    "openapi-document": 1300,
-    "route-ipv4-destination": 10,
-    "route-ipv6-destination": 11,
-    "route-ipv4-source": 12,
-    "route-ipv6-source": 13,
-    "mapping-template": 0,
-    "virtual-host": 5200,
+
+# default number of worker threads executing the blocking REST API calls of asynchronous operations
+ASYNC_WORKERS_DEFAULT = 8
+
+# gateway session -> configuration loaded into its workspace, see workspaceLoaded()
+_workspace = weakref.WeakKeyDictionary()
+_workspace_lock = threading.Lock()
+
+# Collection holding the elements of a type, used to resolve relationships when loading lazily
+COLLECTION_OF_TYPE = {
+    "api-policy-service": 'apipolicy',
+    "anomaly-shield-application": 'anomalyshield_applications',
+    "anomaly-shield-rule": 'anomalyshield_rules',
+    "anomaly-shield-traffic-matcher": 'trafficmatchers',
+    "anomaly-shield-trigger": 'triggers',
+    "back-end-group": 'backendgroups',
+    "ssl-certificate": 'certs',
+    "graphql-document": 'graphql',
+    "host": 'hostnames',
+    "icap-environment": 'icap',
+    "ip-address-list": 'iplists',
+    "local-json-web-key-set": 'jwks',
+    "remote-json-web-key-set": 'jwks',
+    "kerberos-environment": 'kerberos',
+    "mapping": 'mappings',
+    "allowed-network-endpoint": 'network_endpoints',
+    "node": 'nodes',
+    "openapi-document": 'openapi',
+    "route-ipv4-destination": 'routes',
+    "route-ipv6-destination": 'routes',
+    "route-ipv4-source": 'routes',
+    "route-ipv6-source": 'routes',
+    "mapping-template": 'templates',
+    "virtual-host": 'vhosts',
+}
+
+# Element classes by type name, their RELATIONKEY tables define load dependencies
+ELEMENT_CLASSES = {
+    api_policy.TYPENAME: api_policy.APIPolicy,
+    anomalyshield_application.TYPENAME: anomalyshield_application.AnomalyShieldApplication,
+    anomalyshield_rule.TYPENAME: anomalyshield_rule.AnomalyShieldRule,
+    anomalyshield_traffic_matcher.TYPENAME: anomalyshield_traffic_matcher.AnomalyShieldTrafficMatcher,
+    anomalyshield_trigger.TYPENAME: anomalyshield_trigger.AnomalyShieldTrigger,
+    backendgroup.TYPENAME: backendgroup.Backendgroup,
+    certificate.TYPENAME: certificate.Certificate,
+    graphql_object.TYPENAME: graphql_object.GraphQL,
+    host.TYPENAME: host.Host,
+    icap_object.TYPENAME: icap_object.ICAP,
+    iplist.TYPENAME: iplist.IPList,
+    jwks_object.LOCAL_TYPENAME: jwks_object.JWKS,
+    jwks_object.REMOTE_TYPENAME: jwks_object.JWKS,
+    kerberos_object.TYPENAME: kerberos_object.Kerberos,
+    mapping.TYPENAME: mapping.Mapping,
+    network_endpoint.TYPENAME: network_endpoint.NetworkEndpoint,
+    node.TYPENAME: node.Node,
+    openapi_object.TYPENAME: openapi_object.OpenAPI,
+    route.TYPENAME_DST_V4: route.Route,
+    route.TYPENAME_DST_V6: route.Route,
+    route.TYPENAME_SRC_V4: route.Route,
+    route.TYPENAME_SRC_V6: route.Route,
+    template.TYPENAME: template.Template,
+    vhost.TYPENAME: vhost.VirtualHost,
 }
 
+# Dependencies between element types, derived from their RELATIONKEY and REFERENCED_BY tables
+TYPE_GRAPH = depgraph.fromRelationKeys( ELEMENT_CLASSES )
+TYPE_ORDER = { type_name: nr for nr, type_name in enumerate( TYPE_GRAPH.order() ) }
+
+# Collections fetched by getAll(), in load order
+# - label: progress message
+# - sources: list of (pyAirlock session handler, add-method of Configuration, additional parameters for add-method)
+# - path: REST API endpoint, for collections without pyAirlock session handler
+# - settings: (key in ._settings, element class), for collections consisting of a single element
+COLLECTIONS = {
+    'nodes': { 'label': "Nodes", 'sources': [('node', 'addNode', {})] },
+    'apipolicy': { 'label': "API policies", 'sources': [('api_policy', 'addAPIPolicy', {})] },
+    'anomalyshield_applications': { 'label': "Anomaly Shield applications", 'sources': [('anomalyshield_application', 'addAnomalyShieldApplication', {})] },
+    'anomalyshield_rules': { 'label': "Anomaly Shield rules", 'sources': [('anomalyshield_rule', 'addAnomalyShieldRule', {})] },
+    'trafficmatchers': { 'label': "Anomaly Shield traffic matchers", 'sources': [('anomalyshield_trafficmatcher', 'addAnomalyShieldTrafficMatcher', {})] },
+    'triggers': { 'label': "Anomaly Shield triggers", 'sources': [('anomalyshield_trigger', 'addAnomalyShieldTrigger', {})] },
+    'backendgroups': { 'label': "Backend groups", 'sources': [('backendgroup', 'addBackendGroup', {})] },
+    'certs': { 'label': "Certificates", 'sources': [('certificate', 'addCertificate', {})] },
+    'graphql': { 'label': "GraphQL", 'sources': [('graphql', 'addGraphQL', {})] },
+    'hostnames': { 'label': "Hostnames", 'sources': [('host', 'addHostName', {})] },
+    'icap': { 'label': "ICAP", 'sources': [('icap', 'addICAP', {})] },
+    'iplists': { 'label': "IP lists", 'sources': [('iplist', 'addIPList', {})] },
+    'jwks': { 'label': "JWKS", 'sources': [('jwks_local', 'addJWKS', {'remote': False}),
+                                          ('jwks_remote', 'addJWKS', {})] },
+    'kerberos': { 'label': "Kerberos", 'sources': [('kerberos', 'addKerberos', {})] },
+    'mappings': { 'label': "Mappings", 'sources': [('mapping', 'addMapping', {})] },
+    'network_endpoints': { 'label': "Network endpoints", 'sources': [('network_endpoint', 'addNetworkEndpoint', {})] },
+    'openapi': { 'label': "OpenAPI", 'sources': [('openapi', 'addOpenAPI', {})] },
+    'routes': { 'label': "Routes", 'sources': [('routes_ipv4_destination', 'addRoute', {'ipv4': True, 'source': False}),
+                                              ('routes_ipv6_destination', 'addRoute', {'ipv4': False, 'source': False}),
+                                              ('routes_ipv4_source', 'addRoute', {'ipv4': True, 'source': True}),
+                                              ('routes_ipv6_source', 'addRoute', {'ipv4': False, 'source': True})] },
+    'vhosts': { 'label': "Virtual hosts", 'sources': [('vhost', 'addVHost', {})] },
+    'settings_license': { 'label': "Settings: license", 'sources': [('license', None, {})], 'settings': ('license', license.License) },
+    'settings_anomalyshield': { 'label': "Settings: anomaly shield", 'sources': [('settings_anomalyshield', None, {})], 'settings': ('anomalyshield', anomalyshield_settings.AnomalyShieldSettings) },
+    'settings_log': { 'label': "Settings: log", 'sources': [('settings_log', None, {})], 'settings': ('log', log_settings.LogSettings) },
+    'settings_network_services': { 'label': "Settings: network services", 'sources': [('settings_network_services', None, {})], 'settings': ('network_services', network_services_settings.NetworkServicesSettings) },
+    'settings_reporting': { 'label': "Settings: reporting", 'sources': [('settings_reporting', None, {})], 'settings': ('reporting', reporting_settings.ReportingSettings) },
+    'settings_route': { 'label': "Settings: (default) route", 'sources': [('settings_route', None, {})], 'settings': ('defaultroute', default_route_settings.DefaultRouteSettings) },
+    'settings_session': { 'label': "Settings: session", 'sources': [('settings_session', None, {})], 'settings': ('session', session_settings.SessionSettings) },
+    'templates': { 'label': "Mapping templates", 'sources': [(None, 'addTemplate', {})], 'path': "/configuration/templates/mappings" },
+}
+
+
+def workspaceLoaded( conn, cfg: 'Configuration' ):
+    """
+    Record 'cfg' as the configuration loaded into the workspace of gateway session 'conn'.
+
+    The configuration loaded before is marked as not loaded: its collections not yet fetched are no longer loaded on access
+    and it cannot be sync'ed until loaded again.
+    """
+    with _workspace_lock:
+        previous = _workspace.get( conn )
+        _workspace[conn] = weakref.ref( cfg )
+    previous = previous() if previous != None else None
+    if previous != None and previous is not cfg:
+        previous._loaded = False
+
 
 class Configuration( object ):
-    def __init__( self, obj, conn, airscript_config ):
+    def __init__( self, obj, conn, airscript_config, load_types: list[str]=None ):
         """
         conn: session.GatewaySession
+        load_types: element types loaded by loadAll(), e.g. from command line
         """
         if obj != None:
             self.id = obj['id']
@@ -192,18 +300,52 @@ class Configuration( object ):
             self.timestamp = now.timestamp()
             self.createdAt = now.strftime("%Y-%m-%d %H:%M:%S")
         self.conn = conn
+        self.gateway = conn.getName() if conn else None
+        self.gateway_version = None
         self._airscript_config = airscript_config
+        self._load_types = load_types
+        self._snapshots = snapshot.fromConfig( airscript_config )
         self.objects = {}
         self._settings = {}
         self._loaded = False
-        self._ordered_types = None
+        self._pending_rels = None
+        self._sync_errors = {}
+        self._sync_active = False
+        self._sync_lock = threading.Lock()
+        self._journal = None
+        self._journal_path = None
         self._log = log.Log( self.__module__ )
         self._reset()
     
     def __repr__( self ):
         return str( { 'id': self.id, 'comment': self.comment, 'type': self.type } )
     
+    @staticmethod
+    def fromArchive( path: str, airscript_config=None ) -> 'Configuration':
+        """
+        Create read-only configuration from an archive written by .archive() or from a snapshot cache file.
+
+        No gateway connection is required: mappings(), vhosts(), relationships etc. are available offline,
+        uploading changes is not. Returns None if the file cannot be read.
+
+        Zip files exported from Airlock Gateway by .download() contain the gateway's own configuration format
+        and cannot be used here.
+        """
+        try:
+            snap = snapshot.read( path )
+        except (OSError, ValueError) as e:
+            log.Log( __name__ ).error( f"Unable to read archive: {e}" )
+            return None
+        obj = { 'id': snap['id'], 'attributes': { 'comment': snap.get( 'comment' ) or "", 'configType': snap.get( 'configType' ) or 'ARCHIVED', 'createdAt': snap['createdAt'] }}
+        cfg = Configuration( obj, None, airscript_config )
+        cfg.gateway = snap.get( 'gateway' )
+        cfg.gateway_version = snap.get( 'gateway-version' )
+        cfg._snapshotBuild( snap )
+        return cfg
+    
     def runtimeConfigGet( self, path: str, default: str=None ):
+        if self._airscript_config == None:
+            return default
         return self._airscript_config.get( path, default )
     
     def clear( self ):
@@ -299,7 +441,11 @@ class Configuration( object ):
         return func
     
     def load( self ) -> bool:
-        """ Retrieve configuration data (vhosts, mappings etc.) from Airlock Gateway using REST API. """
+        """
+        Load configuration into the gateway session's workspace, its data (vhosts, mappings etc.) is then fetched on first access.
+
+        A configuration loaded before on the same session is no longer loaded, see workspaceLoaded().
+        """
         if self.conn:
             if self._loaded == False:
                 if self.id == 'new':
@@ -316,48 +462,283 @@ class Configuration( object ):
                     self._log.error( "Loading failed: not found" )
                 else:
                     self._loaded = True
+                    workspaceLoaded( self.conn, self )
         else:
             self._log.error( "Loading failed: not connected to any gateway" )
         return self._loaded
     
-    def loadAll( self ) -> bool:
+    def loadAll( self, workers: int=None, types: list[str]=None ) -> bool:
+        """
+        Retrieve configuration and all configuration items from Airlock Gateway.
+
+        'workers' sets the number of collections fetched concurrently,
+        default is taken from config file (airscript.load.workers), otherwise fetched sequentially.
+
+        'types' restricts loading to the listed element types, given as kind (e.g. 'Mapping') or type name (e.g. 'virtual-host'),
+        and the types they depend on, see typeClosure().
+        Default is taken from command line (--types) or config file (airscript.load.types), otherwise everything is loaded.
+        Other collections are still loaded on first access.
+        """
         r = self.load()
-        if r:
-            self.getAll()
+        if r and not self._snapshotLoad():
+            if workers == None:
+                workers = self.runtimeConfigGet( 'airscript.load.workers' )
+            if types == None:
+                types = self._load_types or self.runtimeConfigGet( 'airscript.load.types' )
+            if types:
+                self._loadCollections( self._typeCollections( self.typeClosure( types )), workers )
+            else:
+                self.getAll( workers=workers )
         return r
     
-    def sync( self ):
-        """ Upload all changed items and establish connections """
-        # keep order, allows linking directly at sync
-        if not self._ordered_types:
-            self._orderTypes()
-        for k in sorted( self._ordered_types ):
-            element_type = self._ordered_types[k]
-            for cfg_item in self.objects[element_type].values():
-                if isinstance( cfg_item, list ):
-                    for item in cfg_item:
-                        item.sync()
-                        self._addElement2ObjectMap( item )
-                else:
-                    cfg_item.sync()
-            # remove deleted objects
-            print( f"Removing deleted objects: {element_type}" )
-            objs = [k for k,v in self.objects[element_type].items() if not isinstance( v, element.BaseElement ) or v.isDeleted()]
-            for key in objs:
-                del self.objects[element_type][key]
-        # for settings in self._settings.values():
-        #     settings.sync()
+    def typeClosure( self, types: list[str] ) -> list[str]:
+        """
+        Return type names of elements required when loading 'types', in relationship order.
+
+        Dependencies between element types are derived from their RELATIONKEY and REFERENCED_BY tables, see TYPE_GRAPH,
+        e.g. mappings depend on virtual hosts and backend groups, which in turn depend on certificates.
+        """
+        if isinstance( types, str ):
+            types = [types]
+        pending = []
+        for name in types:
+            type_name = self._typeName( name )
+            if type_name == None:
+                self._log.warning( f"Unknown element type '{name}'" )
+            else:
+                pending.append( type_name )
+        required = set()
+        while pending:
+            type_name = pending.pop()
+            if type_name in required:
+                continue
+            required.add( type_name )
+            for other in TYPE_GRAPH.dependencies( type_name ):
+                if other in COLLECTION_OF_TYPE:
+                    pending.append( other )
+        return sorted( required, key=lambda x: (self.elementOrderNr( x ), x) )
+    
+    async def aloadAll( self, workers: int=None ) -> bool:
+        """
+        Asynchronous variant of loadAll().
+
+        pyAirlock's REST API calls block, they are offloaded to a pool of 'workers' threads
+        (default: airscript.load.workers from config file, otherwise 8), so the event loop is not blocked.
+        Concurrency is bounded by the number of threads, as with loadAll( workers=... ).
+        """
+        r = await asyncio.to_thread( self.load )
+        if r and not await asyncio.to_thread( self._snapshotLoad ):
+            await self.agetAll( workers=workers )
+        return r
+    
+    async def agetAll( self, workers: int=None ):
+        """ Asynchronous variant of getAll(), REST API calls are executed by a pool of 'workers' threads. """
+        if workers == None:
+            workers = self.runtimeConfigGet( 'airscript.load.workers', ASYNC_WORKERS_DEFAULT )
+        loop = asyncio.get_running_loop()
+        keys = list( COLLECTIONS.keys() )
+        with concurrent.futures.ThreadPoolExecutor( max_workers=max( workers, 1 )) as pool:
+            results = await asyncio.gather( *[loop.run_in_executor( pool, self._fetchCollectionTimed, key ) for key in keys] )
+        keep = {} if self._snapshotCacheable() else None
+        with self._relationshipPhase():
+            self._buildCollections( zip( keys, results ), keep )
+        self._snapshotStore( keep )
+    
+    def plan( self ) -> syncplan.SyncPlan:
+        """
+        Return operations sync() would perform, without changing anything.
+
+        The plan lists every REST API request in execution order, with endpoint and payload size,
+        see SyncPlan.totals() and SyncPlan.estimate() for the expected cost.
+        """
+        p = syncplan.SyncPlan()
+        graph = depgraph.DependencyGraph()
+        planned = []
+        for element_type in self._collectionOrder():
+            items = self._syncItems( element_type )
+            if items == []:
+                continue
+            graph.add( element_type )
+            for item in items:
+                operations = item.planSync( p )
+                planned.append( (element_type, item, operations) )
+                for dependency in self._syncDependencies( operations ):
+                    graph.addDependency( element_type, dependency )
+        for level in graph.levels( key=self._collectionOrderNr ):
+            p.addTier( level )
+        for element_type, item, operations in planned:
+            p.add( element_type, item, operations )
+        return p
+    
+    def sync( self, workers: int=None, plan: syncplan.SyncPlan=None, journal: str=None ) -> bool:
+        """
+        Upload all changed items and establish connections.
+
+        Executes 'plan', as returned by plan(), or a freshly calculated one.
+        The plan's tiers are processed one after the other, a tier holds the element types not depending on each other.
+        With 'workers' > 1, the elements of a tier are uploaded concurrently using a pool of that many threads,
+        their connections are established concurrently once all elements of the tier exist on the gateway.
+
+        Transient errors are retried, errors are collected per element instead of aborting, see syncErrors().
+        With a 'journal' (default: airscript.sync.journal from config file), an interrupted sync can be resumed
+        using resumeSync(), the journal is removed once all changes have been uploaded.
+        Returns True if all changes were uploaded successfully.
+        """
+        if not self.conn:
+            self._log.error( "Sync failed: not connected to any gateway" )
+            return False
+        if not self._inWorkspace():
+            self._log.error( f"Sync failed: another configuration has been loaded on '{self.gateway}' - use .load() first" )
+            return False
+        if plan == None:
+            plan = self.plan()
+        with self._syncJournal( journal ):
+            self._syncBegin()
+            if workers != None and workers > 1:
+                with concurrent.futures.ThreadPoolExecutor( max_workers=workers ) as pool:
+                    for tier in plan.tiers:
+                        self._syncTier( tier, lambda groups: list( pool.map( lambda group: self._syncOperations( *group ), groups )))
+            else:
+                for tier in plan.tiers:
+                    self._syncTier( tier, lambda groups: [self._syncOperations( *group ) for group in groups] )
+            # for settings in self._settings.values():
+            #     settings.sync()
+            return self._syncEnd()
+    
+    async def async_sync( self, workers: int=None, plan: syncplan.SyncPlan=None, journal: str=None ) -> bool:
+        """
+        Asynchronous variant of sync().
+
+        Elements of the same tier do not depend on each other, their blocking REST API calls are offloaded
+        to a pool of 'workers' threads (default: airscript.load.workers from config file, otherwise 8).
+        """
+        if not self.conn:
+            self._log.error( "Sync failed: not connected to any gateway" )
+            return False
+        if not self._inWorkspace():
+            self._log.error( f"Sync failed: another configuration has been loaded on '{self.gateway}' - use .load() first" )
+            return False
+        if workers == None:
+            workers = self.runtimeConfigGet( 'airscript.load.workers', ASYNC_WORKERS_DEFAULT )
+        if plan == None:
+            plan = self.plan()
+        loop = asyncio.get_running_loop()
+        with self._syncJournal( journal ), concurrent.futures.ThreadPoolExecutor( max_workers=max( workers, 1 )) as pool:
+            self._syncBegin()
+            for tier in plan.tiers:
+                failed = set()
+                for phase in [syncplan.PHASE_ELEMENTS, syncplan.PHASE_CONNECTIONS]:
+                    groups = [(item, ops) for item, ops in tier.phase( phase ) if item not in failed]
+                    results = await asyncio.gather( *[loop.run_in_executor( pool, self._syncOperations, item, ops ) for item, ops in groups] )
+                    failed.update( item for (item, _), ok in zip( groups, results ) if not ok )
+                self._syncTierFinish( tier, failed )
+            return self._syncEnd()
+    
+    def resumeSync( self, workers: int=None, journal: str=None ) -> bool:
+        """
+        Resume interrupted sync, skipping operations confirmed in the sync journal.
+
+        Uses the journal of the last sync unless 'journal' is specified, e.g. after restarting the script.
+        Elements created by the interrupted sync receive their id from the journal instead of being created twice.
+        To resume an interrupted declarativeImport(), re-run it with the same journal.
+        """
+        if journal == None:
+            journal = self._journal_path or self.runtimeConfigGet( 'airscript.sync.journal' )
+        if journal == None:
+            self._log.error( "Resume sync failed: no sync journal" )
+            return False
+        return self.sync( workers=workers, journal=journal )
+    
+    def syncOperation( self, op: syncplan.SyncOperation ):
+        """
+        Execute single sync operation, retrying on transient errors with exponential backoff.
+
+        Operations confirmed by the active sync journal are skipped.
+        Requests which must not be sent twice (creates) are retried, or resent when resuming a sync, only if a lookup
+        shows that Airlock Gateway has not performed them, see SyncOperation.recover().
+        Raises the last error if all retries failed.
+        """
+        if self._journal != None:
+            entry = self._journal.confirmed( op )
+            if entry != None:
+                self._log.info( f"Skipping confirmed operation: {op}" )
+                op.confirm( entry )
+                return
+            if not op.idempotent and self._journal.started( op ):
+                found = self._recoverOperation( op )
+                if found == None:
+                    message = "Outcome of interrupted request unknown, not sent again"
+                    self._journal.failed( op, message )
+                    raise exception.AirlockError( message )
+                if found:
+                    self._journal.done( op )
+                    return
+            self._journal.begin( op )
+        retries = self.runtimeConfigGet( 'airscript.sync.retries', journal.RETRIES_DEFAULT )
+        delay = self.runtimeConfigGet( 'airscript.sync.backoff', journal.BACKOFF_DEFAULT )
+        attempt = 0
+        while True:
+            try:
+                op.execute()
+                break
+            except (exception.AirlockError, requests.exceptions.RequestException) as e:
+                retry = attempt < retries and self._isTransient( e )
+                if retry and not op.idempotent:
+                    # request may have been performed nonetheless, e.g. after a read timeout
+                    found = self._recoverOperation( op )
+                    if found:
+                        break
+                    retry = found == False
+                if not retry:
+                    if self._journal != None:
+                        self._journal.failed( op, f"{type( e ).__name__} {e}" )
+                    raise
+                attempt += 1
+                self._log.warning( f"{op}: {type( e ).__name__} {e} - retry {attempt}/{retries} in {delay}s" )
+                time.sleep( delay )
+                delay = min( delay * 2, journal.BACKOFF_MAX )
+        if self._journal != None:
+            self._journal.done( op )
+    
+    def markChanged( self, elem: element.BaseElement ):
+        """ Add element to change set, only changed elements are visited by sync() """
+        key = self._changeSetKey( elem.getTypeName() )
+        if key == None:
+            return
+        self._elementIndex( key ).refresh( elem )
+        try:
+            self._changed[key][elem] = None
+        except KeyError:
+            self._changed[key] = { elem: None }
+    
+    def changes( self ) -> list[element.BaseElement]:
+        """ Return elements with changes not yet sync'ed, in sync order """
+        r = []
+        for element_type in self._collectionOrder():
+            r.extend( [item for item in self._syncItems( element_type ) if item.isDeleted() or self._isPending( item )] )
+        return r
+    
+    def syncErrors( self ) -> dict:
+        """ Return errors of last sync, dict of element and list of error messages """
+        return self._sync_errors
+    
+    def recordSyncError( self, elem: element.BaseElement, message: str ) -> bool:
+        """ Collect sync error of element, returns False if no sync is running """
+        if not self._sync_active:
+            return False
+        with self._sync_lock:
+            self._sync_errors.setdefault( elem, [] ).append( message )
+        return True
     
     def elementOrderNr( self, type_name: str ) -> int:
+        """ Position of element type in relationship order, see TYPE_GRAPH """
         try:
-            return RELATIONSHIP_ORDER[type_name]
+            return TYPE_ORDER[type_name]
         except KeyError:
             return 0
     
     def elementOrderList( self ):
-        if not self._ordered_types:
-            self._orderTypes()
-        return sorted( self._ordered_types )
+        return sorted( self._collectionOrderNr( k ) for k in self.objects.keys() )
     
     def activate( self, comment: str=None ) -> bool:
         """
@@ -433,6 +814,30 @@ class Configuration( object ):
         self._log.verbose( f"Configuration saved to '{zip_file}'" )
         return zip_file
     
+    def archive( self, fname: str=None ) -> str|bool:
+        """
+        Write configuration data to a zip archive, which can later be read without gateway connection using Configuration.fromArchive().
+
+        The archive contains the configuration as saved on Airlock Gateway, changes not sync'ed are not included.
+        """
+        if not self.conn or self.id in ['new', 'empty']:
+            return False
+        if self.load() == False:
+            return False
+        snap = None
+        if self._snapshots != None:
+            snap = self._snapshots.load( self.conn.getName(), self.id, self.createdAt, self.conn.getVersion() )
+        if snap == None:
+            fetched = self._fetchCollections( list( COLLECTIONS.keys() ), self.runtimeConfigGet( 'airscript.load.workers' ))
+            snap = self._snapshotCreate( { key: raw for key, (raw, _) in fetched.items() } )
+        if fname:
+            zip_file = fname
+        else:
+            zip_file = "{}/{}-{}-airscript.zip".format( self._airscript_config.get( "airscript.download-dir"), self.conn.getName(), self.id )
+        snapshot.writeArchive( zip_file, snap )
+        self._log.verbose( f"Configuration archived to '{zip_file}'" )
+        return zip_file
+    
     def upload( self, fname ) -> bool:
         """
         Import Airlock Gateway configuration.
@@ -453,13 +858,18 @@ class Configuration( object ):
         self._log.error( "Upload: failed" )
         return False
     
-    def declarativeImport( self, declarative: dict ) -> bool:
+    def declarativeImport( self, declarative: dict, journal: str=None ) -> bool:
+        # with a sync 'journal', an interrupted import can be re-run without creating elements twice
         # format of declarative:
         # { 'source': path_to_config_dir, 'env': env, 'objects': { kind: [{ 'attributes': object, 'connections': {kind: [names]} }] }}
         if self._loaded == False:
             if self.load() == False:
                 return False
             self.getAll()
+        with self._syncJournal( journal ):
+            return self._declarativeImport( declarative )
+    
+    def _declarativeImport( self, declarative: dict ) -> bool:
         self.comment = f"Declarative ({declarative['source']}, env {declarative['env']})"
         # create objects without connecting them
         for item_kind, item_lists_per_kind in declarative['objects'].items():
@@ -489,7 +899,7 @@ class Configuration( object ):
                         for reltype, names in connections.items():
                             for name in names:
                                 type_name = lookup.get( lookup.RELTYPE2NAME, reltype )
-                                ref = self._findByName( self.getObjects( type_name), name )
+                                ref = self._findByName( type_name, name )
                                 print( f"- {obj.name} -> {ref.getKind()}:{ref.name}" )
                                 obj.addRel( ref, reltype, load=True, backlink=True )
         self.sync()
@@ -527,66 +937,90 @@ class Configuration( object ):
             return { "error": error, "warning": warning, "info": info }
     
     def apipolicy( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._apipolicy, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'apipolicy' )
+        return internal.itemList( self._apipolicy, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( api_policy.TYPENAME ))
 
     def anomalyshield_applications( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._anomalyshield_applications, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'anomalyshield_applications' )
+        return internal.itemList( self._anomalyshield_applications, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( anomalyshield_application.TYPENAME ))
 
     def anomalyshield_rules( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._anomalyshield_rules, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'anomalyshield_rules' )
+        return internal.itemList( self._anomalyshield_rules, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( anomalyshield_rule.TYPENAME ))
 
     def anomalyshield_trafficmatcher( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._trafficmatchers, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'trafficmatchers' )
+        return internal.itemList( self._trafficmatchers, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( anomalyshield_traffic_matcher.TYPENAME ))
 
     def anomalyshield_triggers( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._triggers, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'triggers' )
+        return internal.itemList( self._triggers, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( anomalyshield_trigger.TYPENAME ))
 
     def backendgroups( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._backendgroups, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'backendgroups' )
+        return internal.itemList( self._backendgroups, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( backendgroup.TYPENAME ))
 
     def certificates( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._certs, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'certs' )
+        return internal.itemList( self._certs, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( certificate.TYPENAME ))
 
     def graphql( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._graphql, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'graphql' )
+        return internal.itemList( self._graphql, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( graphql_object.TYPENAME ))
 
     def hostnames( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._hostnames, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'hostnames' )
+        return internal.itemList( self._hostnames, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( host.TYPENAME ))
 
     def icap( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._icap, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'icap' )
+        return internal.itemList( self._icap, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( icap_object.TYPENAME ))
 
     def iplists( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._iplists, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'iplists' )
+        return internal.itemList( self._iplists, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( iplist.TYPENAME ))
 
     def jwks( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._jwks, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'jwks' )
+        return internal.itemList( self._jwks, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( 'jwks' ))
 
     def kerberos( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._kerberos, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'kerberos' )
+        return internal.itemList( self._kerberos, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( kerberos_object.TYPENAME ))
 
     def mappings( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._mappings, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'mappings' )
+        return internal.itemList( self._mappings, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( mapping.TYPENAME ))
 
     def networkendpoints( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._network_endpoints, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'network_endpoints' )
+        return internal.itemList( self._network_endpoints, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( network_endpoint.TYPENAME ))
 
     def nodes( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._nodes, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'nodes' )
+        return internal.itemList( self._nodes, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( node.TYPENAME ))
 
     def openapi( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._openapi, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'openapi' )
+        return internal.itemList( self._openapi, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( openapi_object.TYPENAME ))
 
     def routes( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._routes, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'routes' )
+        return internal.itemList( self._routes, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( 'routes' ))
 
     def templates( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
+        self._ensureLoaded( 'templates' )
         return internal.itemList( self._templates, id=id, name=name, ids=ids, filter=filter, sort=sort )
 
     def vhosts( self, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
-        return internal.itemList( self._vhosts, id=id, name=name, ids=ids, filter=filter, sort=sort )
+        self._ensureLoaded( 'vhosts' )
+        return internal.itemList( self._vhosts, id=id, name=name, ids=ids, filter=filter, sort=sort, elements=self._elementIndex( vhost.TYPENAME ))
 
     def settings( self, subset: str=None ) -> dict:
+        if subset == 'templates':
+            self._ensureLoaded( 'templates' )
+        else:
+            self._ensureLoaded( *[k for k,v in COLLECTIONS.items() if 'settings' in v and subset in (None, v['settings'][0])] )
         try:
             return self._settings[subset]
         except KeyError:
@@ -733,6 +1167,9 @@ class Configuration( object ):
         return obj
 
     def _loadObject( self, type_name: str, id: str=None, data: dict=None ) -> element.BaseElement|element.ModelElement:
+        if id == None:
+            # new element, objects[None] lists elements not yet created on Airlock Gateway
+            return None
         objects = self.getObjects( type_name )
         try:
             obj = objects[id]
@@ -838,7 +1275,7 @@ class Configuration( object ):
             if data:
                 for found in self._nodes.values():
                     try:
-                        if found.name == data['attributes']['hostName'] or (not found.name and (self.conn.getHost() == data['attributes']['hostName'] or self.conn.getNodename() == data['attributes']['hostName'])):
+                        if found.name == data['attributes']['hostName'] or (not found.name and self.conn and (self.conn.getHost() == data['attributes']['hostName'] or self.conn.getNodename() == data['attributes']['hostName'])):
                             obj = found
                             data['id'] = obj.id
                             obj.loadData( data=data )
@@ -882,8 +1319,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.api_policy.read():
-            self._addElement2ObjectMap( self.addAPIPolicy( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'apipolicy' )
         return self._apipolicy
     
     def getAnomalyShieldApplications( self ) -> Union[list[dict], None]:
@@ -895,8 +1331,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.anomalyshield_application.read():
-            self._addElement2ObjectMap( self.addAnomalyShieldApplication( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'anomalyshield_applications' )
         return self._anomalyshield_applications
     
     def getAnomalyShieldRules( self ) -> Union[list[dict], None]:
@@ -908,8 +1343,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.anomalyshield_rule.read():
-            self._addElement2ObjectMap( self.addAnomalyShieldRule( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'anomalyshield_rules' )
         return self._anomalyshield_rules
     
     def getAnomalyShieldTrafficMatchers( self ) -> Union[list[dict], None]:
@@ -921,8 +1355,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.anomalyshield_trafficmatcher.read():
-            self._addElement2ObjectMap( self.addAnomalyShieldTrafficMatcher( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'trafficmatchers' )
         return self._trafficmatchers
     
     def getAnomalyShieldTriggers( self ) -> Union[list[dict], None]:
@@ -934,8 +1367,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.anomalyshield_trigger.read():
-            self._addElement2ObjectMap( self.addAnomalyShieldTrigger( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'triggers' )
         return self._triggers
     
     def getBackendGroups( self ) -> Union[list[dict], None]:
@@ -947,8 +1379,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.backendgroup.read():
-            self._addElement2ObjectMap( self.addBackendGroup( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'backendgroups' )
         return self._backendgroups
     
     def getCertificates( self ) -> Union[list[dict], None]:
@@ -960,8 +1391,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.certificate.read():
-            self._addElement2ObjectMap( self.addCertificate( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'certs' )
         return self._certs
     
     def getGraphQL( self ) -> Union[list[dict], None]:
@@ -973,8 +1403,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.graphql.read():
-            self._addElement2ObjectMap( self.addGraphQL( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'graphql' )
         return self._graphql
     
     def getHostNames( self ) -> Union[list[dict], None]:
@@ -986,8 +1415,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.host.read():
-            self._addElement2ObjectMap( self.addHostName( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'hostnames' )
         return self._hostnames
     
     def getICAP( self ) -> Union[list[dict], None]:
@@ -999,8 +1427,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.icap.read():
-            self._addElement2ObjectMap( self.addICAP( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'icap' )
         return self._icap
     
     def getIPLists( self ) -> Union[list[dict], None]:
@@ -1012,8 +1439,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.iplist.read():
-            self._addElement2ObjectMap( self.addIPList( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'iplists' )
         return self._iplists
     
     def getJWKS( self ) -> Union[list[dict], None]:
@@ -1025,10 +1451,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.jwks_local.read():
-            self._addElement2ObjectMap( self.addJWKS( id=element_helpers.extractId( entry ), data=entry, remote=False ))
-        for entry in self.conn.jwks_remote.read():
-            self._addElement2ObjectMap( self.addJWKS( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'jwks' )
         return self._jwks
     
     def getKerberos( self ) -> Union[list[dict], None]:
@@ -1040,8 +1463,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.kerberos.read():
-            self._addElement2ObjectMap( self.addKerberos( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'kerberos' )
         return self._kerberos
     
     def getMappings( self ) -> Union[list[dict], None]:
@@ -1053,8 +1475,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.mapping.read():
-            self._addElement2ObjectMap( self.addMapping( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'mappings' )
         return self._mappings
     
     def getNetworkEndpoints( self ) -> Union[list[dict], None]:
@@ -1066,8 +1487,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.network_endpoint.read():
-            self._addElement2ObjectMap( self.addNetworkEndpoint( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'network_endpoints' )
         return self._network_endpoints
     
     def getNodes( self ) -> Union[list[dict], None]:
@@ -1079,8 +1499,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.node.read():
-            self._addElement2ObjectMap( self.addNode( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'nodes' )
         return self._nodes
     
     def getOpenAPI( self ) -> Union[list[dict], None]:
@@ -1092,8 +1511,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.openapi.read():
-            self._addElement2ObjectMap( self.addOpenAPI( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'openapi' )
         return self._openapi
     
     def getRoutes( self ) -> Union[list[dict], None]:
@@ -1105,14 +1523,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.routes_ipv4_destination.read():
-            self._addElement2ObjectMap( self.addRoute( id=element_helpers.extractId( entry ), data=entry, ipv4=True, source=False ))
-        for entry in self.conn.routes_ipv6_destination.read():
-            self._addElement2ObjectMap( self.addRoute( id=element_helpers.extractId( entry ), data=entry, ipv4=False, source=False ))
-        for entry in self.conn.routes_ipv4_source.read():
-            self._addElement2ObjectMap( self.addRoute( id=element_helpers.extractId( entry ), data=entry, ipv4=True, source=True ))
-        for entry in self.conn.routes_ipv6_source.read():
-            self._addElement2ObjectMap( self.addRoute( id=element_helpers.extractId( entry ), data=entry, ipv4=False, source=True ))
+        self._loadCollection( 'routes' )
         return self._routes
     
     def getTemplates( self ) -> Union[list[dict], None]:
@@ -1124,10 +1535,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        resp = self.conn.get( "/configuration/templates/mappings" )
-        if resp.text != "":
-            for entry in resp.json()['data']:
-                self._addElement2ObjectMap( self.addTemplate( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'templates' )
         return self._templates
     
     def getVHosts( self ) -> Union[list[dict], None]:
@@ -1139,8 +1547,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        for entry in self.conn.vhost.read():
-            self._addElement2ObjectMap( self.addVHost( id=element_helpers.extractId( entry ), data=entry ))
+        self._loadCollection( 'vhosts' )
         return self.vhosts()
     
     def getSettingsLicense( self ) -> Union[dict, None]:
@@ -1152,8 +1559,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        entry = self.conn.license.read()
-        self._settings['license'] = license.License( self, obj=entry )
+        self._loadCollection( 'settings_license' )
         return self._settings['license']
     
     def getSettingsAnomalyShield( self ) -> Union[dict, None]:
@@ -1165,8 +1571,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        entry = self.conn.settings_anomalyshield.read()
-        self._settings['anomalyshield'] = anomalyshield_settings.AnomalyShieldSettings( self, obj=entry )
+        self._loadCollection( 'settings_anomalyshield' )
         return self._settings['anomalyshield']
     
     def getSettingsLog( self ) -> Union[dict, None]:
@@ -1178,8 +1583,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        entry = self.conn.settings_log.read()
-        self._settings['log'] = log_settings.LogSettings( self, obj=entry )
+        self._loadCollection( 'settings_log' )
         return self._settings['log']
     
     def getSettingsNetworkServices( self ) -> Union[dict, None]:
@@ -1191,8 +1595,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        entry = self.conn.settings_network_services.read()
-        self._settings['network_services'] = network_services_settings.NetworkServicesSettings( self, obj=entry )
+        self._loadCollection( 'settings_network_services' )
         return self._settings['network_services']
     
     def getSettingsReporting( self ) -> Union[dict, None]:
@@ -1204,8 +1607,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        entry = self.conn.settings_reporting.read()
-        self._settings['reporting'] = reporting_settings.ReportingSettings( self, obj=entry )
+        self._loadCollection( 'settings_reporting' )
         return self._settings['reporting']
     
     def getSettingsRoute( self ) -> Union[dict, None]:
@@ -1217,8 +1619,7 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        entry = self.conn.settings_route.read()
-        self._settings['defaultroute'] = default_route_settings.DefaultRouteSettings( self, obj=entry )
+        self._loadCollection( 'settings_route' )
         return self._settings['defaultroute']
     
     def getSettingsSession( self ) -> Union[dict, None]:
@@ -1230,68 +1631,48 @@ class Configuration( object ):
         if self._loaded == False:
             if self.load() == False:
                 return None
-        entry = self.conn.settings_session.read()
-        self._settings['session'] = session_settings.SessionSettings( self, obj=entry )
+        self._loadCollection( 'settings_session' )
         return self._settings['session']
     
-    def getAll( self ):
+    def getAll( self, workers: int=None ):
         """
         Use REST API to fetch most configuration items from Airlock Gateway
+
+        With 'workers' > 1, the collections are fetched concurrently using a pool of that many threads.
+        Elements are still created in the same order as when fetching sequentially,
+        resulting in the same object graph.
+
+        Fetch and build times per collection are available from .loadTimings()
+
+        With airscript.load.streaming enabled in the config file, REST API responses are decoded incrementally
+        and elements built while receiving them, keeping memory usage low for large collections.
+        Collections are then fetched sequentially.
+
+        If the snapshot cache is enabled (airscript.cache.enabled), the fetched data is stored on disk
+        and re-used by loadAll() as long as configuration id, creation timestamp and gateway version match.
         """
-        self._log.verbose( "- Nodes" )
-        self.getNodes()
-        self._log.verbose( "- API policies" )
-        self.getAPIPolicies()
-        self._log.verbose( "- Anomaly Shield applications" )
-        self.getAnomalyShieldApplications()
-        self._log.verbose( "- Anomaly Shield rules" )
-        self.getAnomalyShieldRules()
-        self._log.verbose( "- Anomaly Shield traffic matchers" )
-        self.getAnomalyShieldTrafficMatchers()
-        self._log.verbose( "- Anomaly Shield triggers" )
-        self.getAnomalyShieldTriggers()
-        self._log.verbose( "- Backend groups" )
-        self.getBackendGroups()
-        self._log.verbose( "- Certificates" )
-        self.getCertificates()
-        self._log.verbose( "- GraphQL" )
-        self.getGraphQL()
-        self._log.verbose( "- Hostnames" )
-        self.getHostNames()
-        self._log.verbose( "- ICAP" )
-        self.getICAP()
-        self._log.verbose( "- IP lists" )
-        self.getIPLists()
-        self._log.verbose( "- JWKS" )
-        self.getJWKS()
-        self._log.verbose( "- Kerberos" )
-        self.getKerberos()
-        self._log.verbose( "- Mappings" )
-        self.getMappings()
-        self._log.verbose( "- Network endpoints" )
-        self.getNetworkEndpoints()
-        self._log.verbose( "- OpenAPI" )
-        self.getOpenAPI()
-        self._log.verbose( "- Routes" )
-        self.getRoutes()
-        self._log.verbose( "- Virtual hosts" )
-        self.getVHosts()
-        self._log.verbose( "- Settings: license" )
-        self.getSettingsLicense()
-        self._log.verbose( "- Settings: anomaly shield" )
-        self.getSettingsAnomalyShield()
-        self._log.verbose( "- Settings: log" )
-        self.getSettingsLog()
-        self._log.verbose( "- Settings: network services" )
-        self.getSettingsNetworkServices()
-        self._log.verbose( "- Settings: reporting" )
-        self.getSettingsReporting()
-        self._log.verbose( "- Settings: (default) route" )
-        self.getSettingsRoute()
-        self._log.verbose( "- Settings: session" )
-        self.getSettingsSession()
-        self._log.verbose( "- Mapping templates" )
-        self.getTemplates()
+        if self._loaded == False:
+            if self.load() == False:
+                return None
+        # elements modify the data they are built from, keep a copy for the snapshot cache
+        keep = {} if self._snapshotCacheable() else None
+        with self._relationshipPhase():
+            if self._streaming():
+                # elements are built while receiving the data, one collection after the other
+                for key in COLLECTIONS.keys():
+                    self._loadCollection( key, keep )
+            elif workers == None or workers <= 1:
+                results = ((key, self._fetchCollectionTimed( key )) for key in COLLECTIONS.keys())
+                self._buildCollections( results, keep )
+            else:
+                with concurrent.futures.ThreadPoolExecutor( max_workers=workers ) as pool:
+                    futures = { key: pool.submit( self._fetchCollectionTimed, key ) for key in COLLECTIONS.keys() }
+                    self._buildCollections( ((key, future.result()) for key, future in futures.items()), keep )
+        self._snapshotStore( keep )
+    
+    def loadTimings( self ) -> dict:
+        """ Return fetch and build times, in seconds, of the collections loaded from Airlock Gateway. """
+        return self._timings
     
     def mappingFromTemplate( self, template ) -> bool:
         """ Create new mapping from template. """
@@ -1328,188 +1709,199 @@ class Configuration( object ):
     
     def listNodes( self ) -> list[dict[node.Node]]:
         """ Return sorted list of nodes. """
-        if self._nodes == None:
-            self.getNodes()
+        self._ensureLoaded( 'nodes' )
         return self._listSorted( self._nodes, key='name' )
         # return sorted( self._nodes.items(), key=internal.itemgetter_lc_name )
     
     def listVHosts( self ) -> list[dict[vhost.VirtualHost]]:
         """ Return sorted list of virtual hosts. """
-        if self._vhosts == None:
-            self.getVHosts()
+        self._ensureLoaded( 'vhosts' )
         return self._listSorted( self._vhosts, key='name' )
         # return sorted( self._vhosts.items(), key=internal.itemgetter_lc_name )
     
     def listMappings( self ) -> list[dict[mapping.Mapping]]:
         """ Return sorted list of mappings. """
-        if self._mappings == None:
-            self.getMappings()
+        self._ensureLoaded( 'mappings' )
         return self._listSorted( self._mappings, key='name' )
         # return sorted( self._mappings.items(), key=internal.itemgetter_lc_name )
     
     def listAPIPolicies( self ) -> list[dict[api_policy.APIPolicy]]:
         """ Return sorted list of APIPolicy documents. """
-        if self._apipolicy == None:
-            self.getAPIPolicies()
+        self._ensureLoaded( 'apipolicy' )
         return self._listSorted( self._apipolicy )
     
     def listBackendGroups( self ) -> list[dict[backendgroup.Backendgroup]]:
         """ Return sorted list of backend groups. """
-        if self._backendgroups == None:
-            self.getBackendGroups()
+        self._ensureLoaded( 'backendgroups' )
         return self._listSorted( self._backendgroups )
     
     def listCertificates( self ) -> list[dict[certificate.Certificate]]:
         """ Return sorted list of SSL/TLS certificates. """
-        if self._certs == None:
-            self.getCertificates()
+        self._ensureLoaded( 'certs' )
         return self._listSorted( self._certs )
     
     def listJWKS( self ) -> list[dict[jwks_object.JWKS]]:
         """ Return sorted list of JSON Web Token Key Sets. """
-        if self._jwks == None:
-            self.getJWKS()
+        self._ensureLoaded( 'jwks' )
         return self._listSorted( self._jwks )
     
     def listOpenAPI( self ) -> list[dict[openapi_object.OpenAPI]]:
         """ Return sorted list of OpenAPI documents. """
-        if self._openapi == None:
-            self.getOpenAPI()
+        self._ensureLoaded( 'openapi' )
         return self._listSorted( self._openapi )
     
     def listGraphQL( self ) -> list[dict[graphql_object.GraphQL]]:
         """ Return sorted list of GraphQL documents. """
-        if self._graphql == None:
-            self.getGraphQL()
+        self._ensureLoaded( 'graphql' )
         return self._listSorted( self._graphql )
     
     def listHostNames( self ) -> list[dict[host.Host]]:
         """ Return sorted list of Host documents. """
-        if self._hostnames == None:
-            self.getHostNames()
+        self._ensureLoaded( 'hostnames' )
         return self._listSorted( self._hostnames )
     
     def listICAP( self ) -> list[dict[icap_object.ICAP]]:
         """ Return sorted list of ICAP environments. """
-        if self._icap == None:
-            self.getICAP()
+        self._ensureLoaded( 'icap' )
         return self._listSorted( self._icap )
     
     def listIPLists( self ) -> list[dict[iplist.IPList]]:
         """ Return sorted list of IP lists. """
-        if self._iplists == None:
-            self.getIPLists()
+        self._ensureLoaded( 'iplists' )
         return self._listSorted( self._iplists, key='name' )
         # return sorted( self._iplists.items(), key=internal.itemgetter_lc_1 )
     
     def listNetworkEndpoints( self ) -> list[dict[network_endpoint.NetworkEndpoint]]:
         """ Return sorted list of Network Endpoints. """
-        if self._network_endpoints == None:
-            self.getNetworkEndpoints()
+        self._ensureLoaded( 'network_endpoints' )
         return self._listSorted( self._network_endpoints )
     
     def listKerberos( self ) -> list[dict[kerberos_object.Kerberos]]:
         """ Return sorted list of Network Endpoints. """
-        if self._kerberos == None:
-            self.getKerberos()
+        self._ensureLoaded( 'kerberos' )
         return self._listSorted( self._kerberos )
     
     def listTemplates( self ):
         """ Return sorted list of mapping templates. """
-        if self._templates == None:
-            self.getTemplates()
+        self._ensureLoaded( 'templates' )
         return self._listSorted( self._templates, key='name' )
         # return sorted( self._templates.items(), key=internal.itemgetter_lc_0 )
     
     def listLabels( self ):
         """ Return sorted list of labels assigned to any mapping. """
-        if self._mappings == None:
+        self._ensureLoaded( 'mappings' )
+        return sorted( self._elementIndex( mapping.TYPENAME ).keys( index.LABEL_NAME ))
+    
+    def findIndexed( self, type_name: str, index_name: str, key ) -> list[element.BaseElement]:
+        """ Return loaded elements of 'type_name' with 'key' in secondary index 'index_name', e.g. index.NAME """
+        collection = self._changeSetKey( type_name )
+        if collection == None:
             return []
-        s = set()
-        for m in self._mappings.values():
-            s = s.union( set( m.attrs['labels'] ))
-        return sorted( s )
-        # r = []
-        # for m in self._mappings.values():
-        #     r.extend( [x for x in m.attrs['labels']] )
-        # r.sort()
-        # i = 1
-        # while i < len(r):
-        #     if r[i] == r[i-1]:
-        #         del r[i]
-        #         continue
-        #     i += 1
-        # return r
+        return self._elementIndex( collection ).lookup( index_name, key )
+    
+    def findMappingsByLabel( self, label: str ) -> list[mapping.Mapping]:
+        """ Return mappings with label 'label', ignoring case. """
+        self._ensureLoaded( 'mappings' )
+        return self.findIndexed( mapping.TYPENAME, index.LABEL, label.lower() )
+    
+    def findMappingsByEntryPath( self, path: str ) -> list[mapping.Mapping]:
+        """ Return mappings with entry path 'path'. """
+        self._ensureLoaded( 'mappings' )
+        return self.findIndexed( mapping.TYPENAME, index.ENTRY_PATH, path )
+    
+    def findVHostsByHostname( self, hostname: str ) -> list[vhost.VirtualHost]:
+        """ Return virtual hosts with host name 'hostname'. """
+        self._ensureLoaded( 'vhosts' )
+        return self.findIndexed( vhost.TYPENAME, index.HOSTNAME, hostname )
+    
+    def table( self, kind: str, paths: list[str]=None ) -> table.Table:
+        """
+        Return attributes 'paths' of all elements of 'kind' (e.g. 'Mapping' or 'mapping') as columnar table.
+
+        Columns 'id' and 'name' are always included. Requires NumPy, see airscript.base.table.
+        """
+        type_name = self._typeName( kind )
+        key = self._changeSetKey( type_name ) if type_name != None else None
+        if key == None:
+            self._log.error( f"Unknown element kind '{kind}'" )
+            return None
+        self._ensureLoaded( COLLECTION_OF_TYPE.get( type_name, key ))
+        return table.Table.fromElements( query.Query().execute( self.objects[key] ), paths or [] )
+    
+    def explain( self, kind: str, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None ) -> str:
+        """
+        Describe how e.g. .mappings() finds elements of 'kind' (e.g. 'Mapping' or 'mapping') matching the parameters,
+        using an index or by scanning all elements.
+        """
+        type_name = self._typeName( kind )
+        key = self._changeSetKey( type_name ) if type_name != None else None
+        if key == None:
+            self._log.error( f"Unknown element kind '{kind}'" )
+            return None
+        self._ensureLoaded( COLLECTION_OF_TYPE.get( type_name, key ))
+        return internal.itemExplain( self.objects[key], id=id, name=name, ids=ids, filter=filter, elements=self._elementIndex( key ))
     
     def findBackendgroup( self, name, criteria=None ):
         """ Return list of backend groups whose name contains 'name'. """
-        if self._backendgroups == None:
-            self.getBackendGroups()
+        self._ensureLoaded( 'backendgroups' )
         if criteria == None:
-            return [ self._findByName( self._backendgroups, name ) ]
+            return [ self._findByName( backendgroup.TYPENAME, name ) ]
         self._log.warning( "Criteria search not implemented yet" )
         return None
         
     def findCertificate( self, name, criteria=None ):
         """ Return list of SSL/TLS certificates whose name contains 'name'. """
-        if self._certs == None:
-            self.getCertificates()
+        self._ensureLoaded( 'certs' )
         if criteria == None:
-            return [ self._findByName( self._certs, name ) ]
+            return [ self._findByName( certificate.TYPENAME, name ) ]
         self._log.warning( "Criteria search not implemented yet" )
         return None
         
     def findGraphQL( self, name, criteria=None ):
         """ Return list of GraphQL documents whose name contains 'name'. """
-        if self._graphql == None:
-            self.getGraphQL()
+        self._ensureLoaded( 'graphql' )
         if criteria == None:
-            return [ self._findByName( self._graphql, name ) ]
+            return [ self._findByName( graphql_object.TYPENAME, name ) ]
         self._log.warning( "Criteria search not implemented yet" )
         return None
         
     def findIPList( self, name, criteria=None ):
         """ Return list of IP lists whose name contains 'name'. """
-        if self._iplists == None:
-            self.getIPLists()
+        self._ensureLoaded( 'iplists' )
         if criteria == None:
-            return [ self._findByName( self._iplists, name ) ]
+            return [ self._findByName( iplist.TYPENAME, name ) ]
         self._log.warning( "Criteria search not implemented yet" )
         return None
         
     def findJWKS( self, name, criteria=None ):
         """ Return list of JSON Web Token Key Sets whose name contains 'name'. """
-        if self._jwks == None:
-            self.getJWKS()
+        self._ensureLoaded( 'jwks' )
         if criteria == None:
-            return [ self._findByName( self._jwks, name ) ]
+            return [ self._findByName( 'jwks', name ) ]
         self._log.warning( "Criteria search not implemented yet" )
         return None
         
     def findMapping( self, name, criteria=None ):
         """ Return list of mappings whose name contains 'name'. """
-        if self._mappings == None:
-            self.getMappings()
+        self._ensureLoaded( 'mappings' )
         if criteria == None:
-            return [ self._findByName( self._mappings, name ) ]
+            return [ self._findByName( mapping.TYPENAME, name ) ]
         self._log.warning( "Criteria search not implemented yet" )
         return None
         
     def findOpenAPI( self, name, criteria=None ):
         """ Return list of OpenAPI documents whose name contains 'name'. """
-        if self._openapi == None:
-            self.getOpenAPI()
+        self._ensureLoaded( 'openapi' )
         if criteria == None:
-            return [ self._findByName( self._openapi, name ) ]
+            return [ self._findByName( openapi_object.TYPENAME, name ) ]
         self._log.warning( "Criteria search not implemented yet" )
         return None
         
     def findVHost( self, name, criteria=None ):
         """ Return list of virtual hosts whose name contains 'name'. """
-        if self._vhosts == None:
-            self.getVHosts()
+        self._ensureLoaded( 'vhosts' )
         if criteria == None:
-            return [ self._findByName( self._vhosts, name ) ]
+            return [ self._findByName( vhost.TYPENAME, name ) ]
         self._log.warning( "Criteria search not implemented yet" )
         return None
         
@@ -1675,6 +2067,7 @@ class Configuration( object ):
             'routes': {},
             vhost.TYPENAME: {},
         }
+        self._indexes = {}
         self._apipolicy = self.objects[api_policy.TYPENAME]
         self._anomalyshield_applications = self.objects[anomalyshield_application.TYPENAME]
         self._anomalyshield_rules = self.objects[anomalyshield_rule.TYPENAME]
@@ -1707,6 +2100,9 @@ class Configuration( object ):
             'templates': {},
         }
         self._templates = self._settings['templates']
+        self._timings = {}
+        self._fetched = set()
+        self._changed = {}
     
     def _listSorted( self, list_of_dicts: list[dict], key: str='id' ):
         if not type( list_of_dicts ) == dict:
@@ -1726,28 +2122,424 @@ class Configuration( object ):
                 self.getObjects( obj.getTypeName() )[None].append( obj )
             except KeyError:
                 self.getObjects( obj.getTypeName() )[None] = [obj]
+        key = self._changeSetKey( obj.getTypeName() )
+        if key != None:
+            self._elementIndex( key ).update( obj )
         return obj
     
-    def _findByName( self, objects, name ) -> element.ModelElement:
-        for k,v in objects.items():
-            if k:
-                v = [v]
-            for item in v:
-                if item.isDeleted():
-                    continue
-                if item.name == name:
-                    return objects[k]
-                # elif name in item.name:
-                #     r.append( objects[k] )
-        return None
+    def _inWorkspace( self ) -> bool:
+        """ False if another configuration has been loaded into the gateway's workspace since this one """
+        with _workspace_lock:
+            loaded = _workspace.get( self.conn )
+        return loaded == None or loaded() is self
+    
+    def _ensureLoaded( self, *keys: str ):
+        """
+        Load collections on first access, e.g. by .mappings().
+
+        Collections referenced by relationships of the loaded elements are fetched as well, one level deep,
+        so that related elements carry their data instead of being mere references.
+        Collections are fetched only while this configuration is loaded into the gateway's workspace, see load():
+        loading it implicitly would replace another configuration loaded before, including its unsaved changes.
+        """
+        missing = [key for key in keys if key not in self._fetched]
+        if missing == [] or self.conn == None or self.id in ['new', 'empty']:
+            return
+        if self._loaded == False:
+            # loading would replace the gateway's workspace, possibly discarding unsaved changes
+            self._log.warning( f"Configuration {self.id} not loaded on '{self.gateway}' - use .load() or .loadAll() first" )
+            return
+        workers = self.runtimeConfigGet( 'airscript.load.workers' )
+        raw = self._fetchCollections( missing, workers )
+        related = set()
+        for key in missing:
+            related |= self._relatedCollections( raw[key][0] )
+        raw.update( self._fetchCollections( [key for key in related if key not in self._fetched and key not in raw], workers ))
+        # build in load order, resulting in the same object graph as getAll()
+        with self._relationshipPhase():
+            for key in COLLECTIONS.keys():
+                if key in raw:
+                    self._buildCollectionTimed( key, *raw[key] )
+    
+    def _typeName( self, name: str ) -> str:
+        """ Return type name for kind, type name or collection name """
+        if name in COLLECTION_OF_TYPE or name in COLLECTIONS:
+            return name
+        return lookup.get( element.LOOKUP_KIND2TYPENAME, name )
+    
+    def _typeCollections( self, type_names: list[str] ) -> list[str]:
+        """ Return collections holding 'type_names', in load order """
+        keys = set( COLLECTION_OF_TYPE.get( name, name ) for name in type_names )
+        return [key for key in COLLECTIONS.keys() if key in keys]
+    
+    def _loadCollections( self, keys: list[str], workers: int=None ):
+        """ Fetch collections, concurrently with 'workers' > 1, and build them in load order """
+        fetched = self._fetchCollections( keys, workers )
+        with self._relationshipPhase():
+            for key in COLLECTIONS.keys():
+                if key in fetched:
+                    self._buildCollectionTimed( key, *fetched[key] )
+    
+    def _relatedCollections( self, raw: list ) -> set[str]:
+        r = set()
+        for entries in raw:
+            if not isinstance( entries, list ):
+                continue
+            for entry in entries:
+                for d in entry.get( 'relationships', {} ).values():
+                    data = d.get( 'data' )
+                    if not isinstance( data, list ):
+                        data = [data]
+                    for item in data:
+                        if item and item.get( 'type' ) in COLLECTION_OF_TYPE:
+                            r.add( COLLECTION_OF_TYPE[item['type']] )
+        return r
+    
+    def _fetchCollections( self, keys: list[str], workers: int=None ) -> dict[str, tuple[list, float]]:
+        """ Fetch collections, concurrently with 'workers' > 1. Returns REST API data and fetch time per collection. """
+        if workers == None or workers <= 1 or len( keys ) <= 1:
+            return { key: self._fetchCollectionTimed( key ) for key in keys }
+        with concurrent.futures.ThreadPoolExecutor( max_workers=workers ) as pool:
+            futures = { key: pool.submit( self._fetchCollectionTimed, key ) for key in keys }
+            return { key: future.result() for key, future in futures.items() }
     
-    def _orderTypes( self ):
-        self._ordered_types = {}
-        idx = 0
-        for k in self.objects.keys():
+    def _loadCollection( self, key: str, keep: dict=None ):
+        with self._relationshipPhase():
+            if self._streaming() and self._streamCollection( key, keep ):
+                return
+            self._buildCollections( [(key, self._fetchCollectionTimed( key ))], keep )
+    
+    def _streaming( self ) -> bool:
+        return self.conn != None and self.runtimeConfigGet( 'airscript.load.streaming', False ) == True
+    
+    def _streamCollection( self, key: str, keep: dict=None ) -> bool:
+        """
+        Build elements of a collection while receiving the REST API response, one entry at a time.
+        Falls back to regular reads if the response cannot be streamed, entries already built are skipped.
+        Returns False for collections which are not streamed.
+        """
+        collection = COLLECTIONS[key]
+        if 'settings' in collection:
+            return False
+        start = time.perf_counter()
+        raw = []
+        for api, add_method, params in collection['sources']:
+            func = getattr( self, add_method )
+            path = collection['path'] if 'path' in collection else f"/configuration/{getattr( self.conn, api ).ELEMENT_PATH}"
+            kept = [] if keep != None else None
+            built = set()
             try:
-                self._ordered_types[RELATIONSHIP_ORDER[k]] = k
-            except KeyError:
-                self._ordered_types[idx] = k
-                idx += 1
+                for entry in jsonstream.streamData( self.conn, path ):
+                    if kept != None:
+                        kept.append( copy.deepcopy( entry ))
+                    built.add( entry.get( 'id' ))
+                    self._buildEntry( func, entry, params )
+            except jsonstream.StreamError as e:
+                self._log.verbose( f"Streaming '{path}' failed after {len( built )} entries, reading it at once: {e}" )
+                entries = self._fetchSource( collection, api )
+                if kept != None:
+                    kept = copy.deepcopy( entries )
+                for entry in entries:
+                    if not entry.get( 'id' ) in built:
+                        self._buildEntry( func, entry, params )
+            raw.append( kept )
+        if keep != None:
+            keep[key] = raw
+        self._fetched.add( key )
+        elapsed = time.perf_counter() - start
+        self._timings[key] = { 'stream': elapsed }
+        self._log.verbose( f"- {collection['label']} ({elapsed:.2f}s streamed)" )
+        return True
+    
+    def _buildCollections( self, results, keep: dict=None ):
+        """ Build collections from iterable of (key, (raw, fetch time)), copying the raw data to 'keep' unless None """
+        for key, (raw, elapsed) in results:
+            if keep != None:
+                keep[key] = copy.deepcopy( raw )
+            self._buildCollectionTimed( key, raw, elapsed )
+    
+    def _fetchCollectionTimed( self, key: str ) -> tuple[list, float]:
+        start = time.perf_counter()
+        raw = self._fetchCollection( key )
+        return ( raw, time.perf_counter() - start )
+    
+    def _buildCollectionTimed( self, key: str, raw: list, fetched: float ):
+        start = time.perf_counter()
+        self._buildCollection( key, raw )
+        built = time.perf_counter() - start
+        self._timings[key] = { 'fetch': fetched, 'build': built }
+        self._log.verbose( f"- {COLLECTIONS[key]['label']} ({fetched:.2f}s fetch, {built:.2f}s build)" )
+    
+    def _fetchCollection( self, key: str ) -> list:
+        """ Retrieve REST API data of a collection, one entry per source. Safe to be called from worker threads. """
+        collection = COLLECTIONS[key]
+        return [self._fetchSource( collection, api ) for api, _, _ in collection['sources']]
+    
+    def _fetchSource( self, collection: dict, api: str ) -> list|dict:
+        if 'path' in collection:
+            resp = self.conn.get( collection['path'] )
+            if resp.text == "":
+                return []
+            return resp.json()['data']
+        return getattr( self.conn, api ).read()
+    
+    def _buildCollection( self, key: str, raw: list ):
+        """ Create elements of a collection from data retrieved by _fetchCollection() """
+        collection = COLLECTIONS[key]
+        self._fetched.add( key )
+        if 'settings' in collection:
+            category, cls = collection['settings']
+            self._settings[category] = cls( self, obj=raw[0] )
+            return
+        for (_, add_method, params), entries in zip( collection['sources'], raw ):
+            func = getattr( self, add_method )
+            for entry in entries:
+                self._buildEntry( func, entry, params )
+    
+    def deferRelationships( self, elem: element.ModelElement, relationships: dict ) -> bool:
+        """ Queue relationships of an element being loaded, returns False if they must be resolved right away """
+        if self._pending_rels == None:
+            return False
+        self._pending_rels.append( (elem, relationships) )
+        return True
+    
+    @contextlib.contextmanager
+    def _relationshipPhase( self ):
+        """
+        Build elements without resolving their relationships, then wire all relationships in one pass.
+        
+        Referenced elements are looked up in an index of all loaded elements,
+        placeholders are only created for references to elements not loaded (yet).
+        """
+        if self._pending_rels != None:
+            yield
+            return
+        self._pending_rels = []
+        try:
+            yield
+        finally:
+            pending = self._pending_rels
+            self._pending_rels = None
+            self._resolveRelationships( pending )
+    
+    def _resolveRelationships( self, pending: list ):
+        if pending == []:
+            return
+        known = {}
+        for objects in list( self.objects.values() ) + [self._templates]:
+            for obj in objects.values():
+                if isinstance( obj, element.BaseElement ):
+                    known[(obj.getTypeName(), obj.id)] = obj
+        for elem, relationships in pending:
+            for reltype, d in relationships.items():
+                items = d['data'] if isinstance( d['data'], list ) else [d['data']]
+                for item in items:
+                    if item == None:
+                        continue
+                    key = (item['type'], element_helpers.extractId( item ))
+                    try:
+                        obj = known[key]
+                    except KeyError:
+                        obj = self.addElement( key[0], id=key[1] )
+                        known[key] = obj
+                    elem._linkRel( reltype, obj )
+            elem._rels_modified = False
+    
+    def _buildEntry( self, func, entry: dict, params: dict ):
+        self._addElement2ObjectMap( func( id=element_helpers.extractId( entry ), data=entry, **params ))
+    
+    def _snapshotCacheable( self ) -> bool:
+        return self.conn != None and self.id not in ['new', 'empty'] and self._snapshots != None
+    
+    def _snapshotLoad( self ) -> bool:
+        """ Build all collections from snapshot cache, returns False if not cached """
+        if not self._snapshotCacheable():
+            return False
+        start = time.perf_counter()
+        snap = self._snapshots.load( self.conn.getName(), self.id, self.createdAt, self.conn.getVersion() )
+        if snap == None or set( snap['collections'].keys() ) != set( COLLECTIONS.keys() ):
+            return False
+        self._log.verbose( f"Using cached snapshot of configuration {self.id}" )
+        self._snapshotBuild( snap, time.perf_counter() - start )
+        return True
+    
+    def _snapshotBuild( self, snap: dict, fetched: float=0.0 ):
+        with self._relationshipPhase():
+            for key in COLLECTIONS.keys():
+                if key in snap['collections']:
+                    self._buildCollectionTimed( key, snap['collections'][key], fetched )
+                    fetched = 0.0
+    
+    def _snapshotCreate( self, collections: dict ) -> dict:
+        return snapshot.create( self.conn.getName(), self.conn.getVersion(), self.id, self.createdAt, collections,
+                                comment=self.comment, config_type=self.type )
+    
+    def _snapshotStore( self, collections: dict ):
+        if collections == None or not self._snapshotCacheable() or set( collections.keys() ) != set( COLLECTIONS.keys() ):
+            return
+        self._snapshots.store( self._snapshotCreate( collections ))
+    
+    def _syncBegin( self ):
+        self._sync_errors = {}
+        self._sync_active = True
+    
+    def _syncEnd( self ) -> bool:
+        self._sync_active = False
+        if self._sync_errors:
+            self._log.error( f"Sync failed for {len( self._sync_errors )} elements - list using .syncErrors()" )
+            return False
+        return True
+    
+    def _syncTier( self, tier: syncplan.SyncTier, run ):
+        """ Execute operations of one tier, 'run' executes a list of element and operations and returns success per element """
+        failed = set()
+        for phase in [syncplan.PHASE_ELEMENTS, syncplan.PHASE_CONNECTIONS]:
+            groups = [(item, ops) for item, ops in tier.phase( phase ) if item not in failed]
+            failed.update( item for (item, _), ok in zip( groups, run( groups )) if not ok )
+        self._syncTierFinish( tier, failed )
+    
+    def _syncTierFinish( self, tier: syncplan.SyncTier, failed: set ):
+        for item in tier.elements:
+            if item not in failed:
+                item._syncFinish()
+        for element_type in tier.element_types:
+            self._syncCleanup( element_type, tier.elementsOf( element_type ))
+    
+    def _syncOperations( self, item: element.BaseElement, operations: list[syncplan.SyncOperation] ) -> bool:
+        """ Execute operations of one element in order, stops at first error """
+        try:
+            for op in operations:
+                self.syncOperation( op )
+        except (exception.AirlockError, requests.exceptions.RequestException) as e:
+            self.recordSyncError( item, f"Sync error for {item.getTypeName()}:{item.name} - {type( e ).__name__} {e}" )
+            return False
+        return True
+    
+    @contextlib.contextmanager
+    def _syncJournal( self, path: str=None ):
+        """ Activate sync journal for the duration of the context, removed if all changes have been uploaded """
+        if self._journal != None:
+            # nested, e.g. sync() called by declarativeImport()
+            yield self._journal
+            return
+        self._journal = journal.fromConfig( self._airscript_config, path )
+        if self._journal == None:
+            yield None
+            return
+        self._journal_path = self._journal.path
+        completed = False
+        try:
+            yield self._journal
+            completed = not self._sync_errors
+        finally:
+            if completed:
+                self._journal.remove()
+                self._journal_path = None
+            else:
+                self._journal.close()
+                self._log.error( f"Sync incomplete - resume using .resumeSync(), journal: {self._journal_path}" )
+            self._journal = None
+    
+    def _isTransient( self, e: Exception ) -> bool:
+        """ Error caused by temporary condition, request is retried """
+        if isinstance( e, exception.AirlockNoSessionError ):
+            return False
+        return isinstance( e, (exception.AirlockServerError, exception.AirlockCommunicationError,
+                               requests.exceptions.ConnectionError, requests.exceptions.Timeout) )
+    
+    def _recoverOperation( self, op: syncplan.SyncOperation ) -> bool|None:
+        """ Check if non-idempotent 'op' with unknown outcome has been performed: True if so, False if not, None if unknown """
+        try:
+            found = op.recover()
+        except (exception.AirlockError, requests.exceptions.RequestException) as e:
+            self._log.warning( f"{op}: lookup failed - {type( e ).__name__} {e}" )
+            return None
+        if found:
+            self._log.info( f"{op}: already performed by Airlock Gateway" )
+        return found
+    
+    def _syncDependencies( self, operations: list[syncplan.SyncOperation] ) -> list[str]:
+        """ Return collections whose elements must be created before 'operations' connect to them """
+        r = []
+        for op in operations:
+            if op.action != "connect":
+                continue
+            for ref in op.references:
+                if ref.id == None:
+                    key = self._changeSetKey( ref.getTypeName() )
+                    if key != None:
+                        r.append( key )
+        return r
+    
+    def _syncItems( self, element_type: str ) -> list[element.BaseElement]:
+        """ Return changed elements of collection 'element_type' """
+        objects = self.objects[element_type]
+        return [item for item in self._changed.get( element_type, {} ) if self._isRegistered( objects, item )]
+    
+    def _syncCleanup( self, element_type: str, items: list[element.BaseElement] ):
+        objects = self.objects[element_type]
+        changed = self._changed.get( element_type, {} )
+        # new objects received their id while sync'ing
+        failed = []
+        for item in list( objects.get( None, [] )):
+            if item.id:
+                self._addElement2ObjectMap( item )
+            elif not item.isDeleted():
+                # creation failed, retried by next sync
+                failed.append( item )
+        # remove deleted objects
+        print( f"Removing deleted objects: {element_type}" )
+        objects.pop( None, None )
+        if failed:
+            objects[None] = failed
+        elements = self._elementIndex( element_type )
+        for item in items:
+            # names and attributes may have been updated by Airlock Gateway
+            elements.update( item )
+            if item.isDeleted() and item.id != None and objects.get( item.id ) is item:
+                del objects[item.id]
+            if item.isDeleted() or not self._isPending( item ):
+                changed.pop( item, None )
+    
+    def _isRegistered( self, objects: dict, item: element.BaseElement ) -> bool:
+        if item.id != None and objects.get( item.id ) is item:
+            return True
+        return any( x is item for x in objects.get( None, [] ))
+    
+    def _isPending( self, item: element.BaseElement ) -> bool:
+        if item._attrs_modified:
+            return True
+        return isinstance( item, element.ModelElement ) and item._rels_modified
+    
+    def _changeSetKey( self, type_name: str ) -> str:
+        """ Return key of self.objects holding elements of 'type_name', None if elements are not sync'ed """
+        if type_name in self.objects:
+            return type_name
+        if type_name in ["local-json-web-key-set", "remote-json-web-key-set"]:
+            return 'jwks'
+        if type_name in ["route-ipv4-destination", "route-ipv6-destination", "route-ipv4-source", "route-ipv6-source"]:
+            return 'routes'
+        return None
+    
+    def _findByName( self, type_name: str, name ) -> element.ModelElement:
+        key = self._changeSetKey( type_name )
+        if key == None:
+            return None
+        return self._elementIndex( key ).first( index.NAME, name )
+    
+    def _elementIndex( self, key: str ) -> index.ElementIndex:
+        """ Return secondary indexes of collection self.objects[key] """
+        try:
+            return self._indexes[key]
+        except KeyError:
+            self._indexes[key] = index.ElementIndex()
+            return self._indexes[key]
+    
+    def _collectionOrder( self ) -> list[str]:
+        """ Return keys of self.objects in relationship order """
+        return sorted( self.objects.keys(), key=lambda k: (self._collectionOrderNr( k ), k) )
+    
+    def _collectionOrderNr( self, key: str ) -> int:
+        """ Relationship order of collection self.objects[key], the first of its element types for jwks and routes """
+        return min( [self.elementOrderNr( type_name ) for type_name in ELEMENT_CLASSES if self._changeSetKey( type_name ) == key] or [0] )
         
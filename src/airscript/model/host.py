@@ -29,9 +29,8 @@ KIND = 'Host'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class Host( element.ModelElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'hosts'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'hosts'
+    _kind = KIND
     
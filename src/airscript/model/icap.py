@@ -29,9 +29,8 @@ KIND = 'ICAPEnvironment'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class ICAP( element.ModelElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'icap-environments'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'icap-environments'
+    _kind = KIND
     
@@ -30,13 +30,12 @@ KIND = 'IPList'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class IPList( element.ModelElement ):
-    RELATIONKEY = { "ip-address-list": None }
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'ip-address-lists'
+    _kind = KIND
     
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'ip-address-lists'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    RELATIONKEY = { "ip-address-list": None }
     
     def me( self ):
         r = super().me()
@@ -33,7 +33,10 @@ lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME,
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, LOCAL_TYPENAME, LOCAL_KIND )
 
 class JWKS( element.ModelElement ):
+    # type depends on remote resp. local key set
+    __slots__ = ( '_remote', '_typename', '_path', '_kind' )
     RELATIONKEY = { "mapping": "mappings" }
+    REFERENCED_BY = ( "mapping", )
     
     def __init__( self, parent, obj=None, id=None, remote=True ):
         self._remote = remote
@@ -30,11 +30,10 @@ KIND = 'KerberosEnvironment'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class Kerberos( element.ModelElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'kerberos-environments'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'kerberos-environments'
+    _kind = KIND
     
     """
     interactions with Gateway REST API
@@ -18,7 +18,7 @@ along with this program; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 """
 
-from airscript.base import element
+from airscript.base import element, index
 from airscript.utils import output
 from airscript.model import backendgroup, configuration, mapping, openapi, template, vhost
 from pyAirlock.common import lookup
@@ -31,6 +31,11 @@ lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME,
 
 
 class Mapping( element.ModelElement ):
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'mappings'
+    _kind = KIND
+    
     RELATIONKEY = { "virtual-host": "virtual-hosts",
                     "back-end-group": "back-end-groups",
                     "remote-json-web-key-set": "remote-json-web-key-sets",
@@ -43,12 +48,6 @@ class Mapping( element.ModelElement ):
                     "mapping-template": "template"
                 }
 
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'mappings'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
-    
     def me( self ):
         r = super().me()
         if self.name != None:
@@ -65,6 +64,15 @@ class Mapping( element.ModelElement ):
         tmp.append( self.attrs['labels'] )
         return tmp
     
+    def indexKeys( self ) -> dict[str, list]:
+        r = super().indexKeys()
+        labels, path = self.getMany( ['labels', 'entryPath.value'] )
+        r[index.LABEL] = [label.lower() for label in labels or []]
+        r[index.LABEL_NAME] = list( labels or [] )
+        if path != None:
+            r[index.ENTRY_PATH] = [path]
+        return r
+    
     """
     attribute operations
     """
@@ -29,9 +29,8 @@ KIND = 'AllowedNetworkEndpoint'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class NetworkEndpoint( element.ModelElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'allowed-network-endpoints'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'allowed-network-endpoints'
+    _kind = KIND
     
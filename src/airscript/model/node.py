@@ -30,12 +30,10 @@ KIND = 'GatewayClusterNode'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class Node( element.ModelElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'nodes'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
-    
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'nodes'
+    _kind = KIND
     def loadData( self, data: dict, update: bool=False ):
         super().loadData( data, update=update )
         self.name = self.attrs['hostName']
@@ -19,7 +19,7 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 """
 
 from airscript.utils import output
-from airscript.base import element
+from airscript.base import element, observed, syncplan
 from airscript.model import configuration, mapping
 from pyAirlock.common import lookup
 
@@ -30,17 +30,17 @@ KIND = 'OpenAPIDocument'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class OpenAPI( element.ModelElement ):
-    RELATIONKEY = { "mapping": "mappings" }
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'api-security/openapi-documents'
+    _kind = KIND
     
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'api-security/openapi-documents'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
+    RELATIONKEY = { "mapping": "mappings" }
+    REFERENCED_BY = ( "mapping", )
     
     def getAttrs( self ):
         r = super().getAttrs()
-        r['content'] = self._parent.conn.openapi.download( self.id )
+        observed.assign( r, 'content', self._parent.conn.openapi.download( self.id ))
         return r
     
     """
@@ -58,35 +58,14 @@ class OpenAPI( element.ModelElement ):
             return False
         return self.relationshipDelete( mapping_object )
     
-    def sync( self ) -> bool:
-        """
-        Sync changes to current object to Airlock Gateway
-        - Set all attributes
-
-        Returns:
-        - true: success, sync'ed
-        - false: delete element
-        """
-        if not ('U' in self._operations or 'C' in self._operations):
-            return False
-        classPointer = self._parent.conn.getAPI( self._typename )
-        if classPointer == None:
-            return False
-        if self._deleted:
-            classPointer.delete( self.id )
-            return False
-        if self._attrs_modified:
-            try:
-                content = self.attrs['content']
-                del self.attrs['content']
-            except KeyError:
-                content = None
-            if self.id:
-                self.loadData( classPointer.update( self.id, data=self.datafy() ))
-            else:
-                self.loadData( classPointer.create( data=self.datafy() ))
-            if content:
-                self._parent.conn.openapi.upload( self.id, content )
-            self._attrs_modified = False
-        return self._syncRelationships()
+    def _planAttributes( self, classPointer, attrs: dict=None ) -> list[syncplan.SyncOperation]:
+        """ Document content is not an attribute but uploaded separately """
+        if attrs == None:
+            attrs = self.attrs
+        content = attrs.get( 'content' )
+        ops = super()._planAttributes( classPointer, attrs={k: v for k, v in attrs.items() if k != 'content'} )
+        if content:
+            ops.append( syncplan.SyncOperation( "upload", self, "PUT", self._syncPath( classPointer, "content" ), payload=content,
+                                                execute=lambda: self._parent.conn.openapi.upload( self.id, content )))
+        return ops
     
@@ -38,6 +38,9 @@ lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME,
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME_SRC_V6, KIND_SRC_V6 )
 
 class Route( element.ModelElement ):
+    # type depends on IP version and direction
+    __slots__ = ( '_ipv4', '_source', '_typename', '_path', '_kind' )
+    
     def __init__( self, parent, obj=None, id=None, ipv4=True, source=True ):
         self._ipv4 = ipv4
         self._source = source
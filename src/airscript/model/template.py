@@ -29,12 +29,10 @@ KIND = 'MappingTemplate'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class Template( element.BaseElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'templates/mappings'
-        self._kind = KIND
-        element.BaseElement.__init__( self, parent, obj=obj, id=id )
-    
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'templates/mappings'
+    _kind = KIND
     def __repr__( self ):
         if self.id != None:
             return str( { 'id': self.id } )
@@ -23,14 +23,12 @@ from airscript.model import configuration
 
 
 class Validator( element.BaseElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = 'validator-message'
-        self._path = ''
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
-    
+    __slots__ = ()
+    _typename = 'validator-message'
+    _path = ''
     def me( self ):
         r = super().me()
-        del r['name']
+        r.pop( 'name', None )
         r['severity'] = self.attrs['meta']['severity']
         r['code'] = self.attrs['code']
         r['object'] = "{} {}".format( self.attrs['meta']['model']['type'], self.attrs['meta']['model']['id'] )
@@ -18,7 +18,7 @@ along with this program; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 """
 
-from airscript.base import element
+from airscript.base import element, index
 from airscript.utils import output
 from airscript.model import certificate, configuration
 from pyAirlock.common import lookup
@@ -30,14 +30,14 @@ KIND = 'VirtualHost'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class VirtualHost( element.ModelElement ):
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'virtual-hosts'
+    _kind = KIND
+    
     RELATIONKEY = { "mapping": "mappings", "ssl-certificate": "ssl-certificate" }
+    REFERENCED_BY = ( "mapping", )
 
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'virtual-hosts'
-        self._kind = KIND
-        element.ModelElement.__init__( self, parent, obj=obj, id=id )
-    
     def me( self ):
         r = super().me()
         try:
@@ -61,6 +61,13 @@ class VirtualHost( element.ModelElement ):
         except KeyError:
             return None
 
+    def indexKeys( self ) -> dict[str, list]:
+        r = super().indexKeys()
+        hostname = self.getMany( ['hostName'] )[0]
+        if hostname != None:
+            r[index.HOSTNAME] = [hostname]
+        return r
+    
     """
     attribute setting
     """
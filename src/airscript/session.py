@@ -17,9 +17,12 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 
+import asyncio
+
 from airscript.model import configuration
 from airscript.utils import internal
 from airscript.utils import cache
+from airscript.utils import connpool
 from pyAirlock import gateway
 from pyAirlock.common import exception, log
 
@@ -86,7 +89,7 @@ class GatewaySession( object ):
             conn.setCertificate( certfile=self._cert['file'], pem=self._cert['pem'] )
         conn.setTLSVerify( self._tls_verify )
         try:
-            if conn.connect() == False:
+            if self._connect( conn ) == False:
                 return False
         except exception.AirlockConnectionError:
             return False
@@ -97,10 +100,29 @@ class GatewaySession( object ):
         self.session = conn
         return True
     
+    def _connect( self, conn: gateway.Session ) -> bool:
+        """ Create administrator session, its HTTP session then uses the shared connection pool unless disabled """
+        if conn.connect() == False:
+            return False
+        pool = self._pool()
+        if pool != None:
+            pool.attach( conn.session, self._gw.getHost() )
+        return True
+    
+    def _pool( self ) -> connpool.ConnectionPool:
+        try:
+            return connpool.fromConfig( self._run_info.config )
+        except AttributeError:
+            return connpool.fromConfig( None )
+    
     def disconnect( self ):
         """ Disconnect from Airlock Gateway, closing administrator session. """
         if self.session:
+            sess = self.session.session
             self.session.disconnect()
+            pool = self._pool()
+            if pool != None and sess != None:
+                pool.release( sess )
             self.session = None
         self._version = None
         self._nodename = None
@@ -139,9 +161,15 @@ class GatewaySession( object ):
         self.configs = {}
         resp = self.session.get( "/configuration/configurations" )
         for c in resp.json()['data']:
-            self.configs[c['id']] = configuration.Configuration( c, self.session, self._run_info.config )
+            self.configs[c['id']] = configuration.Configuration( c, self.session, self._run_info.config, load_types=self._loadTypes() )
         self._log.verbose( "%d configurations available - list using .configs or .listConfigs()" % (len( self.configs ),) )
     
+    def _loadTypes( self ) -> list[str]:
+        try:
+            return self._run_info.cmd.get_load_types()
+        except AttributeError:
+            return None
+    
     def listConfigurations( self ):
         """
         List all Airlock Gateway configurations.
@@ -173,6 +201,7 @@ class GatewaySession( object ):
             self.getConfigurations()
         self.session.post( "/configuration/configurations/load-empty-config", expect=[204] )
         self.configs['_new'] = configuration.Configuration( None, self.session, self._run_info.config )
+        configuration.workspaceLoaded( self.session, self.configs['_new'] )
         return self.configs['_new']
     
     def configurationImport( self, fname ):
@@ -230,4 +259,62 @@ class GatewaySession( object ):
         * offline
         """
         return self.session.failoverState()
+
+
+class AsyncGatewaySession( object ):
+    def __init__( self, sess: GatewaySession ):
+        """
+        Asynchronous wrapper for GatewaySession.
+
+        pyAirlock uses blocking REST API calls, this is not an asynchronous HTTP client: the calls are offloaded
+        to the event loop's default thread pool, see asyncio.to_thread(), whose size limits how many run at the same time.
+        This allows using Airlock Gateways from asyncio code without blocking the event loop, e.g.:
+
+            async def refresh( gw ):
+                sess = await gw.asession()
+                cfg = await sess.configurationFindActive()
+                await cfg.aloadAll()
+                return cfg
+            cfgs = await asyncio.gather( *[refresh( gw ) for gw in gws.values()] )
+        """
+        self._sess = sess
+    
+    def getName( self ) -> str:
+        """ Return short name. """
+        return self._sess.getName()
+    
+    def getSession( self ) -> GatewaySession:
+        """ Return synchronous session """
+        return self._sess
+    
+    @property
+    def configs( self ) -> dict:
+        return self._sess.configs
+    
+    async def connect( self, label: str=None ) -> bool:
+        """ Establish session with Airlock Gateway. """
+        return await asyncio.to_thread( self._sess.connect, label )
+    
+    async def disconnect( self ):
+        """ Disconnect from Airlock Gateway, closing administrator session. """
+        await asyncio.to_thread( self._sess.disconnect )
+    
+    async def getConfigurations( self ):
+        """ Retrieve all configurations from Airlock Gateway and store in attribute .configs """
+        await asyncio.to_thread( self._sess.getConfigurations )
+    
+    async def listConfigurations( self ):
+        """ List all Airlock Gateway configurations. """
+        return await asyncio.to_thread( self._sess.listConfigurations )
+    
+    async def configurationFindActive( self ):
+        """ Load all Airlock Gateway configurations and return the currently active one. """
+        return await asyncio.to_thread( self._sess.configurationFindActive )
+    
+    async def status( self ) -> dict:
+        """ Retrieve node status """
+        return await asyncio.to_thread( self._sess.status )
     
+    async def failoverState( self ):
+        """ Retrieve failover state """
+        return await asyncio.to_thread( self._sess.failoverState )
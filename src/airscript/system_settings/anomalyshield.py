@@ -28,13 +28,11 @@ KIND = 'AnomalyShield'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class AnomalyShieldSettings( element.BaseElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'anomaly-shield'
-        self._kind = KIND
-        self._operations = "RU"
-        element.BaseElement.__init__( self, parent, obj=obj, id=id )
-    
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'anomaly-shield'
+    _kind = KIND
+    _operations = "RU"
     def me( self ):
         r = super().me()
         r['enabled'] = self.attrs['enabled']
@@ -29,10 +29,9 @@ KIND = 'DynamicIPBlackListSettings'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class DynamicIPBlackListSettings( element.BaseElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'dynamic-ip-address-blacklist'
-        self._kind = KIND
-        self._operations = "RU"
-        element.BaseElement.__init__( self, parent, obj=obj, id=id )
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'dynamic-ip-address-blacklist'
+    _kind = KIND
+    _operations = "RU"
     
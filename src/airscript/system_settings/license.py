@@ -18,7 +18,7 @@ along with this program; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 """
 
-from airscript.base import element
+from airscript.base import element, syncplan
 from airscript.utils import templating
 from pyAirlock.common import lookup
 
@@ -29,13 +29,11 @@ KIND = 'License'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class License( element.BaseElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'license'
-        self._kind = KIND
-        self._operations = "RUD"
-        element.BaseElement.__init__( self, parent, obj=obj, id=id )
-    
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'license'
+    _kind = KIND
+    _operations = "RUD"
     def me( self ):
         r = super().me()
         r['owner'] = self.attrs['owner']
@@ -50,25 +48,18 @@ class License( element.BaseElement ):
         tmp.append( self.attrs['backendHosts'] )
         return tmp
         
-    def sync( self ) -> bool:
-        """
-        Sync license changes to Airlock Gateway
-
-        Returns:
-        - true: success, sync'ed
-        - false: operation failed
-        """
+    def planSync( self, plan: syncplan.SyncPlan=None ) -> list[syncplan.SyncOperation]:
+        """ Return REST API operations required to sync license changes to Airlock Gateway """
         classPointer = self._parent.conn.getAPI( self._typename )
         if classPointer == None:
-            return False
+            return []
         if self._deleted:
-            classPointer.delete( self.id )
-            return False
-        if self._attrs_modified:
-            data = { 'attributes': { 'license': self.attrs['rawLicense'] }, 'type': "license" }
-            self.loadData( classPointer.update( id=self.id, data=data ))
-            self._attrs_modified = False
-        return True
+            return [self._planDelete( classPointer )]
+        if not self._attrs_modified:
+            return []
+        data = { 'attributes': { 'license': self.attrs['rawLicense'] }, 'type': "license" }
+        return [syncplan.SyncOperation( "update", self, "PATCH", f"/configuration/{classPointer.ELEMENT_PATH}", payload=data,
+                                        execute=lambda: self._synced( classPointer.update( id=self.id, data=data )), confirm=self._confirmed )]
     
     def _extractName( self, data: dict ) -> str|None:
         renderer = templating.TemplateHandler()
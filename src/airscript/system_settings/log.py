@@ -29,13 +29,11 @@ KIND = 'LogSettings'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class LogSettings( element.BaseElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'log'
-        self._kind = KIND
-        self._operations = "RU"
-        element.BaseElement.__init__( self, parent, obj=obj, id=id )
-    
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'log'
+    _kind = KIND
+    _operations = "RU"
     def me( self ):
         r = super().me()
         r['level'] = self.attrs['level']
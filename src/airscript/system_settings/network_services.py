@@ -29,10 +29,9 @@ KIND = 'NetworkServicesSettings'
 lookup.registerBoth( element.LOOKUP_TYPENAME2KIND, element.LOOKUP_KIND2TYPENAME, TYPENAME, KIND )
 
 class NetworkServicesSettings( element.BaseElement ):
-    def __init__( self, parent, obj=None, id=None ):
-        self._typename = TYPENAME
-        self._path = 'network-services'
-        self._kind = KIND
-        self._operations = "RU"
-        element.BaseElement.__init__( self, parent, obj=obj, id=id )
+    __slots__ = ()
+    _typename = TYPENAME
+    _path = 'network-services'
+    _kind = KIND
+    _operations = "RU"
     
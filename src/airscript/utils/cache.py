@@ -16,74 +16,143 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
+import threading
 import time
 
 
 """
 Global caching variables
+
+Attribute key names (e.g. 'entryPath') and paths (e.g. 'entryPath.value') of the element types seen so far,
+used for tab completion. Keys are reference counted per gateway and element type, a key is dropped when
+the last gateway using it is removed. All functions may be called from any thread.
 """
 
+_lock = threading.Lock()
+# gateway name -> { element type: time cached }
 _cachedTypes = {}
-_cachedAttributeKeyNames = []
-_cachedAttributeKeyPaths = []
-_cachedAttributeKeysMap = {}
+# (gateway name, element type) -> set of keys
+_cachedTypeKeys = {}
+# key -> number of (gateway name, element type) entries using it
+_cachedKeyRefs = {}
 
 
-def isCached( gateway_name, typename ):
-    global _cachedTypes
-    entry = _getCacheGatewayEntry( gateway_name )
-    if entry == None:
-        return False
-    if typename in entry:
-        return True
-    return False
+class _PrefixTrie( object ):
+    """ Set of strings supporting lookup by prefix """
+    __slots__ = ( '_root', '_count' )
+    # marks end of a word within a node
+    _END = ''
 
-def cacheAttributeKeys( gateway_name, typename, keyList ):
-    for key in keyList:
-        pos = key.find( "." )
-        if pos >= 0:
-            if not key in _cachedAttributeKeyPaths:
-                _cachedAttributeKeyPaths.append( key )
-        else:
-            if not key in _cachedAttributeKeyNames:
-                _cachedAttributeKeyNames.append( key )
-        if not key in _cachedAttributeKeysMap.keys():
-            _cachedAttributeKeysMap[key] = { gateway_name: [typename] }
-        else:
+    def __init__( self ):
+        self._root = {}
+        self._count = 0
+
+    def __len__( self ) -> int:
+        return self._count
+
+    def add( self, word: str ):
+        node = self._root
+        for char in word:
+            node = node.setdefault( char, {} )
+        if not self._END in node:
+            node[self._END] = True
+            self._count += 1
+
+    def discard( self, word: str ):
+        trail = []
+        node = self._root
+        for char in word:
             try:
-                if not typename in _cachedAttributeKeysMap[key][gateway_name]:
-                    _cachedAttributeKeysMap[key][gateway_name].append( typename )
+                trail.append( (node, char) )
+                node = node[char]
             except KeyError:
-                _cachedAttributeKeysMap[key][gateway_name] = [typename]
-    entry = _getCacheGatewayEntry( gateway_name )
-    if entry == None:
-        entry = {}
-        _cachedTypes[gateway_name] = entry
-    entry[typename] = time.time()
+                return
+        if node.pop( self._END, None ) == None:
+            return
+        self._count -= 1
+        # prune empty nodes
+        for parent, char in reversed( trail ):
+            if parent[char]:
+                break
+            del parent[char]
+
+    def complete( self, prefix: str ) -> list[str]:
+        """ Return all words starting with 'prefix', sorted """
+        node = self._root
+        for char in prefix:
+            try:
+                node = node[char]
+            except KeyError:
+                return []
+        r = []
+        pending = [(prefix, node)]
+        while pending:
+            word, node = pending.pop()
+            for char, child in node.items():
+                if char == self._END:
+                    r.append( word )
+                else:
+                    pending.append( (word + char, child) )
+        r.sort()
+        return r
+
+
+_cachedAttributeKeyNames = _PrefixTrie()
+_cachedAttributeKeyPaths = _PrefixTrie()
+
+
+def isCached( gateway_name, typename ):
+    with _lock:
+        entry = _getCacheGatewayEntry( gateway_name )
+        if entry == None:
+            return False
+        return typename in entry
+
+def cacheAttributeKeys( gateway_name, typename, keyList ):
+    with _lock:
+        keys = _cachedTypeKeys.setdefault( (gateway_name, typename), set() )
+        for key in set( keyList ) - keys:
+            keys.add( key )
+            count = _cachedKeyRefs.get( key, 0 )
+            _cachedKeyRefs[key] = count + 1
+            if count == 0:
+                _keyTrie( key ).add( key )
+        entry = _getCacheGatewayEntry( gateway_name )
+        if entry == None:
+            entry = {}
+            _cachedTypes[gateway_name] = entry
+        entry[typename] = time.time()
 
 def getAttributeKeyNames():
-    return _cachedAttributeKeyNames
+    return completeAttributeKeyNames( "" )
 
 def getAttributeKeyPaths():
-    return _cachedAttributeKeyPaths
+    return completeAttributeKeyPaths( "" )
+
+def completeAttributeKeyNames( prefix: str ) -> list[str]:
+    """ Return cached key names starting with 'prefix' """
+    with _lock:
+        return _cachedAttributeKeyNames.complete( prefix )
+
+def completeAttributeKeyPaths( prefix: str ) -> list[str]:
+    """ Return cached key paths starting with 'prefix' """
+    with _lock:
+        return _cachedAttributeKeyPaths.complete( prefix )
 
 def cacheRemoveGateway( gateway_name ):
-    entry = _getCacheGatewayEntry( gateway_name )
-    if entry == None:
-        return
-    for key_map in _cachedAttributeKeysMap.items():
-        if not gateway_name in key_map[1].keys():
-            continue
-        del key_map[1][gateway_name]
-        if len( key_map[1] ) == 0:
-            ''' last entry - remove from key name cache '''
-            pos = key_map[0].find( "." )
-            if pos >= 0:
-                idx = _cachedAttributeKeyPaths.index( key_map[0] )
-                del _cachedAttributeKeyPaths[idx]
-            else:
-                idx = _cachedAttributeKeyNames.index( key_map[0] )
-                del _cachedAttributeKeyNames[idx]
+    with _lock:
+        entry = _cachedTypes.pop( gateway_name, None )
+        if entry == None:
+            return
+        for typename in entry:
+            for key in _cachedTypeKeys.pop( (gateway_name, typename), () ):
+                count = _cachedKeyRefs[key] - 1
+                if count > 0:
+                    _cachedKeyRefs[key] = count
+                else:
+                    ''' last entry - remove from key name cache '''
+                    del _cachedKeyRefs[key]
+                    _keyTrie( key ).discard( key )
 
 def _getCacheGatewayEntry( gateway_name ):
     try:
@@ -91,3 +160,7 @@ def _getCacheGatewayEntry( gateway_name ):
     except KeyError:
         return None
 
+def _keyTrie( key ):
+    if "." in key:
+        return _cachedAttributeKeyPaths
+    return _cachedAttributeKeyNames
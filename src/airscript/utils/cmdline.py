@@ -43,6 +43,8 @@ class Cmdline( object ):
                                 help='log level, bitmask of fatal (1), critical (2), error (4), warning (8), info (16), verbose (32), trace (64), debug (128) (default: 31)' )
         parser.add_argument( '-L', '--logfile', default=None, action='store',
                                 help='log destination: stdout, stderr, or <filename> (default: None)' )
+        parser.add_argument( '-T', '--types', default=None, action='append',
+                                help='configuration element types loaded by loadAll(), as kind or type name, comma-separated, can be specified multiple times (default: all)' )
         parser.add_argument( '-V', '--version', default=False, action='store_true',
                                 help='get version information' )
         parser.add_argument( 'args', help='script to execute and its parameters', metavar="path", nargs="*" )
@@ -77,6 +79,11 @@ class Cmdline( object ):
             return "/dev/stderr"
         return self._args.logfile
     
+    def get_load_types( self ):
+        if self._args.types == None:
+            return None
+        return [name.strip() for arg in self._args.types for name in arg.split( ',' ) if name.strip() != ""]
+    
     def get_args( self ):
         return self._args.args
     
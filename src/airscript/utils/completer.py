@@ -332,8 +332,8 @@ class Completer:
                 if word[:n] == text and word not in seen:
                     seen.add(word)
                     matches.append(self._callable_postfix(val, word))
-        for word in cache.getAttributeKeyNames():
-            if word[:n] == text and word not in seen:
+        for word in cache.completeAttributeKeyNames( text ):
+            if word not in seen:
                 seen.add(word)
                 matches.append(word)
         return matches
@@ -352,9 +352,7 @@ class Completer:
         """
         matches = []
         n = len( text )
-        for word in cache.getAttributeKeyPaths():
-            if word[:n] == text:
-                matches.append(word)
+        matches.extend( cache.completeAttributeKeyPaths( text ))
         
         import re
         m = re.match(r"(\w+(\.\w+)*)\.(\w*)", text)
@@ -0,0 +1,220 @@
+# AirScript: Airlock (Gateway) Configuration Script
+# 
+# Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+AirScript HTTP connection pool.
+
+Every gateway session uses its own HTTP session, i.e. its own cookies and administrator session,
+but all sessions to the same Airlock Gateway share one pool of keep-alive connections.
+The HTTP session is created by pyAirlock when connecting, the shared connections are used for all requests
+following the one creating the administrator session. Sessions connecting and disconnecting repeatedly,
+e.g. in scripts iterating over all gateways, thus re-use established TLS connections for their requests.
+
+Connections of a gateway not used for longer than the idle timeout are closed by the next request
+sent through the pool, e.g. by a keep-alive request, or when the next session is attached.
+
+Config file settings (section airscript.pool):
+- enabled: share connections between sessions, default true
+- size: maximum number of kept connections per gateway, default 10
+- idle-timeout: seconds after which unused connections are closed, default 60
+"""
+
+import threading
+import time
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pyAirlock.common import log
+
+
+POOL_SIZE_DEFAULT = 10
+IDLE_TIMEOUT_DEFAULT = 60
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def fromConfig( airscript_config ):
+    """ Return process-wide connection pool as specified in config file or None if disabled """
+    size = POOL_SIZE_DEFAULT
+    idle_timeout = IDLE_TIMEOUT_DEFAULT
+    if airscript_config != None:
+        if not airscript_config.get( 'airscript.pool.enabled', True ):
+            return None
+        size = airscript_config.get( 'airscript.pool.size', POOL_SIZE_DEFAULT )
+        idle_timeout = airscript_config.get( 'airscript.pool.idle-timeout', IDLE_TIMEOUT_DEFAULT )
+    return getPool( size=size, idle_timeout=idle_timeout )
+
+def getPool( size: int=POOL_SIZE_DEFAULT, idle_timeout: float=IDLE_TIMEOUT_DEFAULT ):
+    """ Return process-wide connection pool, settings are only used when it is created """
+    global _pool
+    with _pool_lock:
+        if _pool == None:
+            _pool = ConnectionPool( size=size, idle_timeout=idle_timeout )
+        return _pool
+
+def stats() -> list[dict]:
+    """ Return statistics of process-wide connection pool, empty if it has not been used """
+    if _pool == None:
+        return []
+    return _pool.stats()
+
+
+class ConnectionPool( object ):
+    def __init__( self, size: int=POOL_SIZE_DEFAULT, idle_timeout: float=IDLE_TIMEOUT_DEFAULT ):
+        """
+        size - maximum number of kept connections per host
+        idle_timeout - seconds, None to keep connections until closed explicitly
+        """
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._hosts = {}
+        # attached HTTP session -> finalizer releasing it
+        self._attached = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._log = log.Log( self.__module__ )
+
+    def attach( self, sess: requests.Session, hostname: str ):
+        """
+        Let HTTP session 'sess' use the shared connections to 'hostname'
+
+        The session is released by release() or when it is garbage collected, e.g. after disconnecting.
+        """
+        self.sweep()
+        with self._lock:
+            if sess in self._attached:
+                return
+            entry = self._hosts.get( hostname )
+            if entry == None:
+                entry = _HostPool( self._adapter() )
+                self._hosts[hostname] = entry
+            elif entry.adapter == None:
+                entry.adapter = self._adapter()
+            entry.sessions += 1
+            entry.last_used = time.monotonic()
+            adapter = entry.adapter
+            self._attached[sess] = weakref.finalize( sess, self._released, hostname )
+        # connection opened by the session itself, e.g. when creating the administrator session
+        sess.get_adapter( f"https://{hostname}/" ).close()
+        sess.mount( f"https://{hostname}/", adapter )
+        sess.hooks['response'].append( lambda resp, *args, **kwargs: self._used( hostname ))
+
+    def session( self, hostname: str ) -> requests.Session:
+        """ Return new HTTP session for 'hostname' using the shared connections """
+        sess = requests.Session()
+        self.attach( sess, hostname )
+        return sess
+
+    def release( self, sess: requests.Session ):
+        """ Session 'sess' no longer uses the shared connections, e.g. after disconnecting """
+        with self._lock:
+            finalizer = self._attached.pop( sess, None )
+        if finalizer != None:
+            finalizer()
+
+    def sweep( self ) -> int:
+        """ Close connections of hosts idle for longer than the idle timeout. Returns number of affected hosts. """
+        if self.idle_timeout == None:
+            return 0
+        now = time.monotonic()
+        closed = 0
+        with self._lock:
+            for hostname, entry in self._hosts.items():
+                if entry.adapter == None or now - entry.last_used <= self.idle_timeout:
+                    continue
+                self._log.debug( f"Closing idle connections to '{hostname}'" )
+                entry.close()
+                closed += 1
+        return closed
+
+    def clear( self ):
+        """ Close all connections and reset statistics """
+        with self._lock:
+            for entry in self._hosts.values():
+                entry.close()
+            self._hosts = {}
+
+    def stats( self ) -> list[dict]:
+        """ Return per-host statistics: attached sessions, requests, connections opened, idle connections, seconds since last use """
+        now = time.monotonic()
+        r = []
+        with self._lock:
+            for hostname, entry in sorted( self._hosts.items() ):
+                opened, idle = entry.connections()
+                r.append( {
+                    'host': hostname,
+                    'sessions': entry.sessions,
+                    'requests': entry.requests,
+                    'connections': entry.opened + opened,
+                    'idle': idle,
+                    'last-used': round( now - entry.last_used, 1 ),
+                } )
+        return r
+
+    def _adapter( self ) -> HTTPAdapter:
+        return HTTPAdapter( pool_connections=4, pool_maxsize=self.size )
+
+    def _used( self, hostname: str ):
+        with self._lock:
+            entry = self._hosts.get( hostname )
+            if entry != None:
+                entry.requests += 1
+                entry.last_used = time.monotonic()
+        self.sweep()
+
+    def _released( self, hostname: str ):
+        with self._lock:
+            entry = self._hosts.get( hostname )
+            if entry != None:
+                entry.sessions -= 1
+
+
+class _HostPool( object ):
+    def __init__( self, adapter: HTTPAdapter ):
+        self.adapter = adapter
+        self.sessions = 0
+        self.requests = 0
+        self.opened = 0
+        self.last_used = time.monotonic()
+
+    def connections( self ) -> tuple[int, int]:
+        """ Return number of connections opened and currently idle of the active adapter """
+        if self.adapter == None:
+            return (0, 0)
+        opened = 0
+        idle = 0
+        try:
+            for key in list( self.adapter.poolmanager.pools.keys() ):
+                pool = self.adapter.poolmanager.pools.get( key )
+                if pool == None:
+                    continue
+                opened += pool.num_connections
+                idle += sum( 1 for conn in list( pool.pool.queue ) if conn != None )
+        except AttributeError:
+            pass
+        return (opened, idle)
+
+    def close( self ):
+        """ Close connections, sessions still referencing the adapter re-connect on their next request """
+        if self.adapter == None:
+            return
+        self.opened += self.connections()[0]
+        self.adapter.close()
+        self.adapter = None
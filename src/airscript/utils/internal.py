@@ -18,10 +18,12 @@ along with this program; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 """
 
-import re
 from operator import attrgetter, itemgetter
 from typing import Union
 
+from airscript.base import query
+from airscript.utils import output
+
 def itemgetter_lc_0( obj ) -> str:
     """
     Return lowercased operator.itemgetter() keys
@@ -71,7 +73,7 @@ def itemgetter_nr_1( obj ) -> int:
 def collectKeyNames( dictionary, path="", level=1 ) -> list[str|int]:
     lst = []
     for key, value in dictionary.items():
-        if type( value ) is dict:
+        if isinstance( value, dict ):
             lst.extend( collectKeyNames( value, path + key + '.', level +1 ))
             lst.append( key )
         else:
@@ -80,57 +82,53 @@ def collectKeyNames( dictionary, path="", level=1 ) -> list[str|int]:
                 lst.append( key )
     return lst
 
-def itemList( objects: dict, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None ) -> dict:
+def itemList( objects: dict, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, sort: str=None, elements=None ) -> dict:
     """
     Get list of objects
     - name: regexp of name(s) to match
     - ids: list of ids to return
-    - filter: dict of attribute conditions to match: {op: =|>|<|>=|<=|eq|gt|lt|ge|le|in, attribute: value}, default for op is eq
+    - filter: list of or'ed dicts of attribute conditions to match, see airscript.base.query
+    - elements: secondary indexes of 'objects' (airscript.base.index.ElementIndex), used instead of scanning all objects if possible
 
-    Returns dict of dicts
+    Returns dict of dicts, empty if the parameters are invalid
     """
-    if name:
-        re_name = re.compile( f"^{name}$" )
-    else:
-        re_name = None
-    if id:
-        try:
-            ids.append( id )
-        except AttributeError:
-            ids = [id]
-    if ids:
-        ids = [str(x) for x in ids]
+    q = _itemQuery( id, name, ids, filter )
+    if q == None:
+        return {}
     result = {}
     idx = -1
-    for k,v in objects.items():
-        if isinstance( v, list ):
-            for item in v:
-                if _itemFilter( item, id=id, name=name, ids=ids, filter=filter, re_name=re_name ):
-                    result[idx] = v
-                    idx -= 1
-        elif _itemFilter( v, id=id, name=name, ids=ids, filter=filter, re_name=re_name ):
-            result[k] = v
+    for item in q.execute( objects, elements ):
+        if item.id == None:
+            result[idx] = item
+            idx -= 1
+        else:
+            result[item.id] = item
     if sort:
         if sort == 'name':
             func = itemgetter_lc_name
         else:
             func = itemgetter_id
-        # return sorted( (v for v in result.items() if not v[1].isDeleted()), key=func )
         r = {}
-        s = sorted( (v for v in result.values() if not v.isDeleted()), key=func )
+        s = sorted( result.values(), key=func )
         for entry in s:
             r[entry.id] = entry
         return r
     else:
         return result
 
-def _itemFilter( item, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, re_name=None ) -> bool:
-    if item.isDeleted():
-        return False
-    if name and not re_name.match( item.name ):
-        return False
-    if ids and not item.id in ids:
-        return False
-    if filter and not item.filter( filter ):
-        return False
-    return True
+def itemExplain( objects: dict, id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None, elements=None ) -> str|None:
+    """ Describe how itemList() finds the matching objects, e.g. using an index or by scanning all objects """
+    q = _itemQuery( id, name, ids, filter )
+    if q == None:
+        return None
+    return q.explain( objects, elements )
+
+def _itemQuery( id: Union[str|int]=None, name: str=None, ids: list[str|int]=None, filter: dict=None ) -> query.Query|None:
+    """ Return compiled query, None if the parameters are invalid """
+    if id:
+        ids = list( ids or [] ) + [id]
+    try:
+        return query.Query( filter, name=name, ids=ids )
+    except ValueError as e:
+        output.error( str( e ))
+        return None
@@ -0,0 +1,156 @@
+# AirScript: Airlock (Gateway) Configuration Script
+# 
+# Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+AirScript sync journal.
+
+Write-ahead log of the REST API operations performed while sync'ing a configuration,
+one JSON object per line. Every operation is logged before it is sent ('begin')
+and once Airlock Gateway confirmed it ('done' or 'failed').
+
+When a sync is interrupted, re-running it with the same journal skips all confirmed operations,
+elements created by an earlier run receive their id from the journal instead of being created again.
+Operations started but never confirmed may or may not have been performed by Airlock Gateway.
+Idempotent requests are sent again, for creates the element is first looked up by name on Airlock Gateway
+and only created if it is not found.
+
+Config file settings (section airscript.sync):
+- journal: path of journal file, default none (no journal)
+- retries: number of retries for transient errors (5xx, connection problems), default 3;
+  creates are retried only after checking that the element does not exist on Airlock Gateway
+- backoff: seconds to wait before first retry, doubled for every further retry, default 1.0
+"""
+
+import datetime
+import json
+import os
+import threading
+
+from pyAirlock.common import log
+
+
+RETRIES_DEFAULT = 3
+BACKOFF_DEFAULT = 1.0
+BACKOFF_MAX = 30.0
+
+
+def fromConfig( airscript_config, path: str=None ):
+    """ Return journal at 'path', default as specified in config file, or None if not configured """
+    if path == None and airscript_config != None:
+        path = airscript_config.get( 'airscript.sync.journal' )
+    if path == None:
+        return None
+    return SyncJournal( path )
+
+
+class SyncJournal( object ):
+    def __init__( self, path: str ):
+        """ Open journal at 'path', operations confirmed by earlier runs are read from an existing file """
+        self.path = path
+        self._confirmed = {}
+        self._started = {}
+        self._lock = threading.Lock()
+        self._log = log.Log( self.__module__ )
+        self._read()
+        self._file = open( path, 'a', encoding='utf-8' )
+        for key in self._started:
+            self._log.warning( f"Journal {path}: unconfirmed operation '{key}' will be checked and sent again" )
+
+    def __repr__( self ):
+        return f"SyncJournal {self.path}: {len( self._confirmed )} confirmed, {len( self._started )} unconfirmed"
+
+    def confirmed( self, op ) -> dict|None:
+        """ Return journal entry if 'op' has been confirmed by Airlock Gateway, otherwise None """
+        return self._confirmed.get( op.key )
+
+    def started( self, op ) -> bool:
+        """ Return True if 'op' has been started by an earlier run but not confirmed """
+        return op.key in self._started
+
+    def unconfirmed( self ) -> list[str]:
+        """ Return keys of operations started but not confirmed """
+        return list( self._started.keys() )
+
+    def begin( self, op ):
+        self._write( 'begin', op )
+
+    def done( self, op ):
+        self._write( 'done', op )
+
+    def failed( self, op, message: str ):
+        self._write( 'failed', op, error=message )
+
+    def close( self ):
+        with self._lock:
+            if self._file != None:
+                self._file.close()
+                self._file = None
+
+    def remove( self ):
+        """ Close and delete journal, e.g. after a completed sync """
+        self.close()
+        try:
+            os.remove( self.path )
+        except FileNotFoundError:
+            pass
+
+    def _read( self ):
+        try:
+            f = open( self.path, 'r', encoding='utf-8' )
+        except FileNotFoundError:
+            return
+        with f:
+            for nr, line in enumerate( f, start=1 ):
+                try:
+                    entry = json.loads( line )
+                    key = entry['key']
+                    event = entry['event']
+                except (ValueError, KeyError, TypeError):
+                    # e.g. last line truncated when process was killed
+                    self._log.warning( f"Journal {self.path}: ignoring invalid line {nr}" )
+                    continue
+                if event == 'begin':
+                    self._started[key] = entry
+                else:
+                    self._started.pop( key, None )
+                    if event == 'done':
+                        self._confirmed[key] = entry
+
+    def _write( self, event: str, op, error: str=None ):
+        entry = {
+            'time': datetime.datetime.now().isoformat( timespec='seconds' ),
+            'event': event,
+            'key': op.key,
+            'method': op.method,
+            'path': op.path,
+            'id': op.element.id,
+        }
+        if error != None:
+            entry['error'] = error
+        with self._lock:
+            if event == 'begin':
+                self._started[op.key] = entry
+            else:
+                self._started.pop( op.key, None )
+                if event == 'done':
+                    self._confirmed[op.key] = entry
+            if self._file == None:
+                return
+            self._file.write( json.dumps( entry, default=str ) + "\n" )
+            self._file.flush()
+            os.fsync( self._file.fileno() )
@@ -0,0 +1,201 @@
+# AirScript: Airlock (Gateway) Configuration Script
+# 
+# Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Streaming JSON:API decoder.
+
+Decodes the entries of a JSON:API document's top-level 'data' array one at a time,
+while the response body is still being received.
+Memory use is bounded by the largest entry instead of the whole document.
+"""
+
+import codecs
+import json
+import threading
+from typing import Iterable, Iterator
+
+import requests
+
+from pyAirlock.common import exception
+
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class StreamError( Exception ):
+    """ Response cannot be streamed, e.g. unexpected status code or invalid JSON """
+    pass
+
+
+def streamData( conn, path: str, chunk_size: int=CHUNK_SIZE ) -> Iterator[dict]:
+    """
+    Perform REST API GET on Airlock Gateway session 'conn' and yield entries of the response's 'data' element.
+
+    Raises StreamError if response cannot be streamed.
+    """
+    flag = _streamFlag( conn )
+    flag.active = True
+    try:
+        resp = conn.get( path, expect=[200, 404] )
+    except (exception.AirlockError, requests.exceptions.RequestException) as e:
+        raise StreamError( f"{path}: {e}" )
+    finally:
+        flag.active = False
+    try:
+        if resp.status_code == 404:
+            return
+        try:
+            yield from iterData( resp.iter_content( chunk_size=chunk_size ))
+        except requests.exceptions.RequestException as e:
+            raise StreamError( str( e ))
+    finally:
+        resp.close()
+
+
+class _StreamFlag( threading.local ):
+    """ Session default for 'stream', true only in the thread currently in streamData() """
+    active = False
+
+    def __bool__( self ) -> bool:
+        return self.active
+
+
+_stream_lock = threading.Lock()
+
+def _streamFlag( conn ) -> _StreamFlag:
+    """
+    Return stream flag of the HTTP session of 'conn', installing it on first use.
+
+    pyAirlock's get() does not pass 'stream', requests then uses the session's default
+    and leaves the response body unread.
+    """
+    sess = getattr( conn, 'session', None )
+    if sess == None or not hasattr( sess, 'stream' ):
+        raise StreamError( "Session does not support streaming" )
+    with _stream_lock:
+        if not isinstance( sess.stream, _StreamFlag ):
+            sess.stream = _StreamFlag()
+        return sess.stream
+
+
+def iterData( chunks: Iterable[bytes|str] ) -> Iterator[dict]:
+    """
+    Yield entries of the top-level 'data' element of a JSON document received in 'chunks'.
+
+    If 'data' is an object rather than an array, it is yielded as single entry.
+    Raises StreamError on invalid JSON.
+    """
+    reader = _Reader( chunks )
+    reader.expect( "{" )
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        if not isinstance( key, str ):
+            raise StreamError( "Invalid JSON: object key expected" )
+        reader.expect( ":" )
+        if key == "data" and reader.peek() == "[":
+            reader.expect( "[" )
+            if reader.peek() == "]":
+                reader.expect( "]" )
+            else:
+                while True:
+                    yield reader.value()
+                    c = reader.next()
+                    if c == "]":
+                        break
+                    if c != ",":
+                        raise StreamError( "Invalid JSON: ',' or ']' expected" )
+        elif key == "data":
+            entry = reader.value()
+            if entry != None:
+                yield entry
+        else:
+            reader.value()
+        c = reader.next()
+        if c == "}":
+            return
+        if c != ",":
+            raise StreamError( "Invalid JSON: ',' or '}' expected" )
+
+
+class _Reader( object ):
+    def __init__( self, chunks: Iterable[bytes|str] ):
+        self._chunks = iter( chunks )
+        self._decoder = codecs.getincrementaldecoder( 'utf-8' )()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill( self ) -> bool:
+        """ Append next chunk to buffer, dropping consumed data. Returns False at end of input. """
+        if self._eof:
+            return False
+        try:
+            chunk = next( self._chunks )
+        except StopIteration:
+            self._eof = True
+            self._buf = self._buf[self._pos:] + self._decoder.decode( b"", final=True )
+            self._pos = 0
+            return False
+        if isinstance( chunk, bytes ):
+            chunk = self._decoder.decode( chunk )
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek( self ) -> str:
+        """ Return next non-whitespace character without consuming it """
+        while True:
+            while self._pos < len( self._buf ) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len( self._buf ):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise StreamError( "Invalid JSON: unexpected end of document" )
+
+    def next( self ) -> str:
+        """ Consume and return next non-whitespace character """
+        c = self.peek()
+        self._pos += 1
+        return c
+
+    def expect( self, c: str ):
+        if self.next() != c:
+            raise StreamError( f"Invalid JSON: '{c}' expected" )
+
+    def value( self ):
+        """ Decode next complete JSON value """
+        self.peek()
+        while True:
+            try:
+                obj, end = self._json.raw_decode( self._buf, self._pos )
+                # a value ending at the buffer's end may be truncated, e.g. a number
+                if end < len( self._buf ) or self._eof:
+                    self._pos = end
+                    return obj
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise StreamError( f"Invalid JSON: {e}" )
+            # double the pending data before decoding again, avoids quadratic effort for large values
+            target = 2 * (len( self._buf ) - self._pos)
+            while self._fill() and len( self._buf ) - self._pos < target:
+                pass
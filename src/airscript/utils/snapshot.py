@@ -0,0 +1,230 @@
+# AirScript: Airlock (Gateway) Configuration Script
+# 
+# Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+AirScript configuration snapshot cache.
+
+Saved Airlock Gateway configurations never change, so the REST API data fetched by
+Configuration.getAll() can be kept on disk and re-used by later runs.
+Snapshots are stored as compressed JSON, one file per gateway and configuration,
+and are only used if configuration id, creation timestamp and gateway version match.
+
+Snapshots can also be written to a zip archive, see Configuration.archive(),
+and read back without any gateway connection using Configuration.fromArchive().
+
+Snapshots contain the complete configuration, including secrets such as private keys, passwords and API keys,
+and are not encrypted. Cache directories are created accessible by the owner only (0700), snapshot files
+are written with permissions 0600. Keep archives as protected as configuration exports.
+
+Config file settings (section airscript.cache):
+- enabled: use snapshot cache, default false
+- dir: cache directory, default <airscript.download-dir>/cache
+- max-age: days after which snapshots are removed, default 30
+- max-size: total size in MB of all snapshots, default 500
+- max-entries: maximum number of snapshots, default 100
+"""
+
+import gzip
+import json
+import os
+import re
+import time
+import zipfile
+
+from pyAirlock.common import log
+
+
+FORMAT_VERSION = 1
+
+MAX_AGE_DEFAULT = 30
+MAX_SIZE_DEFAULT = 500
+MAX_ENTRIES_DEFAULT = 100
+
+# snapshots contain the complete configuration, only the owner may access them
+DIR_MODE = 0o700
+FILE_MODE = 0o600
+
+SUFFIX = ".json.gz"
+ARCHIVE_MEMBER = "airscript-snapshot.json"
+
+
+def fromConfig( airscript_config ):
+    """ Return snapshot cache as specified in config file or None if disabled """
+    if airscript_config == None or not airscript_config.get( 'airscript.cache.enabled', False ):
+        return None
+    directory = airscript_config.get( 'airscript.cache.dir' )
+    if directory == None:
+        directory = os.path.join( airscript_config.get( 'airscript.download-dir', "." ), "cache" )
+    return SnapshotCache( directory,
+                          max_age=airscript_config.get( 'airscript.cache.max-age', MAX_AGE_DEFAULT ),
+                          max_size=airscript_config.get( 'airscript.cache.max-size', MAX_SIZE_DEFAULT ),
+                          max_entries=airscript_config.get( 'airscript.cache.max-entries', MAX_ENTRIES_DEFAULT ))
+
+
+def create( gateway_name: str, gateway_version, config_id, created_at: str, collections: dict, comment: str=None, config_type: str=None ) -> dict:
+    """ Return snapshot of REST API data, 'collections' is a dict of collection name and data """
+    return {
+        'format': FORMAT_VERSION,
+        'gateway': gateway_name,
+        'gateway-version': str( gateway_version ),
+        'id': str( config_id ),
+        'createdAt': str( created_at ),
+        'comment': comment,
+        'configType': config_type,
+        'collections': collections,
+    }
+
+def read( fname: str ) -> dict:
+    """
+    Read snapshot from zip archive or snapshot cache file.
+
+    Raises ValueError if file does not contain a snapshot.
+    """
+    if zipfile.is_zipfile( fname ):
+        with zipfile.ZipFile( fname ) as zf:
+            if not ARCHIVE_MEMBER in zf.namelist():
+                raise ValueError( f"'{fname}' contains no AirScript snapshot - gateway configuration exports cannot be read offline" )
+            snap = json.loads( zf.read( ARCHIVE_MEMBER ).decode( 'utf-8' ))
+    else:
+        try:
+            with gzip.open( fname, 'rt', encoding='utf-8' ) as fp:
+                snap = json.load( fp )
+        except (OSError, EOFError) as e:
+            raise ValueError( f"'{fname}' is not a snapshot: {e}" )
+    if not isinstance( snap, dict ) or snap.get( 'format' ) != FORMAT_VERSION or not 'collections' in snap:
+        raise ValueError( f"'{fname}' has unsupported snapshot format" )
+    return snap
+
+def writeArchive( fname: str, snap: dict ):
+    """ Write snapshot to zip archive """
+    with zipfile.ZipFile( fname, 'w', compression=zipfile.ZIP_DEFLATED ) as zf:
+        zf.writestr( ARCHIVE_MEMBER, json.dumps( snap ))
+
+
+class SnapshotCache( object ):
+    def __init__( self, directory: str, max_age: float=MAX_AGE_DEFAULT, max_size: float=MAX_SIZE_DEFAULT, max_entries: int=MAX_ENTRIES_DEFAULT ):
+        """
+        directory - base directory of cache
+        max_age - days
+        max_size - MB
+        max_entries - number of snapshots
+        """
+        self.directory = directory
+        self.max_age = max_age
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self._log = log.Log( self.__module__ )
+
+    def path( self, gateway_name: str, config_id, created_at: str ) -> str:
+        """ Return filename of snapshot """
+        stamp = re.sub( r'[^0-9A-Za-z]', "", str( created_at ))
+        return os.path.join( self.directory, _safeName( gateway_name ), f"{_safeName( config_id )}-{stamp}{SUFFIX}" )
+
+    def load( self, gateway_name: str, config_id, created_at: str, gateway_version ) -> dict:
+        """
+        Return cached snapshot or None if not cached
+        """
+        fname = self.path( gateway_name, config_id, created_at )
+        if not os.path.exists( fname ):
+            return None
+        try:
+            snap = read( fname )
+        except (OSError, ValueError) as e:
+            self._log.warning( f"Ignoring unreadable snapshot '{fname}': {e}" )
+            return None
+        if snap.get( 'gateway-version' ) != str( gateway_version ):
+            return None
+        if snap.get( 'id' ) != str( config_id ) or snap.get( 'createdAt' ) != str( created_at ):
+            return None
+        try:
+            os.utime( fname )
+        except OSError:
+            pass
+        return snap
+
+    def store( self, snap: dict ) -> bool:
+        """ Write snapshot to cache and evict outdated ones """
+        fname = self.path( snap['gateway'], snap['id'], snap['createdAt'] )
+        tmp_name = f"{fname}.{os.getpid()}.tmp"
+        try:
+            # mode applies to the last directory only
+            os.makedirs( self.directory, mode=DIR_MODE, exist_ok=True )
+            os.makedirs( os.path.dirname( fname ), mode=DIR_MODE, exist_ok=True )
+            fd = os.open( tmp_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, FILE_MODE )
+            with open( fd, 'wb' ) as raw, gzip.open( raw, 'wt', encoding='utf-8' ) as fp:
+                json.dump( snap, fp )
+            os.replace( tmp_name, fname )
+        except (OSError, TypeError, ValueError) as e:
+            self._log.warning( f"Unable to write snapshot '{fname}': {e}" )
+            try:
+                os.remove( tmp_name )
+            except OSError:
+                pass
+            return False
+        self.evict()
+        return True
+
+    def entries( self ) -> list[tuple[str, float, int]]:
+        """ Return list of snapshots (filename, last use, size), least recently used first """
+        r = []
+        for root, _, files in os.walk( self.directory ):
+            for name in files:
+                if not name.endswith( SUFFIX ):
+                    continue
+                fname = os.path.join( root, name )
+                try:
+                    st = os.stat( fname )
+                except OSError:
+                    continue
+                r.append( (fname, st.st_mtime, st.st_size) )
+        return sorted( r, key=lambda x: x[1] )
+
+    def evict( self ) -> int:
+        """ Remove snapshots exceeding age, size or number limits, least recently used first. Returns number of removed snapshots. """
+        entries = self.entries()
+        total = sum( x[2] for x in entries )
+        now = time.time()
+        removed = 0
+        for fname, last_used, size in entries:
+            expired = self.max_age != None and now - last_used > self.max_age * 86400
+            too_big = self.max_size != None and total > self.max_size * 1024 * 1024
+            too_many = self.max_entries != None and len( entries ) - removed > self.max_entries
+            if not (expired or too_big or too_many):
+                continue
+            try:
+                os.remove( fname )
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear( self ) -> int:
+        """ Remove all snapshots """
+        removed = 0
+        for fname, _, _ in self.entries():
+            try:
+                os.remove( fname )
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+def _safeName( name ) -> str:
+    return re.sub( r'[^0-9A-Za-z._-]', "_", str( name ))
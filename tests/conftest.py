@@ -0,0 +1,16 @@
+import pytest
+
+import fakegateway
+
+
+@pytest.fixture
+def gateway() -> fakegateway.FakeGateway:
+    return fakegateway.FakeGateway()
+
+@pytest.fixture
+def config( gateway ):
+    """ Configuration loaded from 'gateway', sync retries without delay """
+    cfg = fakegateway.newConfiguration( gateway, { 'airscript': { 'sync': { 'backoff': 0 }}} )
+    assert cfg.loadAll()
+    gateway.calls.clear()
+    return cfg
@@ -0,0 +1,251 @@
+"""
+AirScript: Airlock (Gateway) Configuration Script
+
+Copyright (c) 2019-2024 Urs Zurbuchen <urs.zurbuchen@ergon.ch>
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+
+"""
+In-memory stand-in for an Airlock Gateway session, records all REST API calls.
+"""
+
+import copy
+import json
+import threading
+
+import requests
+
+from airscript.model import configuration
+
+
+class RuntimeConfig( object ):
+    def __init__( self, data: dict=None ):
+        """ airscript config file settings, e.g. { 'airscript': { 'sync': { 'retries': 1 }}} """
+        self.data = data or {}
+
+    def get( self, path: str, default=None, base=None ):
+        value = self.data
+        for key in path.split( '.' ):
+            if not isinstance( value, dict ) or not key in value:
+                return default
+            value = value[key]
+        return value
+
+
+class Response( object ):
+    def __init__( self, data, status_code: int=200, chunk_size: int=None, fail_after: int=None ):
+        """ Body sent in chunks of 'chunk_size' by iter_content(), connection is lost after 'fail_after' bytes unless None """
+        self.status_code = status_code
+        self.text = json.dumps( { 'data': data } ) if data != None else ""
+        self.chunk_size = chunk_size
+        self.fail_after = fail_after
+        self.closed = False
+
+    def json( self ) -> dict:
+        return json.loads( self.text )
+
+    def iter_content( self, chunk_size: int=1 ):
+        chunk_size = self.chunk_size or chunk_size
+        body = self.text.encode( 'utf-8' )
+        for pos in range( 0, len( body ), chunk_size ):
+            if self.fail_after != None and pos >= self.fail_after:
+                raise requests.exceptions.ConnectionError( "connection lost" )
+            yield body[pos:pos + chunk_size]
+
+    def close( self ):
+        self.closed = True
+
+
+class HTTPSession( object ):
+    """ requests.Session attributes used by airscript """
+    stream = False
+
+
+class ElementAPI( object ):
+    def __init__( self, gateway, typename: str, path: str, data: list=None ):
+        """ REST API handler of one element type, as provided by pyAirlock """
+        self.gateway = gateway
+        self.typename = typename
+        self.ELEMENT_PATH = path
+        self.data = data if data != None else []
+
+    def read( self, id: int=None ):
+        self.gateway.record( 'read', self.typename )
+        return copy.deepcopy( self.data )
+
+    def create( self, data: dict ) -> dict:
+        self.gateway.record( 'create', self.typename, data['attributes'].get( 'name' ))
+        with self.gateway.lock:
+            self.gateway.next_id += 1
+            created = copy.deepcopy( data )
+            created['id'] = str( self.gateway.next_id )
+            self.data.append( created )
+        return copy.deepcopy( created )
+
+    def update( self, id, data: dict ) -> dict:
+        self.gateway.record( 'update', self.typename, int( id ), json.dumps( data['attributes'], sort_keys=True ))
+        for entry in self.data:
+            if entry['id'] == str( id ):
+                entry['attributes'].update( copy.deepcopy( data['attributes'] ))
+                return copy.deepcopy( entry )
+        updated = copy.deepcopy( data )
+        updated['id'] = str( id )
+        return updated
+
+    def delete( self, id, subpath: str=None, data: dict=None, expect=None ):
+        self.gateway.record( 'delete', self.typename, int( id ), subpath )
+        return True
+
+    def patch( self, id, subpath: str=None, data: dict=None, expect=None ):
+        self.gateway.record( 'patch', self.typename, int( id ), subpath )
+        return {}
+
+    def addConnection( self, reltype: str, id, relation_id, meta=None ):
+        self.gateway.record( 'connect', self.typename, int( id ), reltype, int( relation_id ))
+        return True
+
+    def removeConnection( self, reltype: str, id, relation_id ):
+        self.gateway.record( 'disconnect', self.typename, int( id ), reltype, int( relation_id ))
+        return True
+
+
+class ConfigurationAPI( object ):
+    def __init__( self, gateway ):
+        self.gateway = gateway
+
+    def load( self, id ) -> bool:
+        self.gateway.record( 'load', id )
+        return True
+
+
+def relationship( typename: str, ids: list ) -> dict:
+    return { 'data': [{ 'type': typename, 'id': str( id ) } for id in ids] }
+
+def entry( typename: str, id: int, attributes: dict, relationships: dict=None ) -> dict:
+    r = { 'id': str( id ), 'type': typename, 'attributes': attributes }
+    if relationships != None:
+        r['relationships'] = relationships
+    return r
+
+
+class FakeGateway( object ):
+    def __init__( self, mappings: int=4 ):
+        """
+        Gateway session with virtual hosts, backend groups, IP lists and 'mappings' mappings.
+
+        Mapping i is connected to virtual host (i % 2) + 1 and backend group 1, IP list 1 whitelists all mappings.
+        """
+        self.name = 'fake'
+        self.session = HTTPSession()
+        # response body of streamed collection reads, see get()
+        self.chunk_size = 7
+        self.fail_after = None
+        self.calls = []
+        # ids of created elements, unique across element types
+        self.next_id = 1000
+        self.lock = threading.Lock()
+        vhosts = [entry( 'virtual-host', i, { 'name': f"vh{i}", 'hostName': f"vh{i}.example.com" },
+                         { 'mappings': relationship( 'mapping', [m for m in range( 1, mappings + 1 ) if m % 2 + 1 == i] ) })
+                  for i in (1, 2)]
+        maps = [entry( 'mapping', i, { 'name': f"map{i}", 'entryPath': { 'value': f"/m{i}/" },
+                                       'labels': ['Prod' if i % 2 else 'Test', f"L{i}"],
+                                       'backendTimeout': 10 * i,
+                                       'locking': { 'application': { 'response': { 'compressionAllowed': True }}}},
+                       { 'virtual-hosts': relationship( 'virtual-host', [i % 2 + 1] ),
+                         'back-end-groups': relationship( 'back-end-group', [1] ),
+                         'ip-address-whitelists': relationship( 'ip-address-list', [1] ) })
+                for i in range( 1, mappings + 1 )]
+        backendgroups = [entry( 'back-end-group', 1, { 'name': "bg1", 'backendHosts': [] },
+                                { 'mappings': relationship( 'mapping', range( 1, mappings + 1 )) })]
+        iplists = [entry( 'ip-address-list', 1, { 'name': "ipl1", 'ips': [] },
+                          { 'mappings-whitelist': relationship( 'mapping', range( 1, mappings + 1 )) })]
+        self.mapping = ElementAPI( self, 'mapping', 'mappings', maps )
+        self.vhost = ElementAPI( self, 'virtual-host', 'virtual-hosts', vhosts )
+        self.backendgroup = ElementAPI( self, 'back-end-group', 'back-end-groups', backendgroups )
+        self.iplist = ElementAPI( self, 'ip-address-list', 'ip-address-lists', iplists )
+        for api, typename, path in [('node', 'node', 'nodes'),
+                                    ('api_policy', 'api-policy-service', 'api-policy-services'),
+                                    ('anomalyshield_application', 'anomaly-shield-application', 'anomaly-shield-applications'),
+                                    ('anomalyshield_rule', 'anomaly-shield-rule', 'anomaly-shield-rules'),
+                                    ('anomalyshield_trafficmatcher', 'anomaly-shield-traffic-matcher', 'anomaly-shield-traffic-matchers'),
+                                    ('anomalyshield_trigger', 'anomaly-shield-trigger', 'anomaly-shield-triggers'),
+                                    ('certificate', 'ssl-certificate', 'ssl-certificates'),
+                                    ('graphql', 'graphql-document', 'api-security/graphql-documents'),
+                                    ('host', 'host', 'hosts'),
+                                    ('icap', 'icap-environment', 'icap-environments'),
+                                    ('jwks_local', 'local-json-web-key-set', 'json-web-key-sets/locals'),
+                                    ('jwks_remote', 'remote-json-web-key-set', 'json-web-key-sets/remotes'),
+                                    ('kerberos', 'kerberos-environment', 'kerberos-environments'),
+                                    ('network_endpoint', 'allowed-network-endpoint', 'allowed-network-endpoints'),
+                                    ('openapi', 'openapi-document', 'api-security/openapi-documents'),
+                                    ('routes_ipv4_destination', 'route-ipv4-destination', 'routes/ipv4/destination'),
+                                    ('routes_ipv6_destination', 'route-ipv6-destination', 'routes/ipv6/destination'),
+                                    ('routes_ipv4_source', 'route-ipv4-source', 'routes/ipv4/source'),
+                                    ('routes_ipv6_source', 'route-ipv6-source', 'routes/ipv6/source')]:
+            setattr( self, api, ElementAPI( self, typename, path ))
+        for api, typename, attributes in [('license', 'license-response', { 'owner': "o", 'environment': "e", 'backendHosts': 1, 'rawLicense': "x" }),
+                                          ('settings_anomalyshield', 'anomaly-shield', {}),
+                                          ('settings_log', 'log', {}),
+                                          ('settings_network_services', 'network-services', {}),
+                                          ('settings_reporting', 'reporting', {}),
+                                          ('settings_route', 'route-default', {}),
+                                          ('settings_session', 'session', {})]:
+            settings = ElementAPI( self, typename, typename )
+            settings.data = entry( typename, 1, attributes )
+            setattr( self, api, settings )
+        self.configuration = ConfigurationAPI( self )
+
+    def record( self, *call ):
+        with self.lock:
+            self.calls.append( call )
+
+    def callsOf( self, action: str ) -> list[tuple]:
+        return [call for call in self.calls if call[0] == action]
+
+    def getName( self ) -> str:
+        return self.name
+
+    def getHost( self ) -> str:
+        return "fake.example.com"
+
+    def getNodename( self ) -> str:
+        return "fake"
+
+    def getVersion( self ) -> float:
+        return 8.3
+
+    def getAPI( self, typename: str ) -> ElementAPI|None:
+        for api in vars( self ).values():
+            if isinstance( api, ElementAPI ) and api.typename == typename:
+                return api
+        return None
+
+    def get( self, path: str, **kwargs ) -> Response:
+        """ Collections, e.g. '/configuration/mappings', streamed if requested by session, otherwise mapping templates """
+        self.record( 'get', path )
+        for api in vars( self ).values():
+            if isinstance( api, ElementAPI ) and path == f"/configuration/{api.ELEMENT_PATH}":
+                if not self.session.stream:
+                    return Response( api.data )
+                return Response( api.data, chunk_size=self.chunk_size, fail_after=self.fail_after )
+        return Response( [] )
+
+
+
+def newConfiguration( gateway: FakeGateway, settings: dict=None, id: str='7' ) -> configuration.Configuration:
+    """ Return configuration of 'gateway', not yet loaded """
+    obj = { 'id': id, 'attributes': { 'comment': "test", 'configType': 'CURRENTLY_ACTIVE', 'createdAt': '2024-01-01T10:00:00+00:00' }}
+    return configuration.Configuration( obj, gateway, RuntimeConfig( settings ))
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from airscript.utils import cache
+
+
+@pytest.fixture
+def gateways():
+    """ Gateway names, removed from the cache afterwards """
+    names = ["cache-gw1", "cache-gw2"]
+    yield names
+    for name in names:
+        cache.cacheRemoveGateway( name )
+
+
+def test_remove_gateway_keeps_shared_keys( gateways ):
+    gw1, gw2 = gateways
+    cache.cacheAttributeKeys( gw1, 'mapping', ["zzName", "zzOnly1", "zzPath.value", "zzPath.only1"] )
+    cache.cacheAttributeKeys( gw1, 'virtual-host', ["zzHost"] )
+    cache.cacheAttributeKeys( gw2, 'mapping', ["zzName", "zzPath.value"] )
+    cache.cacheAttributeKeys( gw2, 'virtual-host', ["zzHost", "zzOnly2"] )
+    assert cache.isCached( gw1, 'mapping' ) and cache.isCached( gw2, 'virtual-host' )
+    assert cache.completeAttributeKeyNames( "zz" ) == ["zzHost", "zzName", "zzOnly1", "zzOnly2"]
+    assert cache.completeAttributeKeyPaths( "zzPath." ) == ["zzPath.only1", "zzPath.value"]
+    cache.cacheRemoveGateway( gw1 )
+    assert not cache.isCached( gw1, 'mapping' ) and cache.isCached( gw2, 'mapping' )
+    assert cache.completeAttributeKeyNames( "zz" ) == ["zzHost", "zzName", "zzOnly2"]
+    assert cache.completeAttributeKeyPaths( "zz" ) == ["zzPath.value"]
+    cache.cacheRemoveGateway( gw2 )
+    assert cache.completeAttributeKeyNames( "zz" ) == []
+    assert cache.completeAttributeKeyPaths( "zz" ) == []
+    # removing again has no effect
+    cache.cacheRemoveGateway( gw2 )
+
+def test_keys_cached_repeatedly_counted_once( gateways ):
+    gw1, gw2 = gateways
+    cache.cacheAttributeKeys( gw1, 'mapping', ["zzName", "zzName"] )
+    cache.cacheAttributeKeys( gw1, 'mapping', ["zzName"] )
+    cache.cacheAttributeKeys( gw2, 'mapping', ["zzName"] )
+    cache.cacheRemoveGateway( gw2 )
+    assert cache.completeAttributeKeyNames( "zzN" ) == ["zzName"]
+    cache.cacheRemoveGateway( gw1 )
+    assert cache.completeAttributeKeyNames( "zzN" ) == []
+
+def test_trie_pruned():
+    trie = cache._PrefixTrie()
+    for word in ["a", "ab", "abc", "b"]:
+        trie.add( word )
+    trie.add( "ab" )
+    assert len( trie ) == 4
+    assert trie.complete( "a" ) == ["a", "ab", "abc"]
+    assert trie.complete( "" ) == ["a", "ab", "abc", "b"]
+    trie.discard( "abc" )
+    trie.discard( "abc" )
+    trie.discard( "x" )
+    assert len( trie ) == 3
+    assert trie.complete( "ab" ) == ["ab"]
+    assert not 'c' in trie._root['a']['b']
+    trie.discard( "ab" )
+    trie.discard( "a" )
+    trie.discard( "b" )
+    assert len( trie ) == 0
+    assert trie._root == {}
+
+def test_concurrent_updates( gateways ):
+    def cacheKeys( gateway_name: str ):
+        for nr in range( 200 ):
+            cache.cacheAttributeKeys( gateway_name, f"type{nr % 5}", [f"zzKey{nr}", f"zzKey{nr}.path"] )
+    threads = [threading.Thread( target=cacheKeys, args=(name,) ) for name in gateways]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len( cache.completeAttributeKeyNames( "zzKey" )) == 200
+    cache.cacheRemoveGateway( gateways[0] )
+    assert len( cache.completeAttributeKeyPaths( "zzKey" )) == 200
+    cache.cacheRemoveGateway( gateways[1] )
+    assert cache.completeAttributeKeyNames( "zzKey" ) == []
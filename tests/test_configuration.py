@@ -0,0 +1,45 @@
+import fakegateway
+
+
+def reads( gateway ) -> list[str]:
+    return sorted( call[1] for call in gateway.callsOf( 'read' ))
+
+
+def test_collections_loaded_on_access( gateway ):
+    cfg = fakegateway.newConfiguration( gateway )
+    assert cfg.load()
+    assert reads( gateway ) == []
+    assert sorted( cfg.mappings() ) == [1, 2, 3, 4]
+    # related collections are loaded one level deep
+    assert reads( gateway ) == ['back-end-group', 'ip-address-list', 'mapping', 'virtual-host']
+    assert cfg.objects['mapping'][1].rels['virtual-hosts'][0].reference.name == "vh2"
+    gateway.calls.clear()
+    cfg.vhosts()
+    cfg.mappings()
+    assert reads( gateway ) == []
+
+def test_not_loaded_implicitly( gateway ):
+    cfg = fakegateway.newConfiguration( gateway )
+    assert cfg.mappings() == {}
+    assert gateway.calls == []
+    assert cfg._loaded == False
+
+def test_other_configuration_loaded( gateway ):
+    a = fakegateway.newConfiguration( gateway, id='7' )
+    b = fakegateway.newConfiguration( gateway, id='8' )
+    assert a.load()
+    a.mappings()
+    assert b.load()
+    assert a._loaded == False and b._loaded == True
+    gateway.calls.clear()
+    # not fetched from the workspace now holding b
+    assert a.hostnames() == {}
+    assert gateway.calls == []
+    a.objects['mapping'][1].set( 'backendTimeout', 5 )
+    assert not a.sync()
+    assert gateway.callsOf( 'update' ) == []
+    assert a.load()
+    assert b._loaded == False
+    assert a.sync()
+    assert len( gateway.callsOf( 'update' )) == 1
+    assert not b.sync()
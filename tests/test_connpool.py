@@ -0,0 +1,96 @@
+import gc
+
+import requests
+
+from airscript import session
+from airscript.utils import connpool
+
+
+def adapterOf( sess: requests.Session, hostname: str ):
+    return sess.get_adapter( f"https://{hostname}/airlock/rest/configuration/mappings" )
+
+def sessions( pool: connpool.ConnectionPool ) -> dict:
+    return { entry['host']: entry['sessions'] for entry in pool.stats() }
+
+
+def test_adapter_shared_per_host():
+    pool = connpool.ConnectionPool()
+    a = pool.session( "gw1" )
+    b = requests.Session()
+    pool.attach( b, "gw1" )
+    c = pool.session( "gw2" )
+    assert adapterOf( a, "gw1" ) is adapterOf( b, "gw1" )
+    assert adapterOf( c, "gw2" ) is not adapterOf( a, "gw1" )
+    # other hosts use the session's own connections
+    assert adapterOf( a, "other" ) is not adapterOf( a, "gw1" )
+    assert sessions( pool ) == { "gw1": 2, "gw2": 1 }
+
+def test_attach_twice_counted_once():
+    pool = connpool.ConnectionPool()
+    a = pool.session( "gw1" )
+    pool.attach( a, "gw1" )
+    assert sessions( pool ) == { "gw1": 1 }
+    assert len( a.hooks['response'] ) == 1
+
+def test_stats_count_live_sessions():
+    pool = connpool.ConnectionPool()
+    a = pool.session( "gw1" )
+    b = pool.session( "gw1" )
+    pool.release( a )
+    pool.release( a )
+    assert sessions( pool ) == { "gw1": 1 }
+    del b
+    gc.collect()
+    assert sessions( pool ) == { "gw1": 0 }
+
+def test_requests_counted():
+    pool = connpool.ConnectionPool()
+    a = pool.session( "gw1" )
+    for hook in a.hooks['response']:
+        hook( None )
+    assert pool.stats()[0]['requests'] == 1
+
+def test_idle_sweep_on_request():
+    pool = connpool.ConnectionPool( idle_timeout=60 )
+    a = pool.session( "gw1" )
+    b = pool.session( "gw2" )
+    shared = adapterOf( a, "gw1" )
+    pool._hosts["gw1"].last_used -= 61
+    # request to gw2 closes idle connections to gw1
+    for hook in b.hooks['response']:
+        hook( None )
+    assert pool._hosts["gw1"].adapter == None
+    assert pool._hosts["gw2"].adapter is adapterOf( b, "gw2" )
+    c = pool.session( "gw1" )
+    assert adapterOf( c, "gw1" ) is not shared
+    assert pool.sweep() == 0
+
+def test_no_idle_timeout():
+    pool = connpool.ConnectionPool( idle_timeout=None )
+    pool.session( "gw1" )
+    pool._hosts["gw1"].last_used -= 3600
+    assert pool.sweep() == 0
+    assert pool._hosts["gw1"].adapter != None
+
+def test_gateway_session_attached():
+    class Gateway( object ):
+        def getHost( self ):
+            return "gw-attached"
+        def getKey( self ):
+            return "key"
+    class Connection( object ):
+        # pyAirlock session, HTTP session created by connect()
+        session = None
+        def connect( self ) -> bool:
+            self.session = requests.Session()
+            return True
+        def disconnect( self ):
+            self.session = None
+    gs = session.GatewaySession( "gw", Gateway(), None )
+    conn = Connection()
+    assert gs._connect( conn )
+    pool = connpool.getPool()
+    assert adapterOf( conn.session, "gw-attached" ) is pool._hosts["gw-attached"].adapter
+    gs.session = conn
+    gs.disconnect()
+    assert sessions( pool )["gw-attached"] == 0
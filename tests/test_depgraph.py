@@ -0,0 +1,90 @@
+from airscript.base import depgraph
+from airscript.model import configuration
+
+
+# relationship order used before TYPE_GRAPH, lower numbers sync'ed first
+RELATIONSHIP_ORDER = {
+    "mapping-template": 0,
+    "host": 1,
+    "allowed-network-endpoint": 2,
+    "icap-environment": 3,
+    "route-ipv4-destination": 10,
+    "route-ipv6-destination": 11,
+    "route-ipv4-source": 12,
+    "route-ipv6-source": 13,
+    "api-policy-service": 1000,
+    "graphql-document": 1100,
+    "ip-address-list": 1200,
+    "openapi-document": 1300,
+    "ssl-certificate": 2000,
+    "kerberos-environment": 3000,
+    "node": 3100,
+    "local-json-web-key-set": 3200,
+    "remote-json-web-key-set": 3200,
+    "anomaly-shield-trigger": 4000,
+    "anomaly-shield-traffic-matcher": 4200,
+    "anomaly-shield-rule": 4400,
+    "anomaly-shield-application": 4600,
+    "back-end-group": 5000,
+    "virtual-host": 5200,
+    "mapping": 6000,
+}
+
+
+def test_levels():
+    graph = depgraph.DependencyGraph()
+    graph.addDependency( 'c', 'b' )
+    graph.addDependency( 'b', 'a' )
+    graph.addDependency( 'd', 'a' )
+    graph.add( 'e' )
+    assert graph.levels() == [['a', 'e'], ['b', 'd'], ['c']]
+    assert graph.order() == ['a', 'e', 'b', 'd', 'c']
+    assert graph.dependencies( 'c' ) == ['b']
+
+def test_levels_key():
+    graph = depgraph.DependencyGraph()
+    for node in ['x', 'y', 'z']:
+        graph.addDependency( node, 'a' )
+    assert graph.levels( key=lambda x: -ord( x )) == [['a'], ['z', 'y', 'x']]
+
+def test_cycle_same_level():
+    graph = depgraph.DependencyGraph()
+    graph.addDependency( 'mapping', 'vhost' )
+    graph.addDependency( 'vhost', 'mapping' )
+    graph.addDependency( 'vhost', 'certificate' )
+    graph.addDependency( 'report', 'mapping' )
+    assert graph.levels() == [['certificate'], ['mapping', 'vhost'], ['report']]
+
+def test_self_dependency_ignored():
+    graph = depgraph.DependencyGraph()
+    graph.addDependency( 'a', 'a' )
+    assert graph.levels() == [['a']]
+    assert graph.dependencies( 'a' ) == []
+
+def test_type_graph_covers_element_types():
+    assert set( RELATIONSHIP_ORDER ) <= set( configuration.TYPE_GRAPH.order() )
+
+def test_type_graph_matches_relationship_order():
+    # no element type may depend on a type sync'ed after it in the old relationship order
+    violations = []
+    for type_name in RELATIONSHIP_ORDER:
+        for dependency in configuration.TYPE_GRAPH.dependencies( type_name ):
+            if dependency in RELATIONSHIP_ORDER and RELATIONSHIP_ORDER[dependency] > RELATIONSHIP_ORDER[type_name]:
+                violations.append( (type_name, dependency) )
+    assert violations == []
+
+def test_type_graph_levels():
+    levels = configuration.TYPE_GRAPH.levels()
+    level_of = { type_name: nr for nr, level in enumerate( levels ) for type_name in level }
+    assert level_of['mapping'] == len( levels ) - 1
+    for type_name in ["virtual-host", "back-end-group", "openapi-document", "graphql-document", "api-policy-service", "anomaly-shield-application"]:
+        assert level_of[type_name] < level_of['mapping']
+    assert level_of['ssl-certificate'] < level_of['virtual-host']
+    assert level_of['anomaly-shield-rule'] < level_of['anomaly-shield-application']
+
+def test_type_closure_mapping( config ):
+    required = config.typeClosure( ['Mapping'] )
+    for type_name in ["virtual-host", "back-end-group", "openapi-document", "graphql-document", "api-policy-service", "ssl-certificate"]:
+        assert type_name in required
+    assert required[-1] == 'mapping'
+    assert not 'node' in required
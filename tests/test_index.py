@@ -0,0 +1,40 @@
+from airscript.base import index
+
+
+def names( elements: list ) -> list[str]:
+    return sorted( elem.name for elem in elements )
+
+
+def test_lookups( config ):
+    assert names( config.findMappingsByLabel( "prod" )) == ["map1", "map3"]
+    assert names( config.findMappingsByLabel( "L2" )) == ["map2"]
+    assert names( config.findMappingsByEntryPath( "/m3/" )) == ["map3"]
+    assert names( config.findVHostsByHostname( "vh2.example.com" )) == ["vh2"]
+    assert config.findVHostsByHostname( "none.example.com" ) == []
+    assert config.listLabels() == ["L1", "L2", "L3", "L4", "Prod", "Test"]
+    assert config.findIndexed( 'mapping', index.NAME, "map4" ) == [config.objects['mapping'][4]]
+    assert config.findIndexed( 'no-such-type', index.NAME, "map4" ) == []
+
+def test_index_follows_changes( config ):
+    m = config.objects['mapping'][2]
+    m.setName( "renamed" )
+    m.attrs['entryPath']['value'] = "/renamed/"
+    m.attrs['labels'].remove( "L2" )
+    assert config.findIndexed( 'mapping', index.NAME, "map2" ) == []
+    assert config.findIndexed( 'mapping', index.NAME, "renamed" ) == [m]
+    assert names( config.findMappingsByEntryPath( "/renamed/" )) == ["renamed"]
+    assert config.findMappingsByEntryPath( "/m2/" ) == []
+    assert config.findMappingsByLabel( "L2" ) == []
+    assert "L2" not in config.listLabels()
+
+def test_deleted_not_indexed( config ):
+    m = config.objects['mapping'][3]
+    m.delete()
+    assert names( config.findMappingsByLabel( "Prod" )) == ["map1"]
+    assert config.findMappingsByEntryPath( "/m3/" ) == []
+
+def test_new_elements_indexed( config ):
+    m = config.createElement( 'mapping', data={ 'attributes': { 'name': "new", 'entryPath': { 'value': "/new/" }, 'labels': ["Prod"] }} )
+    config._addElement2ObjectMap( m )
+    assert config.findMappingsByEntryPath( "/new/" ) == [m]
+    assert names( config.findMappingsByLabel( "prod" )) == ["map1", "map3", "new"]
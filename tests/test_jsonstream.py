@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from airscript.utils import jsonstream
+
+import fakegateway
+
+
+DOCUMENT = { 'meta': { 'total': 3 },
+             'data': [{ 'id': "1", 'attributes': { 'name': "Zürich \"Süd\" ✓", 'timeout': 123456789, 'ratio': -1.5e-3 }},
+                      { 'id': "2", 'attributes': { 'name': "", 'labels': ["a", "b"], 'enabled': False, 'comment': None }},
+                      { 'id': "3", 'attributes': {}}],
+             'links': { 'self': "/mappings" }}
+
+
+def chunked( text: str, size: int ) -> list[bytes]:
+    body = text.encode( 'utf-8' )
+    return [body[pos:pos + size] for pos in range( 0, len( body ), size )]
+
+def decode( text: str, size: int ) -> list:
+    return list( jsonstream.iterData( chunked( text, size )))
+
+
+@pytest.mark.parametrize( "size", [1, 2, 3, 5, 64, 4096] )
+def test_chunk_boundaries( size ):
+    # single bytes split strings, escapes, numbers and multi-byte UTF-8 characters
+    text = json.dumps( DOCUMENT, ensure_ascii=False )
+    assert decode( text, size ) == DOCUMENT['data']
+
+def test_number_at_chunk_end():
+    assert list( jsonstream.iterData( [b'{"data": [12', b'34, 5', b'6]}'] )) == [1234, 56]
+
+def test_str_chunks():
+    assert list( jsonstream.iterData( ['{"da', 'ta": [{"id": "1"}]}'] )) == [{ 'id': "1" }]
+
+def test_data_object():
+    text = json.dumps( { 'data': { 'id': "1", 'type': "session" }, 'meta': {} } )
+    assert decode( text, 3 ) == [{ 'id': "1", 'type': "session" }]
+
+@pytest.mark.parametrize( "text", ['{"data": []}', '{ "data" : [ ] , "meta": {} }', '{"data": null}', '{}'] )
+def test_empty( text ):
+    assert decode( text, 1 ) == []
+
+@pytest.mark.parametrize( "text", ['{"data": [{"id": "1"}, {"id": "2"', '{"data": [{"id": "1"}', '{"data": [1, 2]', '{"data": [12', ''] )
+def test_truncated( text ):
+    with pytest.raises( jsonstream.StreamError ):
+        decode( text, 4 )
+
+def test_invalid():
+    with pytest.raises( jsonstream.StreamError ):
+        decode( '{"data": [{"id": "1"} {"id": "2"}]}', 4 )
+
+def test_stream_data( gateway ):
+    entries = list( jsonstream.streamData( gateway, "/configuration/mappings" ))
+    assert entries == gateway.mapping.data
+    # only the streaming request leaves the response body unread
+    assert not gateway.session.stream
+    assert list( jsonstream.streamData( gateway, "/configuration/unknown" )) == []
+
+def test_stream_data_connection_lost( gateway ):
+    gateway.fail_after = 100
+    with pytest.raises( jsonstream.StreamError ):
+        list( jsonstream.streamData( gateway, "/configuration/mappings" ))
+    assert not gateway.session.stream
+
+def test_stream_collection_fallback( gateway ):
+    cfg = fakegateway.newConfiguration( gateway, { 'airscript': { 'load': { 'streaming': True }}} )
+    assert cfg.load()
+    # connection lost after the first mappings have been built
+    gateway.fail_after = len( json.dumps( { 'data': gateway.mapping.data[:2] } ))
+    gateway.calls.clear()
+    built = []
+    buildEntry = cfg._buildEntry
+    def recordEntry( func, entry, params ):
+        built.append( entry['id'] )
+        buildEntry( func, entry, params )
+    cfg._buildEntry = recordEntry
+    assert len( cfg.getMappings() ) == 4
+    # entries built before the failure are not built again
+    assert built == ["1", "2", "3", "4"]
+    assert gateway.callsOf( 'get' ) == [('get', "/configuration/mappings")]
+    assert gateway.callsOf( 'read' ) == [('read', 'mapping')]
+    assert sorted( cfg.objects['mapping'] ) == [1, 2, 3, 4]
+    assert cfg.objects['mapping'][3].name == "map3"
+    assert cfg.objects['mapping'][1].rels['virtual-hosts'][0].reference.id == 2
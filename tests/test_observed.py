@@ -0,0 +1,84 @@
+import copy
+import json
+import pickle
+
+from airscript.base import observed
+
+
+def isPlain( value ) -> bool:
+    if type( value ) == dict:
+        return all( isPlain( v ) for v in value.values() )
+    if type( value ) == list:
+        return all( isPlain( v ) for v in value )
+    return type( value ) in (str, int, float, bool, type( None ))
+
+def newMapping( config, name: str ):
+    m = config.createElement( 'mapping', data={ 'attributes': { 'name': name }} )
+    config._addElement2ObjectMap( m )
+    return m
+
+def updates( gateway ) -> list[dict]:
+    return [json.loads( call[3] ) for call in gateway.callsOf( 'update' )]
+
+
+def test_copy_isolated( config ):
+    m = config.objects['mapping'][1]
+    n = newMapping( config, "copy" )
+    n.copyAttributes( m )
+    n.attrs['labels'].append( "new" )
+    n.set( 'locking.application.response.compressionAllowed', False )
+    assert m.attrs['labels'] == ["Prod", "L1"]
+    assert m.get( 'locking.application.response.compressionAllowed' ) == True
+    assert n.attrs['labels'] == ["Prod", "L1", "new"]
+
+def test_copy_detached_from_earlier_reference( config ):
+    m = config.objects['mapping'][1]
+    labels = m.attrs['labels']
+    locking = m.attrs['locking']['application']
+    n = newMapping( config, "copy" )
+    n.copyAttributes( m )
+    n2 = newMapping( config, "copy2" )
+    n2.copyAttributes( n )
+    labels.append( "z" )
+    locking['response']['compressionAllowed'] = False
+    assert m.attrs['labels'] == ["Prod", "L1", "z"]
+    assert n.attrs['labels'] == ["Prod", "L1"]
+    assert n2.attrs['labels'] == ["Prod", "L1"]
+    assert m.get( 'locking.application.response.compressionAllowed' ) == False
+    assert n.get( 'locking.application.response.compressionAllowed' ) == True
+    assert n2.get( 'locking.application.response.compressionAllowed' ) == True
+    n.attrs['labels'].append( "q" )
+    assert n2.attrs['labels'] == ["Prod", "L1"]
+
+def test_changes_tracked( config ):
+    m = config.objects['mapping'][1]
+    m.attrs['labels'].append( "x" )
+    assert m in config.changes()
+    m.set( 'backendTimeout', 99 )
+    assert config.sync()
+    assert updates( config.conn ) == [{ 'backendTimeout': 99, 'labels': ["Prod", "L1", "x"] }]
+    assert config.changes() == []
+
+def test_nested_delta( config ):
+    m = config.objects['mapping'][2]
+    m.attrs['locking']['application']['response']['compressionAllowed'] = False
+    assert config.sync()
+    assert updates( config.conn ) == [{ 'locking': { 'application': { 'response': { 'compressionAllowed': False }}}}]
+
+def test_unchanged_value_not_sent( config ):
+    m = config.objects['mapping'][3]
+    m.set( 'backendTimeout', 30 )
+    assert config.sync()
+    assert config.conn.callsOf( 'update' ) == []
+
+def test_plain_containers( config ):
+    m = config.objects['mapping'][1]
+    assert isinstance( m.attrs['labels'], observed.ObservedList )
+    data = m.datafy()
+    assert isPlain( data )
+    assert isPlain( copy.deepcopy( m.attrs ))
+    assert isPlain( pickle.loads( pickle.dumps( m.attrs )))
+    assert isPlain( copy.copy( m.attrs['labels'] ))
+    data['attributes']['labels'].append( "not tracked" )
+    assert m.attrs['labels'] == ["Prod", "L1"]
+    assert config.changes() == []
@@ -0,0 +1,54 @@
+import pytest
+
+from airscript.base import query
+
+
+def ids( result: dict ) -> list:
+    return sorted( result )
+
+
+def test_plain_values( config ):
+    assert ids( config.mappings( filter={ 'name': "map1" } )) == [1]
+    assert ids( config.mappings( filter={ 'name': "map" } )) == [1, 2, 3, 4]
+    assert ids( config.mappings( filter={ 'backendTimeout': 20 } )) == [2]
+    assert ids( config.mappings( filter={ 'locking.application.response.compressionAllowed': True } )) == [1, 2, 3, 4]
+
+def test_operators( config ):
+    assert ids( config.mappings( filter={ 'backendTimeout': { 'op': '>', 'value': 20 }} )) == [3, 4]
+    assert ids( config.mappings( filter={ 'backendTimeout': { 'op': 'le', 'value': 20 }} )) == [1, 2]
+    assert ids( config.mappings( filter={ 'backendTimeout': { 'op': '!=', 'value': 20 }} )) == [1, 3, 4]
+    assert ids( config.mappings( filter={ 'labels': { 'op': 'contains', 'value': "Prod" }} )) == [1, 3]
+    assert ids( config.mappings( filter={ 'labels': { 'op': 'in', 'value': ["L2", "L4"] }} )) == [2, 4]
+    assert ids( config.mappings( filter={ 'id': { 'op': 'in', 'value': [1, 3] }} )) == [1, 3]
+    assert ids( config.mappings( filter={ 'op': '>=', 'backendTimeout': 30 } )) == [3, 4]
+
+def test_and_or( config ):
+    assert ids( config.mappings( filter={ 'labels': { 'op': 'contains', 'value': "Prod" }, 'backendTimeout': 30 } )) == [3]
+    assert ids( config.mappings( filter=[{ 'name': "map1" }, { 'entryPath.value': "/m2/" }] )) == [1, 2]
+
+def test_index_used( config ):
+    assert config.explain( 'mapping', filter={ 'labels': { 'op': 'contains', 'value': "Prod" }} ).startswith( "index" )
+    assert config.explain( 'mapping', filter={ 'backendTimeout': { 'op': '>', 'value': 20 }} ).startswith( "scan" )
+
+def test_index_follows_changes( config ):
+    config.objects['mapping'][2].attrs['labels'].append( "Prod" )
+    assert ids( config.mappings( filter={ 'labels': { 'op': 'contains', 'value': "Prod" }} )) == [1, 2, 3]
+
+def test_explain_by_kind( config ):
+    assert config.explain( 'Mapping', filter={ 'name': "map1" } ) == config.explain( 'mapping', filter={ 'name': "map1" } )
+    assert config.explain( 'no-such-kind' ) == None
+
+def test_invalid_filters_reported( config ):
+    assert config.mappings( filter={ 'name': "map(" } ) == {}
+    assert config.mappings( filter={ 'backendTimeout': { 'op': '~', 'value': 1 }} ) == {}
+    assert config.mappings( filter={ 'id': { 'op': 'in', 'value': 1 }} ) == {}
+    assert config.explain( 'mapping', filter={ 'name': "(" } ) == None
+    assert config.objects['mapping'][1].filter( { 'name': "(" } ) == False
+
+def test_predicate_errors():
+    with pytest.raises( ValueError ):
+        query.Predicate( 'name', "(" )
+    with pytest.raises( ValueError ):
+        query.Predicate( 'backendTimeout', 1, op='~' )
+    with pytest.raises( ValueError ):
+        query.Query( filter=["name"] )
@@ -0,0 +1,107 @@
+import gzip
+import os
+import stat
+import time
+
+from airscript.utils import snapshot
+
+import fakegateway
+
+
+CREATED = "2024-01-01T10:00:00+00:00"
+
+
+def newSnapshot( config_id: str="7", created_at: str=CREATED, version: str="8.3" ) -> dict:
+    return snapshot.create( "gw", version, config_id, created_at, { 'mappings': [{ 'id': config_id }] } )
+
+def mode( path ) -> int:
+    return stat.S_IMODE( os.stat( path ).st_mode )
+
+def age( fname: str, days: float ):
+    then = time.time() - days * 86400
+    os.utime( fname, (then, then) )
+
+
+def test_store_and_load( tmp_path ):
+    cache = snapshot.SnapshotCache( str( tmp_path / "cache" ))
+    snap = newSnapshot()
+    assert cache.store( snap )
+    assert cache.load( "gw", "7", CREATED, "8.3" ) == snap
+    assert cache.load( "gw", "8", CREATED, "8.3" ) == None
+
+def test_permissions( tmp_path ):
+    cache = snapshot.SnapshotCache( str( tmp_path / "cache" ))
+    assert cache.store( newSnapshot() )
+    fname = cache.path( "gw", "7", CREATED )
+    assert mode( fname ) == 0o600
+    assert mode( os.path.dirname( fname )) == 0o700
+    assert mode( cache.directory ) == 0o700
+    assert [name for name in os.listdir( os.path.dirname( fname )) if name.endswith( ".tmp" )] == []
+
+def test_mismatch_rejected( tmp_path ):
+    cache = snapshot.SnapshotCache( str( tmp_path ))
+    assert cache.store( newSnapshot() )
+    assert cache.load( "gw", "7", CREATED, "8.4" ) == None
+    # same file name, different creation timestamp or id
+    assert cache.path( "gw", "7", "2024-01-01T10:00:00/00:00" ) == cache.path( "gw", "7", CREATED )
+    assert cache.load( "gw", "7", "2024-01-01T10:00:00/00:00", "8.3" ) == None
+    assert cache.store( newSnapshot( config_id="7/" ))
+    assert cache.load( "gw", "7_", CREATED, "8.3" ) == None
+
+def test_corrupt_files_ignored( tmp_path ):
+    cache = snapshot.SnapshotCache( str( tmp_path ))
+    fname = cache.path( "gw", "7", CREATED )
+    os.makedirs( os.path.dirname( fname ))
+    with open( fname, 'wb' ) as fp:
+        fp.write( b"not a snapshot" )
+    assert cache.load( "gw", "7", CREATED, "8.3" ) == None
+    with gzip.open( fname, 'wt' ) as fp:
+        fp.write( '{"format": 1, "collections": ' )
+    assert cache.load( "gw", "7", CREATED, "8.3" ) == None
+    with gzip.open( fname, 'wt' ) as fp:
+        fp.write( '{"format": 99, "collections": {}}' )
+    assert cache.load( "gw", "7", CREATED, "8.3" ) == None
+    # replaced by next store
+    assert cache.store( newSnapshot() )
+    assert cache.load( "gw", "7", CREATED, "8.3" ) != None
+
+def test_evict_by_age( tmp_path ):
+    cache = snapshot.SnapshotCache( str( tmp_path ), max_age=1 )
+    cache.store( newSnapshot( config_id="1" ))
+    age( cache.path( "gw", "1", CREATED ), 2 )
+    cache.store( newSnapshot( config_id="2" ))
+    assert [x[0] for x in cache.entries()] == [cache.path( "gw", "2", CREATED )]
+
+def test_evict_by_count_least_recently_used( tmp_path ):
+    cache = snapshot.SnapshotCache( str( tmp_path ), max_entries=2 )
+    for nr, id in enumerate( ["1", "2"] ):
+        cache.store( newSnapshot( config_id=id ))
+        age( cache.path( "gw", id, CREATED ), 0.5 - nr * 0.1 )
+    # loading marks snapshot as used
+    assert cache.load( "gw", "1", CREATED, "8.3" ) != None
+    cache.store( newSnapshot( config_id="3" ))
+    assert sorted( x[0] for x in cache.entries() ) == [cache.path( "gw", "1", CREATED ), cache.path( "gw", "3", CREATED )]
+
+def test_evict_by_size( tmp_path ):
+    cache = snapshot.SnapshotCache( str( tmp_path ))
+    cache.store( newSnapshot( config_id="1" ))
+    age( cache.path( "gw", "1", CREATED ), 0.1 )
+    cache.store( newSnapshot( config_id="2" ))
+    assert len( cache.entries() ) == 2
+    cache.max_size = sum( x[2] for x in cache.entries() ) / 1024 / 1024
+    assert cache.evict() == 0
+    cache.max_size -= 1 / 1024 / 1024
+    assert cache.evict() == 1
+    assert [x[0] for x in cache.entries()] == [cache.path( "gw", "2", CREATED )]
+
+def test_configuration_uses_snapshot( gateway, tmp_path ):
+    settings = { 'airscript': { 'cache': { 'enabled': True, 'dir': str( tmp_path ) }}}
+    cfg = fakegateway.newConfiguration( gateway, settings )
+    assert cfg.loadAll()
+    assert len( gateway.callsOf( 'read' )) > 0
+    gateway.calls.clear()
+    cached = fakegateway.newConfiguration( gateway, settings )
+    assert cached.loadAll()
+    assert gateway.callsOf( 'read' ) == []
+    assert sorted( cached.mappings() ) == [1, 2, 3, 4]
+    assert cached.objects['mapping'][1].rels['virtual-hosts'][0].reference.name == "vh2"
@@ -0,0 +1,284 @@
+import json
+
+import pytest
+
+from pyAirlock.common import exception
+
+from airscript.base import syncplan
+from airscript.utils import journal
+
+import fakegateway
+
+
+def newElement( config, kind: str, attributes: dict ):
+    elem = config.createElement( kind, data={ 'attributes': attributes } )
+    config._addElement2ObjectMap( elem )
+    return elem
+
+def newMapping( config, name: str ):
+    return newElement( config, 'mapping', { 'name': name, 'entryPath': { 'value': f"/{name}/" }, 'labels': [] } )
+
+def creates( gateway ) -> list[str]:
+    return [call[2] for call in gateway.callsOf( 'create' )]
+
+def loadConfiguration( gateway, settings: dict=None ):
+    cfg = fakegateway.newConfiguration( gateway, settings or { 'airscript': { 'sync': { 'backoff': 0 }}} )
+    assert cfg.loadAll()
+    gateway.calls.clear()
+    return cfg
+
+
+@pytest.fixture
+def related( config ):
+    """ New virtual host and mapping depending on each other, new backend group referenced by the new mapping """
+    m1 = config.objects['mapping'][1]
+    vh = newElement( config, 'virtual-host', { 'name': "vnew", 'hostName': "n.example.com" } )
+    mn = newMapping( config, "mnew" )
+    bg = newElement( config, 'back-end-group', { 'name': "bgnew", 'backendHosts': [] } )
+    m1.addRel( vh, 'virtual-hosts', load=True )
+    vh.addRel( m1, 'mappings' )
+    mn.addRel( vh, 'virtual-hosts', load=True )
+    vh.addRel( mn, 'mappings', load=True )
+    mn.addRel( bg, 'back-end-groups', load=True )
+    bg.addRel( mn, 'mappings', load=True )
+    return m1, vh, mn, bg
+
+
+def test_plan_tiers( config, related ):
+    plan = config.plan()
+    # new backend group sends the connection to the new mapping, it is sync'ed after it
+    assert [tier.element_types for tier in plan.tiers] == [['virtual-host', 'mapping'], ['back-end-group']]
+    for tier in plan.tiers:
+        creates = [op.action for item, ops in tier.phase( syncplan.PHASE_ELEMENTS ) for op in ops]
+        connects = [op.action for item, ops in tier.phase( syncplan.PHASE_CONNECTIONS ) for op in ops]
+        assert set( creates ) == { "create" }
+        assert set( connects ) == { "connect" }
+        assert len( creates ) + len( connects ) == len( tier.operations )
+    # connection between new virtual host and mapping is sent once
+    assert len( [op for op in plan.operations if op.action == "connect" and op.element.name in ("vnew", "mnew")] ) == 1
+
+def test_plan_side_effect_free( config, related ):
+    m1, vh, mn, bg = related
+    m1.set( 'backendTimeout', 5 )
+    pending = config.changes()
+    config.plan()
+    config.plan()
+    assert config.changes() == pending
+    assert config.conn.calls == []
+
+def test_plan_totals( config, related ):
+    m1, vh, mn, bg = related
+    m1.set( 'backendTimeout', 5 )
+    plan = config.plan()
+    totals = plan.totals()
+    assert totals['create'] == 3 and totals['update'] == 1
+    assert totals['requests'] == len( plan ) == sum( totals[action] for action in ['create', 'update', 'delete', 'upload', 'connect', 'disconnect'] )
+    assert totals['bytes'] == sum( op.size for op in plan )
+    # requests sent by sync, one per operation
+    assert config.sync()
+    assert len( config.conn.calls ) == totals['requests']
+
+def test_plan_estimate( config, related ):
+    plan = config.plan()
+    sequential = plan.estimate( seconds_per_request=1 )
+    assert sequential == len( plan )
+    # elements of a tier in parallel, phases and tiers one after the other
+    phases = sum( 1 for tier in plan.tiers for phase in [syncplan.PHASE_ELEMENTS, syncplan.PHASE_CONNECTIONS] if tier.phase( phase ))
+    assert phases <= plan.estimate( seconds_per_request=1, workers=100 ) < sequential
+
+@pytest.mark.parametrize( "workers", [None, 4] )
+def test_sync_order( config, related, workers ):
+    m1, vh, mn, bg = related
+    assert config.sync( workers=workers )
+    calls = [call for call in config.conn.calls if call[0] in ('create', 'connect')]
+    created = { elem.id: nr for nr, call in enumerate( calls ) for elem in (vh, mn, bg) if call == ('create', elem.getTypeName(), elem.name) }
+    assert len( created ) == 3
+    for nr, call in enumerate( calls ):
+        if call[0] == 'connect':
+            # connections are established once both elements exist
+            assert created.get( call[2], -1 ) < nr
+            assert created.get( call[4], -1 ) < nr
+    assert created[mn.id] < created[bg.id]
+    connected = [(call[1], call[2], call[3], call[4]) for call in calls if call[0] == 'connect']
+    assert len( connected ) == len( set( connected ))
+    assert config.changes() == []
+    assert mn.id != None and vh.id != None and bg.id != None
+
+def test_delta_update( config, gateway ):
+    config.objects['mapping'][1].set( 'backendTimeout', 5 )
+    assert config.sync()
+    assert gateway.callsOf( 'update' ) == [('update', 'mapping', 1, json.dumps( { 'backendTimeout': 5 } ))]
+
+@pytest.mark.parametrize( "status", [400, 422] )
+def test_delta_rejected_sends_complete_attributes( config, gateway, status ):
+    update = gateway.mapping.update
+    def rejectPartial( id, data ):
+        if not 'name' in data['attributes']:
+            gateway.record( 'rejected', id )
+            raise exception.AirlockAPIError( status, "invalid" )
+        return update( id, data )
+    gateway.mapping.update = rejectPartial
+    config.objects['mapping'][1].set( 'backendTimeout', 5 )
+    assert config.sync()
+    assert len( gateway.callsOf( 'rejected' )) == 1
+    sent = json.loads( gateway.callsOf( 'update' )[0][3] )
+    assert sent['backendTimeout'] == 5 and sent['name'] == "map1"
+
+@pytest.mark.parametrize( "error, attempts", [(exception.AirlockServerError( 503, "busy" ), 1 + journal.RETRIES_DEFAULT),
+                                              (exception.AirlockCommunicationError(), 1 + journal.RETRIES_DEFAULT),
+                                              (exception.AirlockAPIError( 409, "conflict" ), 1)] )
+def test_delta_not_resent_complete_on_other_errors( config, gateway, error, attempts ):
+    sent = []
+    def fail( id, data ):
+        sent.append( data['attributes'] )
+        raise error
+    gateway.mapping.update = fail
+    config.objects['mapping'][1].set( 'backendTimeout', 5 )
+    assert not config.sync()
+    # server and communication errors are retried, with the changed attributes only
+    assert sent == [{ 'backendTimeout': 5 }] * attempts
+
+def test_transient_errors_retried( config, gateway ):
+    update = gateway.mapping.update
+    failures = { 'count': 2 }
+    def flaky( id, data ):
+        if failures['count'] > 0:
+            failures['count'] -= 1
+            raise exception.AirlockServerError( 503, "busy" )
+        return update( id, data )
+    gateway.mapping.update = flaky
+    config.objects['mapping'][1].set( 'backendTimeout', 5 )
+    assert config.sync()
+    assert failures['count'] == 0
+
+def test_client_errors_not_retried( config, gateway ):
+    attempts = []
+    def reject( id, data ):
+        attempts.append( id )
+        raise exception.AirlockAPIError( 400, "bad" )
+    gateway.mapping.update = reject
+    m = config.objects['mapping'][1]
+    m.set( 'backendTimeout', 5 )
+    assert not config.sync()
+    assert len( attempts ) == 2 # delta and complete attributes
+    assert m in config.syncErrors()
+
+def test_lost_create_response_not_resent( config, gateway ):
+    create = gateway.mapping.create
+    def lost( data ):
+        create( data )
+        if len( creates( gateway )) == 1:
+            raise exception.AirlockCommunicationError()
+        return data
+    gateway.mapping.create = lost
+    m = newMapping( config, "a" )
+    assert config.sync()
+    assert creates( gateway ) == ["a"]
+    assert str( m.id ) == gateway.mapping.data[-1]['id']
+
+def test_failed_create_retried( config, gateway ):
+    create = gateway.mapping.create
+    def unavailable( data ):
+        if gateway.callsOf( 'read' ) == []:
+            gateway.record( 'read', 'unavailable' )
+            raise exception.AirlockServerError( 503, "busy" )
+        return create( data )
+    gateway.mapping.create = unavailable
+    newMapping( config, "a" )
+    assert config.sync()
+    assert creates( gateway ) == ["a"]
+
+def test_operation_key_stable( config ):
+    m = newMapping( config, "b" )
+    op = config.plan().operations[0]
+    key = op.key
+    m.setName( "renamed" )
+    m.attrs['entryPath']['value'] = "/renamed/"
+    assert op.key == key
+
+def test_resume_skips_confirmed( gateway, tmp_path ):
+    path = str( tmp_path / "sync.jsonl" )
+    settings = { 'airscript': { 'sync': { 'backoff': 0, 'retries': 0 }}}
+    create = gateway.mapping.create
+    def failThird( data ):
+        if data['attributes']['name'] == "new2":
+            raise exception.AirlockAPIError( 400, "rejected" )
+        return create( data )
+    gateway.mapping.create = failThird
+    cfg = loadConfiguration( gateway, settings )
+    for i in range( 5 ):
+        newMapping( cfg, f"new{i}" )
+    assert not cfg.sync( journal=path )
+    assert (tmp_path / "sync.jsonl").exists()
+    created = { entry['attributes']['name']: entry['id'] for entry in gateway.mapping.data }
+    # new process, same changes
+    gateway.mapping.create = create
+    cfg = loadConfiguration( gateway, settings )
+    for i in range( 5 ):
+        newMapping( cfg, f"new{i}" )
+    gateway.calls.clear()
+    assert cfg.resumeSync( journal=path )
+    assert creates( gateway ) == ["new2"]
+    assert not (tmp_path / "sync.jsonl").exists()
+    ids = { m.name: m.id for m in cfg.objects['mapping'].values() if m.name.startswith( "new" )}
+    for name, id in created.items():
+        if name.startswith( "new" ):
+            assert str( ids[name] ) == id
+
+def test_resume_after_crash_looks_up_create( gateway, tmp_path ):
+    path = str( tmp_path / "sync.jsonl" )
+    create = gateway.mapping.create
+    def crash( data ):
+        create( data )
+        raise KeyboardInterrupt()
+    gateway.mapping.create = crash
+    cfg = loadConfiguration( gateway )
+    newMapping( cfg, "a" )
+    with pytest.raises( KeyboardInterrupt ):
+        cfg.sync( journal=path )
+    gateway.mapping.create = create
+    cfg = loadConfiguration( gateway )
+    m = newMapping( cfg, "a" )
+    assert cfg.resumeSync( journal=path )
+    assert creates( gateway ) == []
+    assert str( m.id ) == gateway.mapping.data[-1]['id']
+
+def test_resume_after_crash_unnamed_not_resent( gateway, tmp_path ):
+    path = str( tmp_path / "sync.jsonl" )
+    cfg = loadConfiguration( gateway )
+    # interrupted after request was started, element cannot be looked up without name
+    m = newElement( cfg, 'mapping', { 'entryPath': { 'value': "/unnamed/" }} )
+    started = journal.SyncJournal( path )
+    started.begin( cfg.plan().operations[0] )
+    started.close()
+    assert not cfg.resumeSync( journal=path )
+    assert creates( gateway ) == []
+    assert m in cfg.syncErrors()
+
+def test_connections_batched_without_missing_elements( config, gateway ):
+    vh = config.objects['virtual-host'][1]
+    create = gateway.mapping.create
+    def rejectB( data ):
+        if data['attributes']['name'] == "b":
+            raise exception.AirlockAPIError( 400, "rejected" )
+        return create( data )
+    gateway.mapping.create = rejectB
+    patched = []
+    def patch( id, subpath: str=None, data: dict=None, expect=None ):
+        patched.append( data )
+        return {}
+    gateway.vhost.patch = patch
+    mappings = [newMapping( config, name ) for name in ["a", "b", "c"]]
+    for m in mappings:
+        # connections added by the virtual host
+        m.addRel( vh, 'virtual-hosts' )
+        vh.addRel( m, 'mappings', load=True )
+    connect = [op for op in config.plan().operations if op.action == "connect"]
+    assert [entry['id'] for op in connect for entry in op.payload['data']] == ['<new>'] * 3
+    assert not config.sync()
+    a, b, c = mappings
+    assert patched == [{ 'data': [{ 'type': 'mapping', 'id': a.id }, { 'type': 'mapping', 'id': c.id }] }]
+    # connection to mapping not created is kept for the next sync
+    assert vh.isConnectionPending( b )
+    assert not vh.isConnectionPending( a ) and not vh.isConnectionPending( c )
+    assert vh in config.syncErrors()
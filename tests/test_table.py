@@ -0,0 +1,100 @@
+import pytest
+
+numpy = pytest.importorskip( 'numpy' )
+
+from airscript.base import table
+
+
+def column( values: list ) -> table.Column:
+    return table.Column.fromValues( "c", values )
+
+def rows( mask ) -> list[int]:
+    return numpy.flatnonzero( mask ).tolist()
+
+
+@pytest.mark.parametrize( "values, kind", [([True, None, False], table.BOOL),
+                                           ([1, None, 3], table.INT),
+                                           ([1, 2.5, None], table.FLOAT),
+                                           (["a", None, "b"], table.STRING),
+                                           ([["a"], None, []], table.LIST),
+                                           ([1, True], table.OBJECT),
+                                           ([{ 'a': 1 }, None], table.OBJECT),
+                                           ([[1, 2], ["a"]], table.OBJECT),
+                                           ([None, None], table.OBJECT)] )
+def test_kind_detected( values, kind ):
+    c = column( values )
+    assert c.kind == kind
+    assert len( c ) == len( values )
+    assert c.values() == values
+    assert rows( c.isnull() ) == [nr for nr, v in enumerate( values ) if v == None]
+
+def test_take_list():
+    c = column( [["a", "b"], None, ["c"], ["d", "e", "f"], []] )
+    taken = c.take( numpy.array( [3, 0, 1, 2, 3] ))
+    assert taken.values() == [["d", "e", "f"], ["a", "b"], None, ["c"], ["d", "e", "f"]]
+    assert taken.offsets.tolist() == [0, 3, 5, 5, 6, 9]
+    assert taken.take( numpy.array( [4, 1] )).values() == [["d", "e", "f"], ["a", "b"]]
+    empty = c.take( numpy.array( [], dtype=numpy.int64 ))
+    assert len( empty ) == 0 and empty.values() == []
+
+def test_missing_values_never_match():
+    strings = column( ["a", None, "b"] )
+    assert rows( strings.isin( ["a", "b"] )) == [0, 2]
+    assert rows( strings.isin( [None] )) == []
+    assert rows( strings != "a" ) == [2]
+    lists = column( [["a"], None, ["b", "a"]] )
+    assert rows( lists.contains( "a" )) == [0, 2]
+    assert rows( lists.contains( "z" )) == []
+    assert rows( lists.isin( ["b"] )) == [2]
+    # missing numbers are stored as 0
+    numbers = column( [0, None, 2] )
+    assert rows( numbers.isin( [0] )) == [0]
+    assert rows( numbers == 0 ) == [0]
+    assert rows( numbers != 2 ) == [0]
+    objects = column( [{ 'a': 1 }, None] )
+    assert rows( objects.isin( [None] )) == []
+
+def test_contains_requires_list():
+    with pytest.raises( TypeError ):
+        column( ["a"] ).contains( "a" )
+
+def test_counts():
+    assert column( ["a", None, "a", "b"] ).counts() == { "a": 2, "b": 1 }
+    assert column( [1, None, 1, 3] ).counts() == { 1: 2, 3: 1 }
+    # rows per list entry, entries listed twice in a row count once
+    assert column( [["a", "b", "a"], None, ["a"], []] ).counts() == { "a": 2, "b": 1 }
+    assert column( [[], None] ).counts() == {}
+
+def test_count_columns():
+    t = table.Table( { 'mode': column( ["prod", "test", "prod", None, "prod"] ),
+                       'timeout': column( [10, 10, 10, 10, None] ) },
+                     list( range( 5 )))
+    assert t.count( 'mode' ) == { "prod": 3, "test": 1 }
+    # rows lacking a value in any column are not counted
+    assert t.count( 'mode', 'timeout' ) == { ("prod", 10): 2, ("test", 10): 1 }
+    assert t.where( t['mode'] == "none" ).count( 'mode', 'timeout' ) == {}
+    with pytest.raises( TypeError ):
+        table.Table( { 'l': column( [["a"]] ), 'm': column( ["x"] ) }, [0] ).count( 'l', 'm' )
+
+def test_configuration_table( config ):
+    t = config.table( 'Mapping', ['backendTimeout', 'labels', 'locking.application.response.compressionAllowed'] )
+    assert len( t ) == 4
+    assert t['backendTimeout'].kind == table.INT
+    assert t['labels'].kind == table.LIST
+    prod = t.where( t['labels'].contains( "Prod" ) & (t['backendTimeout'] > 10) )
+    assert prod['name'].values() == ["map3"]
+    assert t.count( 'labels' )["Prod"] == 2
+
+def test_join( config ):
+    mappings = config.table( 'Mapping', ['backendTimeout'] )
+    vhosts = config.table( 'VirtualHost', ['hostName'] )
+    joined = mappings.join( vhosts, 'virtual-hosts', prefix="vh." )
+    assert sorted( (r['name'], r['vh.hostName']) for r in joined.records() ) == [("map1", "vh2.example.com"), ("map2", "vh1.example.com"),
+                                                                                ("map3", "vh2.example.com"), ("map4", "vh1.example.com")]
+    assert joined.count( 'vh.name', 'backendTimeout' )[("vh1", 20)] == 1
+    # relationships to elements missing in the other table are omitted
+    assert len( mappings.join( vhosts.where( vhosts['name'] == "vh1" ), 'virtual-hosts' )) == 2
+    # removed relationships are not joined
+    m1 = config.objects['mapping'][1]
+    m1.deleteRel( m1.rels['virtual-hosts'][0].reference )
+    assert len( config.table( 'Mapping' ).join( vhosts, 'virtual-hosts' )) == 3